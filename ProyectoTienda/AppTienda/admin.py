@@ -1,9 +1,258 @@
 from django.contrib import admin
-from .models import User, Customer, Category, Product, StockEntry, Sale
-
-admin.site.register(User)
-admin.site.register(Customer)
-admin.site.register(Category)
-admin.site.register(Product)
-admin.site.register(StockEntry)
-admin.site.register(Sale)
+from django.contrib.admin.utils import get_fields_from_path, lookup_spawns_duplicates
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .models import (User, Customer, Category, Product, StockEntry, Sale, ArchivedSale, ProductBarcode, Job, Store,
+                     MaintenanceRun, BackfillCheckpoint, Shift, ShiftProductTotal, StockReservation, OutboxEvent,
+                     search_key)
+from .search import prefix_range
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Sin filtros, el total sale de las estadísticas de la base (sqlite_stat1 tras
+    ANALYZE, o information_schema en MySQL) en lugar de COUNT(*) sobre toda la
+    tabla. Sin estadísticas se cuenta exacto pero con tope (COUNT sobre un
+    LIMIT): MAX(id) sobrecontaba tras archive_sales o borrados masivos y dejaba
+    páginas vacías al final. Con filtros/búsqueda se cuenta exacto.
+    """
+    count_cap = 100_000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if getattr(qs, "query", None) is None or qs.query.where:
+            return super().count
+        estimate = self._estimate(qs.model, qs.db)
+        if estimate is None:
+            return qs[:self.count_cap].count()
+        return estimate
+
+    @staticmethod
+    def _estimate(model, alias):
+        conn, table = connections[alias], model._meta.db_table
+        with conn.cursor() as cur:
+            if conn.vendor == "sqlite":
+                try:
+                    cur.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+                    row = cur.fetchone()
+                except Exception:  # sin ANALYZE todavía no existe sqlite_stat1
+                    row = None
+                if row:
+                    return int(row[0].split()[0])
+            elif conn.vendor == "mysql":
+                cur.execute("SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s", [table])
+                row = cur.fetchone()
+                if row and row[0] is not None:
+                    return int(row[0])
+        return None
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Base para tablas que crecen sin límite: total estimado y sin el segundo COUNT(*) de "mostrar todos"."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class SearchNameMixin:
+    """
+    Búsqueda servida por índices: por nombre, rango de prefijo sobre
+    ``search_name`` (``^campo`` se compila a LIKE sin distinguir mayúsculas y
+    SQLite no lo sirve del b-tree); los campos ``=`` de ``search_fields`` se
+    comparan por igualdad exacta, no con ``iexact`` (otro LIKE), para que el OR
+    completo se resuelva con un recorrido de índice por término.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        key = search_key(search_term)
+        if not key:
+            return queryset, False
+        term, q = search_term.strip(), Q(**prefix_range("search_name", key))
+        for name in self.get_search_fields(request):
+            path = name.removeprefix("=")
+            try:
+                value = get_fields_from_path(self.model, path)[-1].to_python(term)
+            except ValidationError:
+                continue
+            if lookup_spawns_duplicates(self.opts, path):  # subconsulta en lugar de JOIN: sin duplicados
+                q |= Q(pk__in=self.model._default_manager.filter(**{path: value}).values("pk"))
+            else:
+                q |= Q(**{path: value})
+        return queryset.filter(q), False
+
+
+@admin.register(User)
+class UserAdmin(admin.ModelAdmin):
+    list_display = ("email", "first_name", "last_name", "role", "is_active", "is_staff")
+    list_filter = ("role", "is_active", "is_staff")
+    search_fields = ("email", "first_name", "last_name")
+
+
+@admin.register(Store)
+class StoreAdmin(admin.ModelAdmin):
+    list_display = ("code", "name", "created_at")
+    search_fields = ("=code", "name")
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ("name", "product_count", "units_on_hand", "stock_value", "created_at")
+    search_fields = ("name",)
+
+
+@admin.register(Customer)
+class CustomerAdmin(SearchNameMixin, LargeTableAdmin):
+    list_display = ("id", "first_name", "last_name", "phone", "order_count", "lifetime_value", "last_purchase_at")
+    search_fields = ("=id", "=phone")
+    ordering = ("-id",)
+    readonly_fields = ("lifetime_value", "order_count", "avg_ticket", "first_purchase_at", "last_purchase_at")
+
+
+class ProductBarcodeInline(admin.TabularInline):
+    model = ProductBarcode
+    extra = 0
+
+
+@admin.register(Product)
+class ProductAdmin(SearchNameMixin, LargeTableAdmin):
+    list_display = ("id", "name", "sku", "category", "price", "stock")
+    list_select_related = ("category",)
+    list_filter = ("category",)
+    search_fields = ("=id", "=sku", "=barcodes__code")
+    autocomplete_fields = ("category",)
+    readonly_fields = ("stock", "reserved", "image_hash", "image_source")
+    inlines = (ProductBarcodeInline,)
+
+
+@admin.register(ProductBarcode)
+class ProductBarcodeAdmin(LargeTableAdmin):
+    list_display = ("code", "product", "created_at")
+    list_select_related = ("product",)
+    search_fields = ("=code",)
+    autocomplete_fields = ("product",)
+
+
+@admin.register(StockEntry)
+class StockEntryAdmin(LargeTableAdmin):
+    list_display = ("id", "created_at", "product", "quantity", "store", "note")
+    list_select_related = ("product", "store")
+    list_filter = ("store",)
+    search_fields = ("=id", "=product__id", "=product__sku")
+    autocomplete_fields = ("product",)
+    date_hierarchy = "created_at"
+    ordering = ("-id",)
+
+
+@admin.register(Sale)
+class SaleAdmin(LargeTableAdmin):
+    list_display = ("id", "created_at", "product", "customer", "quantity", "unit_price", "total_amount", "vendor", "store")
+    list_select_related = ("product", "customer", "vendor", "store")
+    list_filter = ("store",)
+    search_fields = ("=id", "=product__id", "=product__sku", "=customer__id", "=customer__phone")
+    autocomplete_fields = ("product", "customer")
+    raw_id_fields = ("vendor", "shift")
+    readonly_fields = ("total_amount",)
+    date_hierarchy = "created_at"
+    ordering = ("-id",)
+
+
+@admin.register(ArchivedSale)
+class ArchivedSaleAdmin(LargeTableAdmin):
+    list_display = ("id", "created_at", "product", "customer", "quantity", "unit_price", "total_amount", "store")
+    list_select_related = ("product", "customer", "store")
+    list_filter = ("store",)
+    search_fields = ("=id", "=product__id", "=customer__id")
+    raw_id_fields = ("product", "customer", "vendor", "shift")
+    date_hierarchy = "created_at"
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):  # solo las escribe archive_sales
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):  # sus totales siguen contados en clientes y rollups
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdmin):
+    list_display = ("id", "kind", "status", "progress", "attempts", "created_by", "created_at", "finished_at")
+    list_select_related = ("created_by",)
+    list_filter = ("status", "kind")
+    search_fields = ("=id", "=kind")
+    raw_id_fields = ("created_by",)
+    ordering = ("-id",)
+
+
+@admin.register(MaintenanceRun)
+class MaintenanceRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "started_at", "trigger", "status", "size_before", "size_after", "finished_at")
+    list_filter = ("status", "trigger")
+    readonly_fields = ("trigger", "status", "steps", "before", "after", "size_before", "size_after", "error",
+                       "started_at", "finished_at")
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):  # solo las escribe maintenance.run()
+        return False
+
+
+@admin.register(BackfillCheckpoint)
+class BackfillCheckpointAdmin(admin.ModelAdmin):
+    list_display = ("name", "partition", "partitions", "last_pk", "range_end", "rows_updated", "done", "updated_at")
+    list_filter = ("name", "done")
+
+
+class ShiftProductTotalInline(admin.TabularInline):
+    model = ShiftProductTotal
+    extra = 0
+    raw_id_fields = ("product",)
+    readonly_fields = ("product", "sales_count", "quantity", "revenue")
+    can_delete = False
+
+
+@admin.register(Shift)
+class ShiftAdmin(LargeTableAdmin):
+    list_display = ("id", "vendor", "store", "opened_at", "closed_at", "sales_count", "revenue", "counted_cash")
+    list_select_related = ("vendor", "store")
+    list_filter = ("store",)
+    search_fields = ("=id", "=vendor__email")
+    raw_id_fields = ("vendor",)
+    readonly_fields = ("sales_count", "units", "revenue", "late_sales", "late_revenue")
+    date_hierarchy = "opened_at"
+    inlines = (ShiftProductTotalInline,)
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(LargeTableAdmin):
+    list_display = ("id", "product", "quantity", "cart", "user", "created_at", "expires_at")
+    list_select_related = ("product", "user")
+    search_fields = ("=cart", "=product__id", "=product__sku")
+    raw_id_fields = ("product", "user")
+    ordering = ("expires_at",)
+
+    def has_add_permission(self, request):  # solo las escribe reservations.py
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(LargeTableAdmin):
+    list_display = ("id", "name", "owner", "created_at", "lease_until")
+    list_filter = ("name",)
+    search_fields = ("=id", "=owner")
+    ordering = ("id",)
+
+    def has_add_permission(self, request):  # solo los escribe events.emit()
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,5 @@ class AppTiendaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "AppTienda"
 
+    def ready(self):
+        from . import signals, handlers  # noqa: F401  (registra receivers y suscriptores de eventos)
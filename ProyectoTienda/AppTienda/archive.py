@@ -0,0 +1,146 @@
+"""
+Archivo de ventas viejas: mueve de ``Sale`` a ``ArchivedSale`` (mismo id) las
+ventas anteriores al horizonte ``SALES_ARCHIVE_DAYS``, por lotes y cada lote en
+su propia transacción.
+
+Antes de mover nada se comprueba que los rollups por producto y por sucursal y
+los agregados de cliente ya cuentan esas ventas (cantidad, unidades e importe);
+el borrado de Sale es crudo (sin post_delete) justamente para que no se resten.
+Cada lote se vuelve a comprobar antes de confirmar su transacción.
+"""
+import math
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, FloatField, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Sale, ArchivedSale, Customer, ProductSalesRollup, StoreSalesRollup
+from .rollups import SALE_AMOUNT, all_sales
+
+FIELDS = ("id", "product_id", "customer_id", "store_id", "vendor_id", "shift_id",
+          "quantity", "unit_price", "total_amount", "created_at")
+
+
+def horizon_days():
+    return getattr(settings, "SALES_ARCHIVE_DAYS", 365)
+
+
+def cutoff(days=None):
+    """Inicio (hora local) del primer día que se queda en la tabla caliente."""
+    day = timezone.localdate() - timedelta(days=horizon_days() if days is None else days)
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def pending(before):
+    return Sale.objects.filter(created_at__lt=before)
+
+
+def _close(a, b):
+    """Tuplas (conteos enteros exactos, importes con tolerancia de centavo por sumas en float)."""
+    if a is None or b is None:
+        return a == b
+    return all(x == y if isinstance(x, int) and isinstance(y, int) else math.isclose(x, y, abs_tol=0.01)
+               for x, y in zip(a, b))
+
+
+def _by_day(key, before):
+    """{(key, día): (ventas, unidades, importe)} de Sale + ArchivedSale antes del corte."""
+    day = TruncDate("created_at", tzinfo=timezone.get_current_timezone())
+    out = {}
+    for qs in all_sales():
+        for r in (qs.filter(created_at__lt=before).annotate(day=day).values(key, "day")
+                  .annotate(n=Count("id"), qty=Sum("quantity"), rev=Sum(SALE_AMOUNT, output_field=FloatField()))):
+            n, qty, rev = out.get((r[key], r["day"]), (0, 0, 0.0))
+            out[(r[key], r["day"])] = (n + r["n"], qty + (r["qty"] or 0), rev + (r["rev"] or 0.0))
+    return out
+
+
+def _customer_totals(customers):
+    """{cliente: (ventas, importe)} de Sale + ArchivedSale."""
+    out = {}
+    for qs in all_sales():
+        for r in (qs.filter(customer_id__in=customers).values("customer_id")
+                  .annotate(n=Count("id"), rev=Sum(SALE_AMOUNT, output_field=FloatField()))):
+            n, rev = out.get(r["customer_id"], (0, 0.0))
+            out[r["customer_id"]] = (n + r["n"], rev + (r["rev"] or 0.0))
+    return out
+
+
+def _customer_stats(customers):
+    """{cliente: (order_count, lifetime_value)} guardados en Customer."""
+    return {pk: (n, v) for pk, n, v in
+            Customer.objects.filter(pk__in=customers).values_list("pk", "order_count", "lifetime_value")}
+
+
+def verify(before):
+    """Lista de diferencias entre las ventas anteriores al corte y sus agregados (vacía = todo cubierto)."""
+    problems = []
+    last_day = timezone.localtime(before).date()
+
+    expected = _by_day("product", before)
+    got = {(r["product_id"], r["start"]): (r["sales_count"], r["quantity"], r["revenue"])
+           for r in ProductSalesRollup.objects.filter(period="d", start__lt=last_day)
+           .values("product_id", "start", "sales_count", "quantity", "revenue")}
+    for key in expected.keys() | {k for k, v in got.items() if not _close(v, (0, 0, 0.0))}:
+        if not _close(expected.get(key, (0, 0, 0.0)), got.get(key, (0, 0, 0.0))):
+            problems.append(f"rollup producto {key[0]} {key[1]}: ventas {expected.get(key)} != rollup {got.get(key)}")
+
+    expected = {k: v for k, v in _by_day("store", before).items() if k[0] is not None}
+    got = {(r["store_id"], r["day"]): (r["sales_count"], r["quantity"], r["revenue"])
+           for r in StoreSalesRollup.objects.filter(day__lt=last_day, store_id__in={k[0] for k in expected})
+           .values("store_id", "day", "sales_count", "quantity", "revenue")}
+    for key, v in expected.items():
+        if not _close(got.get(key), v):
+            problems.append(f"rollup sucursal {key[0]} {key[1]}: ventas {v} != rollup {got.get(key)}")
+
+    customers = pending(before).filter(customer__isnull=False).values("customer_id")
+    totals = _customer_totals(customers)
+    for pk, stats in _customer_stats(customers).items():
+        if not _close(stats, totals.get(pk, (0, 0.0))):
+            problems.append(f"cliente {pk}: ventas {totals.get(pk, (0, 0.0))} != (order_count, lifetime_value) {stats}")
+    return problems
+
+
+def _batch_totals(qs):
+    return qs.aggregate(n=Count("id"), qty=Sum("quantity"), rev=Sum(SALE_AMOUNT, output_field=FloatField()))
+
+
+def move_batch(before, batch_size=1000):
+    """
+    Mueve las ``batch_size`` ventas más viejas (por id) al archivo. Regresa cuántas movió.
+
+    Dentro de la misma transacción compara el lote antes y después (ventas,
+    unidades, importe) y los totales de cada cliente afectado; si algo no
+    cuadra lanza ValueError y el lote se revierte completo.
+    """
+    with transaction.atomic():
+        rows = list(pending(before).order_by("id").values(*FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        ids = [r["id"] for r in rows]
+        customers = {r["customer_id"] for r in rows if r["customer_id"]}
+        moving = _batch_totals(Sale.objects.filter(pk__in=ids))
+        totals, stats = _customer_totals(customers), _customer_stats(customers)
+
+        ArchivedSale.objects.bulk_create([ArchivedSale(**r) for r in rows])
+        # borrado crudo: sin post_delete, los rollups/agregados/bitácora no deben restar estas ventas
+        doomed = Sale.objects.filter(pk__in=ids)
+        doomed._raw_delete(doomed.db)
+
+        problems = []
+        moved = _batch_totals(ArchivedSale.objects.filter(pk__in=ids))
+        if Sale.objects.filter(pk__in=ids).exists() or not _close(
+                (moved["n"], moved["qty"] or 0, moved["rev"] or 0.0), (moving["n"], moving["qty"] or 0, moving["rev"] or 0.0)):
+            problems.append(f"lote {ids[0]}-{ids[-1]}: movidas {moved} != originales {moving}")
+        after_totals, after_stats = _customer_totals(customers), _customer_stats(customers)
+        for pk in customers:
+            if not (_close(after_totals.get(pk), totals.get(pk)) and _close(after_stats.get(pk), stats.get(pk))
+                    and _close(after_stats.get(pk), after_totals.get(pk, (0, 0.0)))):
+                problems.append(f"cliente {pk}: ventas {totals.get(pk)} -> {after_totals.get(pk)}, "
+                                f"(order_count, lifetime_value) {stats.get(pk)} -> {after_stats.get(pk)}")
+        if problems:
+            raise ValueError("El lote no cuadra; se revirtió: " + "; ".join(problems[:5]))
+    return len(rows)
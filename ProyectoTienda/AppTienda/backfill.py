@@ -0,0 +1,128 @@
+"""
+Correcciones de datos históricos por rangos de llave primaria.
+
+Registrar un backfill (un UPDATE set-based; ``where`` deja fuera lo que ya está
+bien, así repetirlo no cambia nada):
+
+    @backfill("sale_total_amount", Sale, where=Q(total_amount=0))
+    def sale_total_amount():
+        return {"total_amount": Round(F("unit_price") * F("quantity"), 2)}
+
+``run()`` recorre la tabla en trozos ``(last_pk, last_pk + chunk_size]``: cada
+trozo es un UPDATE y el avance (``BackfillCheckpoint``) se guarda en la misma
+transacción, así que al cortarlo y volver a correr sigue donde se quedó.
+Entre trozos duerme ``sleep`` más ``sleep_ratio`` veces lo que tardó el trozo,
+para dejarle el lock de escritura a la caja.
+
+Con ``partitions=N`` el rango de pk (fijado en la primera corrida) se parte en
+N tramos contiguos con su propio checkpoint; cada tramo puede correr en su
+propio hilo o proceso. En SQLite las escrituras se serializan igual: el
+paralelismo sirve sobre todo para repartir en varias ventanas o máquinas.
+
+Los UPDATE no disparan señales: nada derivado (rollups, bitácora) se entera.
+"""
+import time
+from collections import namedtuple
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Max, Min, Q
+from django.db.models.functions import Round
+
+from .models import Sale, ArchivedSale, BackfillCheckpoint
+
+Spec = namedtuple("Spec", "name model where updates description")
+
+REGISTRY = {}
+
+
+def backfill(name, model, where=None, description=""):
+    def deco(fn):
+        REGISTRY[name] = Spec(name, model, where or Q(), fn, description or (fn.__doc__ or "").strip())
+        return fn
+    return deco
+
+
+def get(name):
+    try:
+        return REGISTRY[name]
+    except KeyError:
+        raise LookupError(f"Backfill desconocido: {name}") from None
+
+
+def pending(name):
+    """Filas que todavía necesitan la corrección (COUNT completo; para reportes, no para el bucle)."""
+    spec = get(name)
+    return spec.model.objects.filter(spec.where).count()
+
+
+# ---------- Checkpoints ----------
+def _ranges(spec, partitions):
+    bounds = spec.model.objects.aggregate(lo=Min("pk"), hi=Max("pk"))
+    lo, hi = (bounds["lo"] or 1) - 1, bounds["hi"] or 0
+    span = max(1, -(-(hi - lo) // partitions))  # techo
+    return [(min(hi, lo + i * span), min(hi, lo + (i + 1) * span)) for i in range(partitions)]
+
+
+def checkpoints(name, partitions=1, restart=False):
+    """Checkpoints de cada tramo; la primera vez fija los rangos con el MIN/MAX(pk) de ese momento."""
+    spec = get(name)
+    qs = BackfillCheckpoint.objects.filter(name=name, partitions=partitions)
+    if restart:
+        qs.delete()
+    existing = list(qs.order_by("partition"))
+    if len(existing) == partitions:
+        return existing
+    with transaction.atomic():
+        qs.delete()
+        return BackfillCheckpoint.objects.bulk_create([
+            BackfillCheckpoint(name=name, partition=i, partitions=partitions, range_start=start, range_end=end, last_pk=start)
+            for i, (start, end) in enumerate(_ranges(spec, partitions))
+        ])
+
+
+# ---------- Ejecución ----------
+def run_partition(cp, chunk_size=1000, sleep=0.05, sleep_ratio=1.0, max_seconds=None, progress=None):
+    """Avanza un tramo hasta terminarlo (o agotar ``max_seconds``); regresa el checkpoint actualizado."""
+    if chunk_size < 1:  # el tramo no avanzaría nunca
+        raise ValueError("chunk_size debe ser al menos 1")
+    spec = get(cp.name)
+    manager = spec.model.objects
+    stop = time.monotonic() + max_seconds if max_seconds else None
+    try:
+        while not cp.done:
+            if stop and time.monotonic() >= stop:
+                break
+            started = time.monotonic()
+            upper = min(cp.last_pk + chunk_size, cp.range_end)
+            with transaction.atomic():
+                n = manager.filter(spec.where, pk__gt=cp.last_pk, pk__lte=upper).update(**spec.updates())
+                cp.last_pk, cp.done = upper, upper >= cp.range_end
+                cp.rows_updated += n
+                cp.chunks += 1
+                BackfillCheckpoint.objects.filter(pk=cp.pk).update(
+                    last_pk=cp.last_pk, done=cp.done, rows_updated=F("rows_updated") + n, chunks=F("chunks") + 1)
+            if progress:
+                progress(cp)
+            if not cp.done:
+                time.sleep(sleep + (time.monotonic() - started) * sleep_ratio)
+    finally:
+        close_old_connections()
+    return cp
+
+
+def percent(cp):
+    total = cp.range_end - cp.range_start
+    return 100 if cp.done or total <= 0 else int((cp.last_pk - cp.range_start) * 100 / total)
+
+
+# ---------- Backfills registrados ----------
+@backfill("sale_total_amount", Sale, where=Q(total_amount=0, quantity__gt=0, unit_price__gt=0))
+def sale_total_amount():
+    """Sale.total_amount = unit_price * quantity en ventas anteriores a la migración 0008."""
+    return {"total_amount": Round(F("unit_price") * F("quantity"), 2)}
+
+
+@backfill("archived_sale_total_amount", ArchivedSale, where=Q(total_amount=0, quantity__gt=0, unit_price__gt=0))
+def archived_sale_total_amount():
+    """Lo mismo en el archivo: las ventas viejas se movieron con total_amount en 0."""
+    return {"total_amount": Round(F("unit_price") * F("quantity"), 2)}
@@ -0,0 +1,209 @@
+"""
+Respaldo en línea de la base SQLite, sin parar la tienda.
+
+Copiar ``db.sqlite3`` con la tienda abierta puede dejar un archivo a medias (y
+sin lo que aún está en el WAL). ``run()`` usa la API de backup de SQLite
+(``sqlite3.Connection.backup``) en pasos de ``BACKUP_PAGES`` páginas con una
+pausa entre pasos:
+
+- Con WAL, la conexión de origen abre antes una transacción de lectura: la
+  copia es la foto de ese instante, incluido lo confirmado que sigue en el WAL,
+  y las escrituras de la caja siguen sin esperar (en WAL un lector no bloquea a
+  un escritor). Sin esa foto, cada escritura de otra conexión reinicia la copia
+  y con la tienda abierta no terminaría nunca.
+- Sin WAL cada paso toma el lock de lectura solo mientras copia sus páginas;
+  una escritura entre pasos reinicia la copia (se reporta en ``restarts``).
+
+La copia se revisa con ``PRAGMA quick_check`` y se guarda comprimida con gzip:
+
+- completa: ``db-AAAAMMDD-HHMMSS.sqlite3.gz``;
+- incremental (``incremental=True``): solo las páginas que cambiaron respecto
+  al último respaldo completo, ``db-...-inc.pages.gz``. ``restore()`` arma la
+  base a partir de la completa y sus páginas.
+
+Junto a cada archivo va un ``.json`` con su reporte: páginas, MB/s, pasos y el
+paso más largo (``max_step_ms``, lo más que la copia sostuvo un lock). Se
+conservan los últimos ``BACKUP_KEEP`` respaldos completos y los incrementales
+que dependen de ellos.
+"""
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+FULL_SUFFIX = ".sqlite3.gz"
+INC_SUFFIX = "-inc.pages.gz"
+PAGE_NO = struct.Struct(">I")
+
+
+def backup_dir():
+    path = os.fspath(getattr(settings, "BACKUP_DIR", settings.BASE_DIR / "backups"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _manifest_path(path):
+    return f"{path}.json"
+
+
+def manifests():
+    """Reportes de los respaldos existentes, del más viejo al más nuevo."""
+    out = []
+    for name in sorted(os.listdir(backup_dir())):
+        if name.endswith(".json"):
+            with open(os.path.join(backup_dir(), name), encoding="utf-8") as fh:
+                info = json.load(fh)
+            if os.path.exists(os.path.join(backup_dir(), info["file"])):
+                out.append(info)
+    return out
+
+
+def latest_full():
+    fulls = [m for m in manifests() if m["kind"] == "full"]
+    return fulls[-1] if fulls else None
+
+
+# ---------- Copia ----------
+def _snapshot(dest, pages, pause):
+    """Copia la base a ``dest`` por pasos; regresa estadísticas de la copia."""
+    if connection.vendor != "sqlite":
+        raise RuntimeError("El respaldo en línea solo aplica a SQLite")
+    src = sqlite3.connect(os.fspath(connection.settings_dict["NAME"]), isolation_level=None, timeout=30)
+    dst = sqlite3.connect(dest)
+    stats = {"steps": 0, "restarts": 0, "max_step_ms": 0.0}
+    try:
+        wal = src.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        if wal:
+            # foto fija: las escrituras de otras conexiones ya no reinician la copia
+            src.execute("BEGIN")
+            src.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        last = {"remaining": None, "t": time.perf_counter()}
+
+        def progress(status, remaining, total):
+            step_ms = (time.perf_counter() - last["t"]) * 1000
+            stats["steps"] += 1
+            stats["max_step_ms"] = max(stats["max_step_ms"], step_ms)
+            if last["remaining"] is not None and remaining > last["remaining"]:
+                stats["restarts"] += 1
+            last["remaining"] = remaining
+            if remaining and pause:
+                time.sleep(pause)  # deja pasar a los escritores entre pasos
+            last["t"] = time.perf_counter()
+
+        started = time.perf_counter()
+        src.backup(dst, pages=pages, progress=progress)
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        if wal:
+            src.execute("COMMIT")
+        stats.update(wal=wal, page_size=dst.execute("PRAGMA page_size").fetchone()[0],
+                     page_count=dst.execute("PRAGMA page_count").fetchone()[0])
+        stats["check"] = dst.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    stats["max_step_ms"] = round(stats["max_step_ms"], 2)
+    return stats
+
+
+def _gzip(src_path, dest_path, level):
+    with open(src_path, "rb") as fin, gzip.open(f"{dest_path}.tmp", "wb", compresslevel=level) as fout:
+        shutil.copyfileobj(fin, fout, 1024 * 1024)
+    os.replace(f"{dest_path}.tmp", dest_path)
+
+
+def _write_pages(snapshot, base_path, dest_path, page_size, page_count, level):
+    """Páginas de ``snapshot`` distintas a las del respaldo completo ``base_path``; regresa cuántas."""
+    changed = 0
+    with open(snapshot, "rb") as new, gzip.open(base_path, "rb") as base, \
+            gzip.open(f"{dest_path}.tmp", "wb", compresslevel=level) as out:
+        out.write(json.dumps({"page_size": page_size, "page_count": page_count}).encode() + b"\n")
+        for n in range(page_count):
+            page = new.read(page_size)
+            if page != base.read(page_size):
+                out.write(PAGE_NO.pack(n))
+                out.write(page)
+                changed += 1
+    os.replace(f"{dest_path}.tmp", dest_path)
+    return changed
+
+
+def run(incremental=False, pages=None, pause=None, compress_level=6, keep=None):
+    """Hace un respaldo (completo, o incremental si ya hay un completo); regresa su reporte."""
+    pages = pages or getattr(settings, "BACKUP_PAGES", 256)
+    pause = getattr(settings, "BACKUP_PAUSE", 0.005) if pause is None else pause
+    base = latest_full() if incremental else None
+    stamp = timezone.localtime().strftime("%Y%m%d-%H%M%S")
+    name = f"db-{stamp}{INC_SUFFIX if base else FULL_SUFFIX}"
+    path = os.path.join(backup_dir(), name)
+    snapshot = os.path.join(backup_dir(), f".snapshot-{stamp}.sqlite3")
+    try:
+        stats = _snapshot(snapshot, pages, pause)
+        if stats["check"] != "ok":
+            raise RuntimeError(f"La copia no pasó quick_check: {stats['check']}")
+        db_bytes = os.path.getsize(snapshot)
+        started = time.perf_counter()
+        if base:
+            stats["changed_pages"] = _write_pages(snapshot, os.path.join(backup_dir(), base["file"]), path,
+                                                  stats["page_size"], stats["page_count"], compress_level)
+        else:
+            _gzip(snapshot, path, compress_level)
+        stats["compress_seconds"] = round(time.perf_counter() - started, 3)
+    finally:
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+    info = {
+        "file": name, "kind": "incremental" if base else "full", "base": base["file"] if base else None,
+        "created_at": timezone.now().isoformat(), "db_bytes": db_bytes, "bytes": os.path.getsize(path),
+        "mb_per_s": round(db_bytes / 1024 / 1024 / max(stats["seconds"], 1e-6), 1), **stats,
+    }
+    with open(_manifest_path(path), "w", encoding="utf-8") as fh:
+        json.dump(info, fh, indent=1)
+    info["removed"] = prune(keep)
+    return info
+
+
+# ---------- Retención y restauración ----------
+def prune(keep=None):
+    """Deja los últimos ``keep`` completos y los incrementales de esos; regresa los archivos borrados."""
+    keep = keep or getattr(settings, "BACKUP_KEEP", 7)
+    items = manifests()
+    kept = {m["file"] for m in [m for m in items if m["kind"] == "full"][-keep:]}
+    removed = []
+    for m in items:
+        if m["file"] in kept or (m["kind"] == "incremental" and m["base"] in kept):
+            continue
+        path = os.path.join(backup_dir(), m["file"])
+        for p in (path, _manifest_path(path)):
+            if os.path.exists(p):
+                os.remove(p)
+        removed.append(m["file"])
+    return removed
+
+
+def restore(name, dest):
+    """Escribe en ``dest`` la base del respaldo ``name`` (completo o incremental). No toca la base en uso."""
+    path = os.path.join(backup_dir(), os.path.basename(name))
+    with open(_manifest_path(path), encoding="utf-8") as fh:
+        info = json.load(fh)
+    full = os.path.join(backup_dir(), info["base"] or info["file"])
+    with gzip.open(full, "rb") as fin, open(dest, "wb") as fout:
+        shutil.copyfileobj(fin, fout, 1024 * 1024)
+    if info["kind"] == "incremental":
+        with gzip.open(path, "rb") as fin, open(dest, "r+b") as fout:
+            header = json.loads(fin.readline())
+            size = header["page_size"]
+            while True:
+                raw = fin.read(PAGE_NO.size)
+                if not raw:
+                    break
+                fout.seek(PAGE_NO.unpack(raw)[0] * size)
+                fout.write(fin.read(size))
+            fout.truncate(header["page_count"] * size)
+    return info
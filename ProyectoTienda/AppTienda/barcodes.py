@@ -0,0 +1,59 @@
+"""
+Mapa en memoria código -> id de producto para escanear en caja.
+
+Incluye el ``sku`` de cada producto y sus ``ProductBarcode``. El mapa se carga
+completo (al arrancar, ver wsgi.py, o en la primera consulta). Un cambio de
+SKU o de código (signals.py) lo invalida al instante en este proceso y sube la
+generación "barcode" de ``TableGeneration``; los demás procesos la revisan a lo
+más cada ``BARCODE_RECHECK_SECONDS`` y recargan si cambió.
+Precio y stock nunca se guardan aquí: se leen al momento por llave primaria.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Product, ProductBarcode
+from .listcache import generations, touch
+
+_lock = threading.Lock()
+_map, _gen, _checked = {}, None, 0.0
+
+
+def normalize(code):
+    return "".join((code or "").split())
+
+
+def _load():
+    codes = dict(ProductBarcode.objects.values_list("code", "product_id"))
+    codes.update(Product.objects.exclude(sku=None).values_list("sku", "pk"))  # el SKU gana si se repitiera
+    return codes
+
+
+def warm():
+    """(Re)carga el mapa completo. Regresa cuántos códigos quedaron."""
+    global _map, _gen, _checked
+    with _lock:
+        gen = generations(("barcode",))[0]  # antes de leer: si cambia mientras, la siguiente revisión recarga
+        _map, _gen, _checked = _load(), gen, time.monotonic()
+        return len(_map)
+
+
+def changed():
+    """Llamar cuando cambia un SKU/código: invalida aquí y avisa a los demás procesos."""
+    global _gen
+    touch("barcode")
+    _gen = None
+
+
+def lookup(code):
+    """Id del producto con ese SKU/código, o None."""
+    global _checked
+    now = time.monotonic()
+    if _gen is None:
+        warm()
+    elif now - _checked >= getattr(settings, "BARCODE_RECHECK_SECONDS", 1.0):
+        _checked = now
+        if generations(("barcode",))[0] != _gen:
+            warm()
+    return _map.get(normalize(code))
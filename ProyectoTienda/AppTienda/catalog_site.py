@@ -0,0 +1,134 @@
+"""
+Catálogo público de precios como HTML estático (kiosco, página web).
+
+Cada categoría es un archivo ``CATALOG_SITE_ROOT/categoria-<id>.html`` (los
+productos sin categoría van en ``sin-categoria.html``) y ``index.html`` las
+lista. Lo sirve el servidor web tal cual, sin pasar por Django ni tocar la
+base, igual que las miniaturas de ``THUMBNAIL_ROOT`` que enlaza (publicarlas
+también en ``THUMBNAIL_URL``).
+
+El handler ``handlers.regenerate_catalog`` rehace solo las páginas de las
+categorías que tocó un cambio de producto o categoría, y el índice. Las ventas
+y entradas de stock no cambian nada que se muestre y no regeneran. Una página
+cuyo HTML no cambió no se reescribe (conserva fecha y ETag). La primera vez,
+o si se perdió la carpeta: ``manage.py build_catalog_site``.
+
+Con ``CATALOG_SITE_ROOT = None`` no se genera nada.
+"""
+import os
+
+from django.conf import settings
+from django.template.loader import render_to_string
+
+from . import thumbnails
+from .models import Category, Product
+
+# campos de Product que salen en el catálogo: guardar solo otros (stock, search_name...) no regenera
+PAGE_FIELDS = frozenset({"name", "description", "price", "sku", "category", "image_hash"})
+INDEX = "index.html"
+UNCATEGORIZED = "sin-categoria.html"
+
+
+def root():
+    path = getattr(settings, "CATALOG_SITE_ROOT", settings.BASE_DIR / "catalog_site")
+    return os.fspath(path) if path else None
+
+
+def page_name(category_id):
+    return f"categoria-{category_id}.html" if category_id else UNCATEGORIZED
+
+
+def affects_pages(update_fields):
+    return update_fields is None or not PAGE_FIELDS.isdisjoint(update_fields)
+
+
+def _write(name, html):
+    """Reemplaza el archivo de forma atómica; False si ya tenía ese contenido."""
+    path = os.path.join(root(), name)
+    data = html.encode("utf-8")
+    try:
+        with open(path, "rb") as fh:
+            if fh.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(root(), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+    return True
+
+
+def _remove(name):
+    try:
+        os.remove(os.path.join(root(), name))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+# ---------- Páginas ----------
+def _products(category_id):
+    qs = Product.objects.filter(category_id=category_id) if category_id else Product.objects.filter(category__isnull=True)
+    for p in qs.order_by("name", "id").values("id", "name", "description", "price", "sku", "image_hash").iterator():
+        p["image"] = thumbnails.thumb_url(p["image_hash"], "sm") if p["image_hash"] else ""
+        yield p
+
+
+def build_category(category_id):
+    """Escribe (o borra, si la categoría ya no existe o quedó vacía sin categoría) una página; True si cambió."""
+    if category_id:
+        category = Category.objects.filter(pk=category_id).values("id", "name", "description").first()
+        if category is None:
+            return _remove(page_name(category_id))
+    else:
+        if not Product.objects.filter(category__isnull=True).exists():
+            return _remove(UNCATEGORIZED)
+        category = {"id": None, "name": "Sin categoría", "description": ""}
+    html = render_to_string("AppTienda/catalog/category.html", {
+        "category": category, "products": list(_products(category_id)), "store_name": _store_name(),
+    })
+    return _write(page_name(category_id), html)
+
+
+def build_index():
+    # product_count son los contadores de Category (rollups.rebuild_category_counters), no un COUNT por página
+    categories = list(Category.objects.filter(product_count__gt=0).order_by("name").values("id", "name", "product_count"))
+    for c in categories:
+        c["page"] = page_name(c["id"])
+    loose = Product.objects.filter(category__isnull=True).count()
+    if loose:
+        categories.append({"id": None, "name": "Sin categoría", "product_count": loose, "page": UNCATEGORIZED})
+    html = render_to_string("AppTienda/catalog/index.html", {"categories": categories, "store_name": _store_name()})
+    return _write(INDEX, html)
+
+
+def _store_name():
+    return getattr(settings, "STORE_NAME", "")
+
+
+# ---------- Regeneración ----------
+def regenerate(category_ids):
+    """Rehace las páginas de ``category_ids`` (None = sin categoría) y el índice; regresa los archivos reescritos."""
+    if root() is None:
+        return []
+    changed = [page_name(cid) for cid in sorted(set(category_ids), key=lambda c: c or 0) if build_category(cid)]
+    if build_index():
+        changed.append(INDEX)
+    return changed
+
+
+def build_all(prune=True):
+    """Genera todo el sitio; con ``prune`` borra las páginas de categorías que ya no existen."""
+    if root() is None:
+        return {"pages": 0, "changed": 0, "removed": 0}
+    ids = list(Category.objects.values_list("id", flat=True))
+    changed = regenerate(ids + [None])
+    removed = 0
+    if prune:
+        keep = {page_name(cid) for cid in ids} | {INDEX, UNCATEGORIZED}
+        for name in os.listdir(root()):
+            if name.startswith("categoria-") and name.endswith(".html") and name not in keep:
+                removed += _remove(name)
+    return {"pages": len(ids) + 1, "changed": len(changed), "removed": removed}
@@ -0,0 +1,329 @@
+"""
+Exportación columnar de ventas para análisis fuera de línea.
+
+Un CSV de decenas de millones de ventas tarda más en parsearse que en
+analizarse. Este formato (``.ptcol``) guarda cada columna como un arreglo
+tipado por bloques de ``block_rows`` filas:
+
+- ``id`` y ``created_at`` (microsegundos UTC) en int64 con codificación delta;
+- ``product`` y ``customer`` como códigos uint32 de diccionario (el
+  diccionario, con los ids reales, va una sola vez al final; en ``customer``
+  el código 0 es "sin cliente");
+- ``quantity`` int32, ``unit_price`` y ``total_amount`` float64;
+- cada trozo comprimido con zlib (``compression="none"`` lo deja plano y el
+  lector lo entrega sin copiar, directo del mmap).
+
+Estructura del archivo: ``MAGIC``, los trozos de cada bloque, un pie JSON con
+el esquema y la posición de cada trozo, la longitud del pie (uint64) y otra vez
+``MAGIC``. ``export_sales()`` recorre ``ArchivedSale`` y luego ``Sale`` por
+rangos de id (cada bloque es una consulta corta; no deja una lectura abierta
+contra la caja) y en memoria solo tiene el bloque actual y los diccionarios.
+Con pyarrow instalado también puede escribir Parquet (``fmt="parquet"``).
+
+Leer (solo necesita la biblioteca estándar; se puede copiar este archivo):
+
+    with ColumnarFile("ventas-12.ptcol") as f:
+        for block in f.blocks(["created_at", "product", "total_amount"]):
+            ...
+        totals = f.column("total_amount")
+"""
+import calendar
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+
+MAGIC = b"PTCOL\x00\x01\x00"
+FOOTER_LEN = struct.Struct("<Q")
+
+# nombre, typecode de array, codificación (plain | delta | dict)
+SALES_SCHEMA = (
+    ("id", "q", "delta"),
+    ("created_at", "q", "delta"),
+    ("product", "I", "dict"),
+    ("customer", "I", "dict"),
+    ("quantity", "i", "plain"),
+    ("unit_price", "d", "plain"),
+    ("total_amount", "d", "plain"),
+)
+NULLABLE_DICTS = {"customer"}   # código 0 = NULL
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_micros(dt):
+    return calendar.timegm(dt.utctimetuple()) * 1_000_000 + dt.microsecond
+
+
+def from_micros(us):
+    return EPOCH + timedelta(microseconds=us)
+
+
+# ---------- Escritura ----------
+class ColumnarWriter:
+    """Escribe bloques de columnas; ``close()`` agrega diccionarios y pie, y mueve el temporal a ``path``."""
+
+    def __init__(self, path, schema=SALES_SCHEMA, compression="zlib", meta=None):
+        if compression not in ("zlib", "none"):
+            raise ValueError(f"Compresión no soportada: {compression}")
+        self.path, self.schema, self.compression, self.meta = path, schema, compression, meta or {}
+        self.dicts = {name: {} for name, _t, enc in schema if enc == "dict"}
+        self.blocks, self.rows = [], 0
+        self._tmp = f"{path}.tmp"
+        self._fh = open(self._tmp, "wb")
+        self._fh.write(MAGIC)
+
+    def _chunk(self, arr):
+        data = arr.tobytes()
+        if self.compression == "zlib":
+            data = zlib.compress(data, 6)
+        offset = self._fh.tell()
+        self._fh.write(data)
+        return [offset, len(data)]
+
+    def encode(self, name, values):
+        """Códigos de diccionario (los asigna al vuelo); None -> 0 si la columna admite nulos."""
+        codes, base = self.dicts[name], 1 if name in NULLABLE_DICTS else 0
+        out = array("I")
+        for v in values:
+            if v is None:
+                out.append(0)
+                continue
+            code = codes.get(v)
+            if code is None:
+                code = codes[v] = len(codes) + base
+            out.append(code)
+        return out
+
+    def write_block(self, columns):
+        """``columns``: {nombre: lista de valores del bloque} con el mismo largo en todas."""
+        n = len(columns[self.schema[0][0]])
+        if not n:
+            return
+        chunks = {}
+        for name, typecode, encoding in self.schema:
+            values = columns[name]
+            if encoding == "dict":
+                arr = self.encode(name, values)
+            elif encoding == "delta":
+                arr = array(typecode, [values[0]] + [b - a for a, b in zip(values, values[1:])])
+            else:
+                arr = array(typecode, values)
+            chunks[name] = self._chunk(arr)
+        self.blocks.append({"rows": n, "chunks": chunks})
+        self.rows += n
+
+    def close(self):
+        dictionaries = {}
+        for name, codes in self.dicts.items():
+            ids = array("q", sorted(codes, key=codes.get))  # en orden de código
+            dictionaries[name] = self._chunk(ids) + [len(ids)]
+        footer = json.dumps({
+            "version": 1, "rows": self.rows, "byteorder": sys.byteorder, "compression": self.compression,
+            "columns": [{"name": n, "type": t, "encoding": e, "nullable": n in NULLABLE_DICTS} for n, t, e in self.schema],
+            "blocks": self.blocks, "dictionaries": dictionaries, "meta": self.meta,
+        }).encode("utf-8")
+        self._fh.write(footer)
+        self._fh.write(FOOTER_LEN.pack(len(footer)))
+        self._fh.write(MAGIC)
+        self._fh.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._fh.close()
+        try:
+            os.remove(self._tmp)
+        except FileNotFoundError:
+            pass
+
+
+# ---------- Lectura ----------
+class ColumnarFile:
+    """Lector sobre el archivo mapeado en memoria; sin compresión y en el mismo orden de bytes no copia nada."""
+
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        tail = len(self._mm) - len(MAGIC)
+        if self._mm[:len(MAGIC)] != MAGIC or self._mm[tail:] != MAGIC:
+            raise ValueError(f"{path} no es un archivo columnar de ventas")
+        (footer_len,) = FOOTER_LEN.unpack_from(self._mm, tail - FOOTER_LEN.size)
+        start = tail - FOOTER_LEN.size - footer_len
+        self.footer = json.loads(self._mm[start:start + footer_len].decode("utf-8"))
+        self.rows = self.footer["rows"]
+        self.meta = self.footer["meta"]
+        self.columns = {c["name"]: c for c in self.footer["columns"]}
+        self._swap = self.footer["byteorder"] != sys.byteorder
+        self._dicts = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._dicts.clear()
+        try:
+            self._mm.close()
+        except BufferError:  # quedan columnas sin copiar en uso: el mapa se libera cuando las suelten
+            pass
+
+    def __len__(self):
+        return self.rows
+
+    def _read(self, offset, length, typecode):
+        raw = memoryview(self._mm)[offset:offset + length]
+        if self.footer["compression"] == "none" and not self._swap:
+            return raw.cast(typecode)
+        arr = array(typecode)
+        arr.frombytes(zlib.decompress(raw) if self.footer["compression"] == "zlib" else raw)
+        if self._swap:
+            arr.byteswap()
+        return arr
+
+    def dictionary(self, name):
+        """Ids reales de la columna de diccionario, en orden de código."""
+        if name not in self._dicts:
+            offset, length, _count = self.footer["dictionaries"][name]
+            self._dicts[name] = self._read(offset, length, "q")
+        return self._dicts[name]
+
+    def _decode(self, name, arr, decode):
+        col = self.columns[name]
+        if col["encoding"] == "delta":
+            return array(col["type"], accumulate(arr))
+        if col["encoding"] == "dict" and decode:
+            ids = self.dictionary(name)
+            if col["nullable"]:
+                return [ids[c - 1] if c else None for c in arr]
+            return array("q", (ids[c] for c in arr))
+        return arr
+
+    def blocks(self, columns=None, decode=True):
+        """Un dict {columna: valores} por bloque; ``decode=False`` deja los códigos de diccionario."""
+        names = columns or list(self.columns)
+        for block in self.footer["blocks"]:
+            yield {name: self._decode(name, self._read(*block["chunks"][name], self.columns[name]["type"]), decode)
+                   for name in names}
+
+    def column(self, name, decode=True):
+        """La columna completa (concatena los bloques; para una sola columna no hace falta más memoria)."""
+        col = self.columns[name]
+        if decode and col["nullable"]:
+            out = []
+        elif decode and col["encoding"] == "dict":
+            out = array("q")
+        else:
+            out = array(col["type"])
+        for block in self.blocks([name], decode):
+            out.extend(block[name])
+        return out
+
+
+# ---------- Ventas ----------
+FIELDS = ("id", "created_at", "product_id", "customer_id", "quantity", "unit_price", "total_amount")
+
+
+def _sources(include_archived):
+    from .models import Sale, ArchivedSale
+    return ((ArchivedSale, Sale) if include_archived else (Sale,))
+
+
+def _filtered(model, since, until):
+    qs = model.objects.all()
+    if since:
+        qs = qs.filter(created_at__gte=since)
+    if until:
+        qs = qs.filter(created_at__lt=until)
+    return qs
+
+
+def _sale_blocks(since=None, until=None, include_archived=True, block_rows=65536):
+    """Bloques de ventas por rango de id (keyset): una consulta corta por bloque."""
+    for model in _sources(include_archived):
+        qs, last = _filtered(model, since, until), 0
+        while True:
+            rows = list(qs.filter(id__gt=last).order_by("id").values_list(*FIELDS)[:block_rows])
+            if not rows:
+                break
+            last = rows[-1][0]
+            yield rows
+
+
+def export_sales(path, since=None, until=None, include_archived=True, block_rows=65536, compression="zlib",
+                 fmt="ptcol", progress=None):
+    """Escribe las ventas en ``path`` (``ptcol`` o ``parquet``); regresa {"rows", "bytes", "blocks"}."""
+    from django.db.models import Count
+    total = sum(_filtered(m, since, until).aggregate(n=Count("id"))["n"] for m in _sources(include_archived)) or 1
+    meta = {"source": "sales", "since": since.isoformat() if since else None,
+            "until": until.isoformat() if until else None, "include_archived": include_archived,
+            "created_at_unit": "us"}
+    writer = (ParquetSalesWriter if fmt == "parquet" else ColumnarWriter)(path, compression=compression, meta=meta)
+    done = 0
+    try:
+        for rows in _sale_blocks(since, until, include_archived, block_rows):
+            ids, created, products, customers, qty, prices, totals = zip(*rows)
+            writer.write_block({
+                "id": list(ids), "created_at": [to_micros(d) for d in created], "product": list(products),
+                "customer": list(customers), "quantity": list(qty), "unit_price": list(prices),
+                "total_amount": list(totals),
+            })
+            done += len(rows)
+            if progress:
+                progress(done, total)
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    return {"rows": writer.rows, "bytes": os.path.getsize(path), "blocks": len(writer.blocks)}
+
+
+class ParquetSalesWriter:
+    """Misma interfaz que ColumnarWriter pero a Parquet (un row group por bloque); requiere pyarrow."""
+
+    def __init__(self, path, schema=SALES_SCHEMA, compression="zlib", meta=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Para exportar a Parquet hay que instalar pyarrow") from None
+        self.pa, self.path, self.rows, self.blocks = pa, path, 0, []
+        self.schema = pa.schema([
+            ("id", pa.int64()), ("created_at", pa.timestamp("us", tz="UTC")),
+            ("product", pa.dictionary(pa.int32(), pa.int64())), ("customer", pa.dictionary(pa.int32(), pa.int64())),
+            ("quantity", pa.int32()), ("unit_price", pa.float64()), ("total_amount", pa.float64()),
+        ], metadata={"meta": json.dumps(meta or {})})
+        self._tmp = f"{path}.tmp"
+        self._writer = pq.ParquetWriter(self._tmp, self.schema, compression="zstd" if compression == "zlib" else "none")
+
+    def write_block(self, columns):
+        pa = self.pa
+        arrays = [
+            pa.array(columns["id"], pa.int64()),
+            pa.array(columns["created_at"], pa.int64()).cast(pa.timestamp("us", tz="UTC")),
+            pa.array(columns["product"], pa.int64()).dictionary_encode().cast(self.schema.field("product").type),
+            pa.array(columns["customer"], pa.int64()).dictionary_encode().cast(self.schema.field("customer").type),
+            pa.array(columns["quantity"], pa.int32()),
+            pa.array(columns["unit_price"], pa.float64()),
+            pa.array(columns["total_amount"], pa.float64()),
+        ]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows += len(columns["id"])
+        self.blocks.append(len(columns["id"]))
+
+    def close(self):
+        self._writer.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self):
+        self._writer.close()
+        try:
+            os.remove(self._tmp)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,8 @@
+from .models import Store
+
+
+def store(request):
+    """Sucursal actual para la barra de navegación."""
+    if not getattr(request, "user", None) or not request.user.is_authenticated:
+        return {}
+    return {"current_store": Store.objects.current()}
@@ -0,0 +1,257 @@
+"""
+Eventos de dominio: lo que pasó (``sale.created``, ``product.saved``...) se
+anuncia con ``emit()`` y quien mantenga algo derivado se suscribe con
+``@handler``, en lugar de meter más trabajo en ``save()`` o en receivers que
+corren dentro de la transacción de la venta.
+
+Dentro de una transacción los eventos se juntan en un lote por hilo y se
+despachan una sola vez, después del commit (si hay rollback se descartan con
+el resto de hooks de ``on_commit``). Fuera de una transacción el commit ya
+ocurrió y se despachan en el momento.
+
+Cada handler recibe la lista de eventos del lote que le interesan, en orden:
+
+- inmediato (``deferred=False``): corre en el mismo hilo justo tras el commit;
+  para lo barato y que la siguiente petición ya debe ver (generaciones de
+  listcache, mapa de códigos de barras, encolar jobs).
+- diferido (``deferred=True``): un hilo de fondo junta los lotes pendientes
+  (hasta EVENTS_BATCH_SIZE eventos) y los entrega de una vez; para rollups,
+  bitácora y lo que venga, sin sumar latencia al cobro. Con
+  ``EVENTS_DEFERRED = False`` se ejecutan también en el hilo que confirma.
+
+Outbox: la cola del hilo de fondo vive en memoria, así que un evento con
+handlers diferidos también se guarda en ``OutboxEvent`` dentro de la misma
+transacción que lo causó, a nombre de este proceso y con un plazo
+(``EVENTS_OUTBOX_LEASE_SECONDS``). Al entregarlo, el proceso renueva el plazo de
+las filas que siguen siendo suyas, llama a los handlers y las borra. Si el
+proceso muere con eventos en la cola, sus filas se quedan con el plazo vencido
+y ``replay()`` (tarea ``replay_events`` de la cola, que se vuelve a programar
+sola, o ``manage.py replay_events``) las reclama y las entrega. La entrega es al
+menos una vez: si el proceso muere a media entrega, ese lote se repite.
+
+Un handler que falla se registra en el log y no detiene a los demás: los datos
+ya están confirmados y los agregados tienen su ``rebuild_*``.
+
+Un savepoint revertido dentro de una transacción que sí confirma no retira los
+eventos emitidos dentro de él de los handlers inmediatos (se emite después de
+escribir, en post_save); los diferidos no los reciben, porque su fila del
+outbox se revirtió con el savepoint.
+"""
+import atexit
+import logging
+import queue
+import threading
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple("Event", "name data at outbox_id", defaults=(None,))
+
+_handlers = []  # (nombres, función, diferido)
+_local = threading.local()
+
+
+def handler(*names, deferred=False):
+    """Suscribe la función a los eventos ``names``; la llama con la lista de eventos del lote."""
+    def register(fn):
+        _handlers.append((frozenset(names), fn, deferred))
+        return fn
+    return register
+
+
+def subscribers(deferred=None):
+    return [(sorted(names), f"{fn.__module__}.{fn.__name__}", d) for names, fn, d in _handlers
+            if deferred is None or d == deferred]
+
+
+def _has_deferred(names):
+    return any(d and not handled.isdisjoint(names) for handled, _fn, d in _handlers)
+
+
+# ---------- Outbox ----------
+def lease():
+    return timedelta(seconds=getattr(settings, "EVENTS_OUTBOX_LEASE_SECONDS", 300))
+
+
+def _owner():
+    from .jobs import worker_name
+    return worker_name()
+
+
+def _persist(name, data):
+    """Guarda el evento en el outbox si algún handler diferido lo recibe; regresa el id de la fila."""
+    if not _has_deferred((name,)):
+        return None
+    from .models import OutboxEvent
+    return OutboxEvent.objects.create(name=name, data=data, owner=_owner(),
+                                      lease_until=timezone.now() + lease()).pk
+
+
+def _decode(data):
+    # JSON no tiene fechas: las ``*_at`` regresan como texto ISO
+    return {k: parse_datetime(v) if k.endswith("_at") and isinstance(v, str) else v for k, v in data.items()}
+
+
+# ---------- Emisión ----------
+class _Batch:
+    def __init__(self):
+        self.events = []
+        self.hook = self.flush  # mismo objeto para buscarlo en run_on_commit
+
+    def scheduled(self, conn):
+        return any(entry[1] is self.hook for entry in conn.run_on_commit)
+
+    def flush(self):
+        if getattr(_local, "batch", None) is self:
+            _local.batch = None
+        dispatch(self.events)
+
+
+def emit(name, **data):
+    event = Event(name, data, timezone.now(), _persist(name, data))
+    conn = transaction.get_connection()
+    if not conn.in_atomic_block:
+        dispatch([event])
+        return
+    batch = getattr(_local, "batch", None)
+    # el hook desaparece si la transacción (o el savepoint donde se registró) se revirtió
+    if batch is None or not batch.scheduled(conn):
+        batch = _local.batch = _Batch()
+        transaction.on_commit(batch.hook)
+    batch.events.append(event)
+
+
+# ---------- Despacho ----------
+def _call(events, deferred):
+    for names, fn, d in _handlers:
+        if d != deferred:
+            continue
+        mine = [e for e in events if e.name in names]
+        if not mine:
+            continue
+        try:
+            fn(mine)
+        except Exception:
+            logger.exception("Falló el handler %s.%s con %d eventos", fn.__module__, fn.__name__, len(mine))
+
+
+def dispatch(events):
+    """Entrega un lote ya confirmado: inmediatos aquí, diferidos al hilo de fondo."""
+    if not events:
+        return
+    _call(events, deferred=False)
+    if not _has_deferred({e.name for e in events}):
+        return
+    if getattr(settings, "EVENTS_DEFERRED", True):
+        worker.put(events)
+    else:
+        deliver(events)
+
+
+def deliver(events, owner=None):
+    """Handlers diferidos de un lote: solo los eventos cuya fila del outbox sigue siendo de ``owner``; luego la borra."""
+    from .models import OutboxEvent
+    owner = owner or _owner()
+    ids = [e.outbox_id for e in events if e.outbox_id is not None]
+    if ids:
+        # renovar el plazo antes de entregar: replay() ya no puede reclamarlas mientras tanto
+        OutboxEvent.objects.filter(pk__in=ids, owner=owner).update(lease_until=timezone.now() + lease())
+        mine = set(OutboxEvent.objects.filter(pk__in=ids, owner=owner).values_list("pk", flat=True))
+        events = [e for e in events if e.outbox_id is None or e.outbox_id in mine]
+    _call(events, deferred=True)
+    if ids:
+        OutboxEvent.objects.filter(pk__in=ids, owner=owner).delete()
+    return len(events)
+
+
+def replay(batch_size=None):
+    """Entrega los eventos del outbox con el plazo vencido (su proceso murió); regresa cuántos."""
+    from .models import OutboxEvent
+    batch_size = batch_size or getattr(settings, "EVENTS_BATCH_SIZE", 500)
+    owner, total = f"{_owner()}:replay", 0
+    while True:
+        now = timezone.now()
+        ids = list(OutboxEvent.objects.filter(lease_until__lt=now).order_by("id")
+                   .values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        # UPDATE condicional: si otro replay o el dueño las renovó, ya no son vencidas
+        OutboxEvent.objects.filter(pk__in=ids, lease_until__lt=now).update(owner=owner, lease_until=now + lease())
+        rows = OutboxEvent.objects.filter(pk__in=ids, owner=owner).order_by("id")
+        events = [Event(r.name, _decode(r.data), r.created_at, r.pk) for r in rows]
+        if events:
+            logger.warning("Reentregando %d evento(s) del outbox que su proceso no entregó", len(events))
+            total += deliver(events, owner=owner)
+    return total
+
+
+def schedule(exclude=None):
+    """Deja programada (una sola) la tarea ``replay_events`` para dentro de EVENTS_REPLAY_SECONDS."""
+    from . import jobs
+    from .models import Job
+    pending = (Job.objects.filter(kind="replay_events", status__in=("pending", "running"))
+               .exclude(pk=exclude).first())
+    if pending:
+        return pending
+    every = getattr(settings, "EVENTS_REPLAY_SECONDS", 60)
+    return jobs.enqueue("replay_events", priority=-1, max_attempts=1,
+                        run_after=timezone.now() + timedelta(seconds=every))
+
+
+class DeferredWorker:
+    """Hilo de fondo que entrega a los handlers diferidos lo acumulado desde la última vuelta."""
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or getattr(settings, "EVENTS_BATCH_SIZE", 500)
+        self.queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {"batches": 0, "events": 0}
+
+    def put(self, events):
+        self.queue.put(list(events))
+        with self._lock:
+            if self._thread is None:
+                # al salir, antes que el flush de la bitácora (atexit corre en orden inverso)
+                atexit.register(self.drain, 10)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="events-deferred", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            events, taken = self.queue.get(), 1
+            while len(events) < self.batch_size:
+                try:
+                    events.extend(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+                taken += 1
+            try:
+                deliver(events)
+                self.stats["batches"] += 1
+                self.stats["events"] += len(events)
+            except Exception:
+                # p. ej. la base no respondió: las filas del outbox siguen ahí y replay() las entrega al vencer
+                logger.exception("No se pudo entregar un lote de %d evento(s) diferidos", len(events))
+            finally:
+                close_old_connections()
+                for _ in range(taken):
+                    self.queue.task_done()
+
+    def pending(self):
+        return self.queue.unfinished_tasks
+
+    def drain(self, timeout=None):
+        """Espera a que se entregue todo lo encolado; regresa True si quedó vacío."""
+        with self.queue.all_tasks_done:
+            return self.queue.all_tasks_done.wait_for(lambda: not self.queue.unfinished_tasks, timeout)
+
+
+worker = DeferredWorker()
@@ -2,11 +2,41 @@ from django import forms
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from .models import Product, StockEntry, Sale, Customer, Category
+from .models import Product, ProductBarcode, StockEntry, Sale, Customer, Category, Shift
 from .validators import validate_corporate_email
+from .widgets import TypeaheadSelect
+from . import thumbnails, barcodes, search
 
 User = get_user_model()
 
+# ---- IMAGEN (subida -> original + miniaturas por hash) ----
+class ImageUploadMixin:
+    """
+    Agrega ``image_file``: si se sube, se guarda una sola vez y reemplaza a image_url.
+    En clean solo se valida; se escribe en save(), cuando ya todo el form es válido
+    (si otro campo fallaba quedaba un original huérfano).
+    """
+
+    def clean_image_file(self):
+        f = self.cleaned_data.get("image_file")
+        if f:
+            try:
+                thumbnails.check(f.read())
+            except ValueError as e:
+                raise ValidationError(str(e))
+            finally:
+                f.seek(0)
+        return f
+
+    def _apply_image(self, obj):
+        f = self.cleaned_data.get("image_file")
+        if f:
+            digest = thumbnails.ingest(f.read())
+            obj.image_hash = digest
+            obj.image_url = obj.image_source = thumbnails.original_url(digest)
+        return obj
+
+
 # ---- AUTH ----
 class LoginForm(forms.Form):
     email = forms.EmailField(widget=forms.EmailInput(attrs={
@@ -31,7 +61,7 @@ class LoginForm(forms.Form):
 
 
 # ---- USERS (solo admin/vendor) ----
-class BaseUserForm(forms.ModelForm):
+class BaseUserForm(ImageUploadMixin, forms.ModelForm):
     email = forms.EmailField(
         validators=[validate_corporate_email],
         widget=forms.EmailInput(attrs={"class": "form-control"})
@@ -40,6 +70,10 @@ class BaseUserForm(forms.ModelForm):
         required=False,
         widget=forms.PasswordInput(attrs={"class": "form-control"})
     )
+    image_file = forms.ImageField(
+        required=False, label="Subir imagen",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control"})
+    )
 
     class Meta:
         model = User
@@ -63,6 +97,7 @@ class BaseUserForm(forms.ModelForm):
     def save(self, commit=True):
         user = super().save(commit=False)
         user.username = user.email
+        self._apply_image(user)
         pwd = self.cleaned_data.get("password")
         if pwd:
             user.set_password(pwd)
@@ -100,18 +135,100 @@ class CategoryForm(forms.ModelForm):
 
 
 # ---- PRODUCT (con category) ----
-class ProductForm(forms.ModelForm):
+class ProductForm(ImageUploadMixin, forms.ModelForm):
+    image_file = forms.ImageField(
+        required=False, label="Subir imagen",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control"})
+    )
+    extra_codes = forms.CharField(
+        required=False, label="Códigos de barras adicionales",
+        help_text="Uno por línea (o separados por coma).",
+        widget=forms.Textarea(attrs={"class": "form-control", "rows": 2})
+    )
+
     class Meta:
         model = Product
-        fields = ["name", "description", "price", "image_url", "category"]
+        fields = ["name", "sku", "description", "price", "image_url", "category"]
+        labels = {"sku": "SKU / código de barras"}
         widgets = {
             "name":        forms.TextInput(attrs={"class": "form-control"}),
+            "sku":         forms.TextInput(attrs={"class": "form-control", "autocomplete": "off"}),
             "description": forms.Textarea(attrs={"class": "form-control", "rows": 3}),
             "price":       forms.NumberInput(attrs={"class": "form-control", "step": "0.01", "min": "0"}),
             "image_url":   forms.TextInput(attrs={"class": "form-control"}),
             "category":    forms.Select(attrs={"class": "form-select"}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields["extra_codes"].initial = "\n".join(self.instance.barcodes.values_list("code", flat=True))
+
+    def _taken(self, codes):
+        """Códigos que ya usa otro producto, como SKU o como código adicional."""
+        other = Product.objects.exclude(pk=self.instance.pk)
+        return (set(other.filter(sku__in=codes).values_list("sku", flat=True))
+                | set(ProductBarcode.objects.filter(code__in=codes).exclude(product=self.instance.pk).values_list("code", flat=True)))
+
+    def clean_sku(self):
+        sku = "".join((self.cleaned_data.get("sku") or "").split())
+        if sku and self._taken([sku]):
+            raise ValidationError("Ese código ya pertenece a otro producto.")
+        return sku or None  # NULL no choca con el índice único
+
+    def clean_extra_codes(self):
+        raw = (self.cleaned_data.get("extra_codes") or "").replace(",", "\n")
+        codes = list(dict.fromkeys("".join(c.split()) for c in raw.splitlines() if c.strip()))
+        if any(len(c) > 64 for c in codes):
+            raise ValidationError("Cada código puede tener máximo 64 caracteres.")
+        taken = self._taken(codes)
+        if taken:
+            raise ValidationError(f"Ya pertenecen a otro producto: {', '.join(sorted(taken))}")
+        return codes
+
+    def save(self, commit=True):
+        obj = self._apply_image(super().save(commit=False))
+        if commit:
+            obj.save()
+            self.save_m2m()
+            self._save_codes(obj)
+        return obj
+
+    def _save_codes(self, obj):
+        codes = [c for c in self.cleaned_data.get("extra_codes", []) if c != obj.sku]
+        obj.barcodes.exclude(code__in=codes).delete()
+        have = set(obj.barcodes.values_list("code", flat=True))
+        if ProductBarcode.objects.bulk_create([ProductBarcode(product=obj, code=c) for c in codes if c not in have]):
+            barcodes.changed()  # bulk_create no dispara post_save
+
+
+# ---- ACCIONES MASIVAS DE PRODUCTOS ----
+class ProductBulkForm(forms.Form):
+    ACTION_CHOICES = (("reprice", "Cambiar precio"), ("recategorize", "Cambiar categoría"), ("delete", "Eliminar"))
+    MODE_CHOICES = (("pct", "Porcentaje (+/- %)"), ("abs", "Monto (+/- $)"), ("set", "Precio fijo ($)"))
+
+    action = forms.ChoiceField(choices=ACTION_CHOICES, widget=forms.Select(attrs={"class": "form-select"}))
+    mode = forms.ChoiceField(choices=MODE_CHOICES, required=False, label="Tipo de ajuste",
+                             widget=forms.Select(attrs={"class": "form-select"}))
+    value = forms.FloatField(required=False, label="Valor",
+                             widget=forms.NumberInput(attrs={"class": "form-control", "step": "0.01"}))
+    category = forms.ModelChoiceField(queryset=Category.objects.all(), required=False, label="Nueva categoría",
+                                      widget=forms.Select(attrs={"class": "form-select"}))
+
+    def clean(self):
+        cleaned = super().clean()
+        action, mode, value = cleaned.get("action"), cleaned.get("mode"), cleaned.get("value")
+        if action == "reprice":
+            if not mode or value is None:
+                raise ValidationError("Indica el tipo de ajuste y el valor.")
+            if mode == "pct" and value <= -100:
+                raise ValidationError("El porcentaje debe ser mayor a -100.")
+            if mode == "set" and value < 0:
+                raise ValidationError("El precio no puede ser negativo.")
+        if action == "recategorize" and not cleaned.get("category"):
+            raise ValidationError("Selecciona la nueva categoría.")
+        return cleaned
+
 
 # ---- STOCK ----
 class StockEntryForm(forms.ModelForm):
@@ -119,7 +236,7 @@ class StockEntryForm(forms.ModelForm):
         model = StockEntry
         fields = ["product", "quantity", "note"]
         widgets = {
-            "product":  forms.Select(attrs={"class": "form-select"}),
+            "product":  TypeaheadSelect("api_products", Product, search.product_item),
             "quantity": forms.NumberInput(attrs={"class": "form-control", "step": "0.01", "min": "0.01"}),
             "note":     forms.TextInput(attrs={"class": "form-control"}),
         }
@@ -132,7 +249,21 @@ class SaleForm(forms.ModelForm):
         # 👇 ya NO pedimos unit_price
         fields = ["product", "customer", "quantity"]
         widgets = {
-            "product":   forms.Select(attrs={"class": "form-select", "id": "id_product"}),
-            "customer":  forms.Select(attrs={"class": "form-select"}),
+            "product":   TypeaheadSelect("api_products", Product, search.product_item, attrs={"id": "id_product"}),
+            "customer":  TypeaheadSelect("api_customers", Customer, search.customer_item, placeholder="Nombre del cliente (opcional)"),
             "quantity":  forms.NumberInput(attrs={"class": "form-control", "step": "1", "min": "1", "id": "id_quantity"}),
         }
+
+
+# ---- TURNOS (corte de caja) ----
+class ShiftOpenForm(forms.ModelForm):
+    class Meta:
+        model = Shift
+        fields = ["opening_cash"]
+        labels = {"opening_cash": "Fondo de caja"}
+        widgets = {"opening_cash": forms.NumberInput(attrs={"class": "form-control", "step": "0.01", "min": "0"})}
+
+
+class ShiftCloseForm(forms.Form):
+    counted_cash = forms.FloatField(label="Efectivo contado", min_value=0.0,
+                                    widget=forms.NumberInput(attrs={"class": "form-control", "step": "0.01", "min": "0"}))
@@ -0,0 +1,167 @@
+"""
+Suscriptores de los eventos de dominio (ver events.py; los emite signals.py).
+
+Cada handler recibe la lista de eventos del lote, ya confirmados. Los
+inmediatos corren en el hilo que hizo commit y deben ser baratos; los
+diferidos corren en el hilo de fondo y son donde va cualquier estructura
+derivada nueva.
+"""
+from . import events, jobs, journal, listcache, barcodes, rollups, rankings, catalog_site, shared_catalog
+from .models import COUNTER_FIELDS
+
+SALE_EVENTS = ("sale.created", "sale.deleted")
+STOCK_EVENTS = ("stock.entry_created", "stock.entry_deleted")
+
+
+def _data(batch, name):
+    return [e.data for e in batch if e.name == name]
+
+
+# ---------- Inmediatos: generaciones de listcache y mapa de códigos ----------
+@events.handler("product.saved", "product.deleted", "products.bulk_changed")
+def touch_products(batch):
+    # ventas y entradas no: el listado llena el stock en cada petición (listcache.live_cell)
+    for e in batch:
+        if e.name == "product.saved" and e.data["update_fields"] is not None \
+                and COUNTER_FIELDS.issuperset(e.data["update_fields"]):
+            continue
+        listcache.touch("product")
+        return
+
+
+@events.handler("category.changed")
+def touch_categories(batch):
+    listcache.touch("category")
+
+
+@events.handler("customer.changed")
+def touch_customers(batch):
+    listcache.touch("customer")
+
+
+@events.handler("product.saved", "product.deleted", "products.bulk_changed", "barcode.saved", "barcode.deleted")
+def touch_barcodes(batch):
+    for e in batch:
+        if e.name == "product.saved" and e.data["update_fields"] is not None and "sku" not in e.data["update_fields"]:
+            continue  # no en cada cambio de stock
+        if e.name == "products.bulk_changed" and e.data["action"] != "delete":
+            continue
+        barcodes.changed()
+        return
+
+
+# ---------- Inmediatos: miniaturas, descargar la imagen fuera de la petición ----------
+@events.handler("product.saved", "user.saved")
+def queue_image_fetch(batch):
+    for e in batch:
+        url = e.data["image_url"]
+        if url and url != e.data["image_source"]:
+            jobs.enqueue("fetch_image", priority=-1, model=e.name.split(".")[0], pk=e.data["id"], url=url)
+
+
+# ---------- Inmediatos: totales del turno (el corte de caja los lee tal cual) ----------
+@events.handler(*SALE_EVENTS)
+def update_shift_totals(batch):
+    # inmediato y no diferido: cuando el vendedor ve "Venta registrada" su turno ya la cuenta,
+    # aunque cierre caja en la siguiente petición o en otro worker
+    added = [d for d in _data(batch, "sale.created") if d["shift_id"]]
+    removed = [d for d in _data(batch, "sale.deleted") if d["shift_id"]]
+    if added:
+        rollups.shift_sales(added)
+    if removed:
+        rollups.shift_sales(removed, sign=-1)
+
+
+# ---------- Diferidos: agregados (un UPDATE por llave y lote) ----------
+@events.handler(*SALE_EVENTS, *STOCK_EVENTS, deferred=True)
+def update_rollups(batch):
+    added, removed = _data(batch, "sale.created"), _data(batch, "sale.deleted")
+    rollups.sales_added(added)
+    rollups.sales_removed(removed)
+    # el top-K después de los rollups: se calcula desde ellos
+    if removed:
+        rankings.rebuild()  # una venta borrada puede sacar a alguien del top sin que otro venda
+    elif added:
+        rankings.products_sold({d["product_id"] for d in added})
+    rollups.stock_added(_data(batch, "stock.entry_created"))
+    rollups.stock_removed(_data(batch, "stock.entry_deleted"))
+    if any(e.data["customer_id"] for e in batch if e.name in SALE_EVENTS):
+        listcache.touch("customer")  # los agregados del cliente cambian con UPDATE, sin post_save de Customer
+
+
+@events.handler("product.saved", "product.deleted", "products.bulk_changed", deferred=True)
+def rerank_moved_products(batch):
+    # un producto que cambia de categoría (o se borra) deja un hueco en su top; no es frecuente, se recalcula completo
+    for e in batch:
+        if e.name == "product.saved" and not e.data["created"] \
+                and e.data["category_id"] != e.data["previous_category_id"]:
+            break
+        if e.name == "product.deleted" or e.name == "products.bulk_changed" and e.data["action"] != "reprice":
+            break
+    else:
+        return
+    rankings.rebuild()
+
+
+# ---------- Diferidos: contadores por categoría ----------
+@events.handler("sale.created", "stock.entry_created", "product.saved", "product.deleted", "products.bulk_changed",
+                deferred=True)
+def update_category_counters(batch):
+    # ventas y entradas: delta de unidades y valor; cambios de producto: recontar sus categorías (de una en una, poco frecuentes)
+    touched = rollups.category_stock_changed(_data(batch, "sale.created"), sign=-1)
+    touched |= rollups.category_stock_changed(_data(batch, "stock.entry_created"), sign=1)
+    recount = set()
+    for e in batch:
+        if e.name == "products.bulk_changed":
+            recount.update(e.data["categories"])
+        elif e.name.startswith("product."):
+            recount.update((e.data["category_id"], e.data.get("previous_category_id")))
+    recount.discard(None)
+    if recount:
+        rollups.rebuild_category_counters(recount)
+    if touched or recount:
+        listcache.touch("category_stock")  # solo el listado de categorías muestra los contadores
+
+
+# ---------- Diferidos: catálogo estático (después de los contadores: el índice los usa) ----------
+@events.handler("product.saved", "product.deleted", "products.bulk_changed", "category.changed", deferred=True)
+def regenerate_catalog(batch):
+    pages = set()
+    for e in batch:
+        if e.name == "product.saved":
+            if not catalog_site.affects_pages(e.data["update_fields"]):
+                continue
+            pages.add(e.data["category_id"])
+            if not e.data["created"]:
+                pages.add(e.data["previous_category_id"])
+        elif e.name == "product.deleted":
+            pages.add(e.data["category_id"])
+        elif e.name == "products.bulk_changed":
+            pages.update(e.data["categories"])
+        else:
+            pages.add(e.data["id"])
+    if pages:
+        catalog_site.regenerate(pages)
+
+
+# ---------- Diferidos: catálogo compartido en mmap (nombre y precio para la caja) ----------
+@events.handler("product.saved", "product.deleted", "products.bulk_changed", deferred=True)
+def publish_shared_catalog(batch):
+    # un archivo nuevo por lote, no por evento; el stock no va en el archivo, así que ventas y entradas
+    # no publican, y guardar solo imagen o search_name tampoco
+    for e in batch:
+        if e.name == "product.saved" and e.data["update_fields"] is not None \
+                and shared_catalog.FIELDS.isdisjoint(e.data["update_fields"]):
+            continue
+        if e.name == "products.bulk_changed" and e.data["fields"] is not None \
+                and shared_catalog.FIELDS.isdisjoint(e.data["fields"]):
+            continue
+        shared_catalog.publish()
+        return
+
+
+# ---------- Diferidos: bitácora ----------
+@events.handler(*SALE_EVENTS, *STOCK_EVENTS, deferred=True)
+def append_journal(batch):
+    for e in batch:
+        journal.writer.append(e.name, {**e.data, "created_at": e.data["created_at"].isoformat()})
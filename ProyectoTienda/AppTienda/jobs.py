@@ -0,0 +1,253 @@
+"""
+Cola de tareas en segundo plano respaldada por la tabla ``Job`` (sin broker).
+
+Registrar una tarea:
+
+    @job("export_sales")
+    def export_sales(ctx, **params):
+        ctx.progress(50, "Escribiendo...")
+        return {"rows": 10}
+
+Encolarla desde una vista (regresa de inmediato con el id):
+
+    j = enqueue("export_sales", priority=5, user=request.user)
+
+El worker (``manage.py run_jobs``) toma las tareas pendientes por prioridad,
+las ejecuta en un pool de hilos y reintenta con backoff exponencial hasta
+``max_attempts``.
+"""
+import csv
+import os
+import socket
+import traceback
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, Sale, Product, User
+from . import (thumbnails, rollups, rankings, listcache, maintenance, backfill, catalog_site, columnar, backup,
+               reservations, events)
+
+REGISTRY = {}
+
+
+def job(kind):
+    def deco(fn):
+        REGISTRY[kind] = fn
+        return fn
+    return deco
+
+
+def enqueue(kind, priority=0, user=None, max_attempts=3, run_after=None, **params):
+    if kind not in REGISTRY:
+        raise ValueError(f"Tarea desconocida: {kind}")
+    return Job.objects.create(
+        kind=kind, params=params, priority=priority, max_attempts=max_attempts,
+        run_after=run_after or timezone.now(),
+        created_by=user if (user and user.is_authenticated) else None,
+    )
+
+
+def output_dir():
+    path = os.fspath(getattr(settings, "JOBS_OUTPUT_DIR", settings.BASE_DIR / "exports"))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class JobContext:
+    """Lo que recibe cada tarea: acceso al job y reporte de avance."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def progress(self, pct, message=""):
+        pct = max(0, min(100, int(pct)))
+        now = timezone.now()
+        Job.objects.filter(pk=self.job.pk).update(progress=pct, message=message[:255], heartbeat_at=now)
+        self.job.progress, self.job.message, self.job.heartbeat_at = pct, message, now
+
+
+# ---------- Worker ----------
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def heartbeat_seconds():
+    return getattr(settings, "JOBS_HEARTBEAT_SECONDS", 60)
+
+
+def heartbeat(worker, pks):
+    """Marca como vivas las tareas que este worker está corriendo, reporten avance o no."""
+    pks = list(pks)
+    if not pks:
+        return 0
+    return Job.objects.filter(pk__in=pks, status="running", worker=worker).update(heartbeat_at=timezone.now())
+
+
+def recover_stale():
+    """Regresa a pendiente las tareas cuyo worker dejó de reportar."""
+    limit = timezone.now() - timedelta(seconds=getattr(settings, "JOBS_STALE_SECONDS", 600))
+    return Job.objects.filter(status="running", heartbeat_at__lt=limit).update(status="pending", worker="")
+
+
+def claim(worker):
+    """Toma la siguiente tarea pendiente; el UPDATE condicional evita que dos workers tomen la misma."""
+    now = timezone.now()
+    candidates = (Job.objects.filter(status="pending", run_after__lte=now)
+                  .order_by("-priority", "id").values_list("id", flat=True)[:5])
+    for pk in candidates:
+        taken = Job.objects.filter(pk=pk, status="pending").update(
+            status="running", worker=worker, started_at=now, heartbeat_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if taken:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run(job_obj):
+    close_old_connections()
+    try:
+        fn = REGISTRY.get(job_obj.kind)
+        if fn is None:
+            raise LookupError(f"Tarea no registrada: {job_obj.kind}")
+        result = fn(JobContext(job_obj), **(job_obj.params or {}))
+        Job.objects.filter(pk=job_obj.pk).update(
+            status="done", progress=100, result=result, error="", finished_at=timezone.now(),
+        )
+    except Exception:
+        err = traceback.format_exc()
+        if job_obj.attempts < job_obj.max_attempts:
+            delay = getattr(settings, "JOBS_RETRY_BASE_SECONDS", 5) * 2 ** (job_obj.attempts - 1)
+            Job.objects.filter(pk=job_obj.pk).update(
+                status="pending", error=err, worker="",
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        else:
+            Job.objects.filter(pk=job_obj.pk).update(status="failed", error=err, finished_at=timezone.now())
+    finally:
+        close_old_connections()
+
+
+# ---------- Tareas incluidas ----------
+@job("export_sales")
+def export_sales(ctx, q="", **params):
+    """Exporta ventas a CSV sin bloquear la petición."""
+    qs = Sale.objects.select_related("product", "customer").order_by("id")
+    if q:
+        qs = qs.filter(product__name__icontains=q)
+    total = qs.count() or 1
+    name = f"ventas-{ctx.job.pk}.csv"
+    path = os.path.join(output_dir(), name)
+    rows = 0
+    with open(f"{path}.tmp", "w", newline="", encoding="utf-8") as fh:
+        w = csv.writer(fh)
+        w.writerow(["id", "fecha", "producto", "cliente", "cantidad", "precio_unitario", "total"])
+        for s in qs.iterator(chunk_size=2000):
+            cust = f"{s.customer.first_name} {s.customer.last_name}".strip() if s.customer else ""
+            w.writerow([s.id, s.created_at.isoformat(), s.product.name, cust, s.quantity, s.unit_price, s.total_amount])
+            rows += 1
+            if rows % 2000 == 0:
+                ctx.progress(rows * 100 // total, f"{rows} de {total} ventas")
+    os.replace(f"{path}.tmp", path)
+    return {"file": name, "rows": rows}
+
+
+@job("export_sales_columnar")
+def export_sales_columnar(ctx, since=None, until=None, include_archived=True, fmt="ptcol", block_rows=65536,
+                          **params):
+    """Ventas (con las archivadas) en formato columnar (columnar.py) o Parquet, por bloques de ``block_rows``."""
+    name = f"ventas-{ctx.job.pk}.{'parquet' if fmt == 'parquet' else 'ptcol'}"
+    since = date.fromisoformat(since) if since else None
+    until = date.fromisoformat(until) if until else None
+    stats = columnar.export_sales(
+        os.path.join(output_dir(), name), since=since, until=until, include_archived=include_archived,
+        block_rows=block_rows, fmt=fmt, progress=lambda done, total: ctx.progress(done * 100 // total, f"{done} de {total} ventas"))
+    return {"file": name, **stats}
+
+
+IMAGE_MODELS = {"product": Product, "user": User}
+
+
+@job("fetch_image")
+def fetch_image(ctx, model, pk, url, **params):
+    """Descarga la imagen de un producto/usuario una sola vez y genera sus miniaturas."""
+    ctx.progress(10, "Descargando imagen")
+    digest = thumbnails.ingest(thumbnails.fetch(url))
+    # solo si la URL no cambió mientras tanto
+    updated = IMAGE_MODELS[model].objects.filter(pk=pk, image_url=url).update(image_hash=digest, image_source=url)
+    if updated and model == "product":
+        listcache.touch("product")
+        catalog_site.regenerate(Product.objects.filter(pk=pk).values_list("category_id", flat=True))
+    return {"hash": digest, "updated": updated}
+
+
+@job("rebuild_customer_stats")
+def rebuild_customer_stats(ctx, **params):
+    return {"customers": rollups.rebuild_customer_stats()}
+
+
+@job("rebuild_rankings")
+def rebuild_rankings(ctx, **params):
+    rows = rollups.rebuild_product_rollups()
+    return {"rows": rows, "ranked": rankings.rebuild()}
+
+
+@job("refresh_rankings")
+def refresh_rankings(ctx, **params):
+    """Recalcula los top-K al cambiar de día (salen días de las ventanas) y se vuelve a programar."""
+    try:
+        return {"ranked": rankings.rebuild()}
+    finally:
+        rankings.schedule(exclude=ctx.job.pk)
+
+
+@job("db_maintenance")
+def db_maintenance(ctx, **params):
+    """Mantenimiento de SQLite dentro de DB_MAINTENANCE_WINDOW; al terminar se programa la siguiente ventana."""
+    try:
+        closes = maintenance.window_end()
+        if closes is None:  # el worker la tomó tarde (estaba apagado): no correr en horario de caja
+            return {"skipped": "fuera de la ventana"}
+        ctx.progress(10, "Mantenimiento en curso")
+        record = maintenance.run(trigger="scheduled", deadline=closes)
+        return {"run": record.pk, "status": record.status, "size_before": record.size_before, "size_after": record.size_after}
+    finally:
+        maintenance.schedule(exclude=ctx.job.pk)
+
+
+@job("backup_db")
+def backup_db(ctx, incremental=False, **params):
+    """Respaldo en línea (backup.py); se puede encolar en horario de caja."""
+    info = backup.run(incremental=incremental)
+    return {k: info[k] for k in ("file", "kind", "bytes", "seconds", "mb_per_s", "max_step_ms", "removed")}
+
+
+@job("sweep_reservations")
+def sweep_reservations(ctx, **params):
+    """Libera los apartados de stock vencidos y se vuelve a programar."""
+    try:
+        return {"released": reservations.sweep()}
+    finally:
+        reservations.schedule(exclude=ctx.job.pk)
+
+
+@job("replay_events")
+def replay_events(ctx, **params):
+    """Entrega los eventos diferidos que un proceso caído dejó en el outbox y se vuelve a programar."""
+    try:
+        return {"replayed": events.replay()}
+    finally:
+        events.schedule(exclude=ctx.job.pk)
+
+
+@job("backfill")
+def run_backfill(ctx, name, chunk_size=1000, sleep=0.05, **params):
+    """Un backfill registrado (backfill.py), un tramo; reanuda desde su checkpoint si se reintenta."""
+    cp = backfill.checkpoints(name)[0]
+    cp = backfill.run_partition(cp, chunk_size=chunk_size, sleep=sleep,
+                                progress=lambda c: ctx.progress(backfill.percent(c), f"pk {c.last_pk} de {c.range_end}"))
+    return {"rows": cp.rows_updated, "chunks": cp.chunks, "last_pk": cp.last_pk}
@@ -0,0 +1,201 @@
+"""
+Bitácora append-only de ventas y movimientos de stock.
+
+Cada evento confirmado (después del commit) se escribe como una línea JSON con
+un número de secuencia global. Los registros se acumulan en memoria y se
+escriben por lotes cuando se llega a JOURNAL_BATCH_SIZE o pasan
+JOURNAL_FLUSH_SECONDS. El segmento activo es un ``.jsonl`` y al superar
+JOURNAL_SEGMENT_BYTES se comprime a ``.jsonl.gz``; el nombre de cada segmento es
+la secuencia de su primer registro, así que leer desde una secuencia dada no
+necesita abrir segmentos anteriores.
+
+    journal/
+      HEAD                              -> {"seq": 1234, "segment": "...1201.jsonl"}
+      00000000000000000001.jsonl.gz     (segmentos cerrados)
+      00000000000000001201.jsonl        (segmento activo)
+      checkpoints/<consumer>.json       -> {"seq": 1180}
+"""
+import atexit
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+try:  # bloqueo entre procesos (gunicorn con varios workers)
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+SEQ_WIDTH = 20
+
+
+def journal_dir():
+    return os.fspath(getattr(settings, "JOURNAL_DIR", settings.BASE_DIR / "journal"))
+
+
+def _segment_name(first_seq, compressed=False):
+    return f"{first_seq:0{SEQ_WIDTH}d}.jsonl" + (".gz" if compressed else "")
+
+
+def _atomic_write_json(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def _read_json(path, default):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+class JournalWriter:
+    def __init__(self, directory=None, batch_size=None, flush_seconds=None, segment_bytes=None):
+        self.directory = directory or journal_dir()
+        self.batch_size = batch_size or getattr(settings, "JOURNAL_BATCH_SIZE", 200)
+        self.flush_seconds = flush_seconds or getattr(settings, "JOURNAL_FLUSH_SECONDS", 2.0)
+        self.segment_bytes = segment_bytes or getattr(settings, "JOURNAL_SEGMENT_BYTES", 8 * 1024 * 1024)
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    # ---------- API ----------
+    def append(self, event_type, data):
+        record = {"ts": timezone.now().isoformat(), "type": event_type, "data": data}
+        with self._lock:
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.batch_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if pending:
+            self._write(pending)
+        return len(pending)
+
+    # ---------- escritura ----------
+    def _write(self, records):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "LOCK"), "a") as lock_fh:
+            if fcntl:
+                fcntl.flock(lock_fh, fcntl.LOCK_EX)
+            try:
+                head_path = os.path.join(self.directory, "HEAD")
+                head = _read_json(head_path, {"seq": 0, "segment": None})
+                seq = head["seq"]
+                segment = head["segment"] or _segment_name(seq + 1)
+                seg_path = os.path.join(self.directory, segment)
+
+                lines = []
+                for rec in records:
+                    seq += 1
+                    lines.append(json.dumps({"seq": seq, **rec}, separators=(",", ":"), default=str))
+                with open(seg_path, "a", encoding="utf-8") as fh:
+                    fh.write("\n".join(lines) + "\n")
+                    fh.flush()
+                    os.fsync(fh.fileno())
+
+                if os.path.getsize(seg_path) >= self.segment_bytes:
+                    self._seal(seg_path)
+                    segment = None
+                _atomic_write_json(head_path, {"seq": seq, "segment": segment})
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_fh, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _seal(seg_path):
+        with open(seg_path, "rb") as src, gzip.open(f"{seg_path}.gz.tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(f"{seg_path}.gz.tmp", f"{seg_path}.gz")
+        os.remove(seg_path)
+
+
+# ---------- lectura ----------
+def head_seq(directory=None):
+    return _read_json(os.path.join(directory or journal_dir(), "HEAD"), {"seq": 0})["seq"]
+
+
+def segments(directory=None):
+    """Lista ordenada de (primera_seq, ruta) de todos los segmentos."""
+    directory = directory or journal_dir()
+    if not os.path.isdir(directory):
+        return []
+    out = []
+    for name in os.listdir(directory):
+        stem = name.split(".", 1)[0]
+        if stem.isdigit() and (name.endswith(".jsonl") or name.endswith(".jsonl.gz")):
+            out.append((int(stem), os.path.join(directory, name)))
+    return sorted(out)
+
+
+def iter_records(after_seq=0, directory=None):
+    """Registros con seq > after_seq, en orden."""
+    segs = segments(directory)
+    for i, (first, path) in enumerate(segs):
+        nxt = segs[i + 1][0] if i + 1 < len(segs) else None
+        if nxt is not None and nxt <= after_seq + 1:
+            continue
+        if not os.path.exists(path) and os.path.exists(f"{path}.gz"):
+            path = f"{path}.gz"  # se selló mientras leíamos
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if not line.endswith("\n"):
+                    break  # línea a medio escribir
+                rec = json.loads(line)
+                if rec["seq"] > after_seq:
+                    yield rec
+
+
+def follow(after_seq=0, poll_seconds=1.0, directory=None):
+    """Como ``tail -f``: entrega registros nuevos conforme aparecen."""
+    last = after_seq
+    while True:
+        for rec in iter_records(last, directory):
+            last = rec["seq"]
+            yield rec
+        time.sleep(poll_seconds)
+
+
+# ---------- checkpoints de consumidores ----------
+def _checkpoint_path(consumer, directory=None):
+    return os.path.join(directory or journal_dir(), "checkpoints", f"{consumer}.json")
+
+
+def get_checkpoint(consumer, directory=None):
+    return _read_json(_checkpoint_path(consumer, directory), {"seq": 0})["seq"]
+
+
+def set_checkpoint(consumer, seq, directory=None):
+    path = _checkpoint_path(consumer, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _atomic_write_json(path, {"seq": int(seq), "updated_at": timezone.now().isoformat()})
+
+
+def consumers(directory=None):
+    path = os.path.join(directory or journal_dir(), "checkpoints")
+    if not os.path.isdir(path):
+        return []
+    return sorted(n[:-5] for n in os.listdir(path) if n.endswith(".json"))
+
+
+writer = JournalWriter()
+atexit.register(writer.flush)
@@ -0,0 +1,119 @@
+"""
+Caché de la tabla ya renderizada de los listados más consultados.
+
+La llave es (listado, parámetros GET, generación de cada tabla de la que
+depende, variante). Cada tabla tiene un contador en ``TableGeneration`` que
+sube con cualquier save/delete/UPDATE masivo (ver handlers.py), así que
+invalidar es un solo UPDATE y nunca se sirve una tabla vieja: las llaves
+anteriores simplemente dejan de pedirse y caducan solas.
+
+Las columnas que cambian con cada venta (el stock) no se guardan: la tabla
+cacheada lleva una marca por celda (``live_cell``) y se llenan en cada
+petición con una consulta por llave primaria de las filas de la página. Así
+una venta no invalida el listado.
+
+Los aciertos/fallos se cuentan en la misma caché, por listado.
+"""
+import hashlib
+import re
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+from .models import TableGeneration
+from .rollups import bump
+
+# listado -> tablas cuyo cambio altera lo que muestra ("category_stock": solo los contadores de categoría)
+LISTS = {
+    "products": ("product", "category"),
+    "categories": ("category", "category_stock"),
+    "customers": ("customer",),
+}
+
+# un comentario HTML: el contenido de las celdas se escapa, así que ningún nombre puede imitarlo
+LIVE_RE = re.compile(r"<!--live:(\w+):(\d+)-->")
+
+
+def _cache():
+    return caches[getattr(settings, "LIST_CACHE_ALIAS", "default")]
+
+
+def timeout():
+    return getattr(settings, "LIST_CACHE_SECONDS", 600)
+
+
+def touch(*tables):
+    """Invalida todo lo cacheado que dependa de estas tablas."""
+    for t in tables:
+        bump(TableGeneration, {"table": t}, generation=1)
+
+
+def generations(tables):
+    found = dict(TableGeneration.objects.filter(table__in=tables).values_list("table", "generation"))
+    return [found.get(t, 0) for t in tables]
+
+
+def _count(name, outcome):
+    key, c = f"listcache:stats:{name}:{outcome}", _cache()
+    if not c.add(key, 1, None):
+        try:
+            c.incr(key)
+        except ValueError:  # expiró entre add e incr
+            c.set(key, 1, None)
+
+
+def live_cell(column, pk):
+    """Celda que no se cachea: ``with_table`` la llena en cada petición con ``live[column]``."""
+    return mark_safe(f"<!--live:{column}:{int(pk)}-->")
+
+
+def fill_live(html, live):
+    """Reemplaza las marcas de ``live_cell``; ``live`` es {columna: fn(ids) -> {id: valor}}."""
+    ids = {}
+    for column, pk in LIVE_RE.findall(html):
+        ids.setdefault(column, set()).add(int(pk))
+    values = {column: live[column](pks) for column, pks in ids.items()}
+    return LIVE_RE.sub(lambda m: conditional_escape(values[m[1]].get(int(m[2]), "—")), html)
+
+
+def with_table(request, name, ctx, build, live=None):
+    """
+    Agrega ``table_html`` y ``total`` al contexto de list.html. ``build()``
+    regresa headers/items/page_obj y solo se llama si no estaba en caché;
+    ``live`` llena las celdas de ``live_cell`` (ver ``fill_live``).
+    """
+    def render():
+        full = {**ctx, **build()}
+        return {"html": render_to_string("AppTienda/modules/_list_table.html", full, request),
+                "total": full["page_obj"].paginator.count}
+
+    if not timeout():
+        hit = render()
+    else:
+        params = urlencode(sorted(request.GET.lists()), doseq=True)
+        gens = ".".join(map(str, generations(LISTS[name])))
+        variant = int(bool(ctx.get("can_manage")))
+        key = f"listcache:{name}:{gens}:{variant}:{hashlib.md5(params.encode()).hexdigest()}"
+
+        hit = _cache().get(key)
+        _count(name, "hits" if hit else "misses")
+        if hit is None:
+            hit = render()
+            _cache().set(key, hit, timeout())
+    html = fill_live(hit["html"], live) if live else hit["html"]
+    return {**ctx, "table_html": html, "total": hit["total"]}
+
+
+def stats():
+    c = _cache()
+    out = []
+    for name, tables in LISTS.items():
+        hits = c.get(f"listcache:stats:{name}:hits", 0)
+        misses = c.get(f"listcache:stats:{name}:misses", 0)
+        out.append({"list": name, "tables": tables, "generations": generations(tables),
+                    "hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0})
+    return out
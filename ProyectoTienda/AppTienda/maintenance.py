@@ -0,0 +1,224 @@
+"""
+Mantenimiento de la base SQLite en horario de poco movimiento.
+
+Pasos (``STEPS``), en este orden:
+
+- ``checkpoint``: ``PRAGMA wal_checkpoint(TRUNCATE)``, pasa el WAL al archivo
+  principal y lo deja en cero.
+- ``analyze``: ``PRAGMA optimize`` (solo las tablas que lo necesitan) o
+  ``ANALYZE`` completo; refresca las estadísticas del planificador y
+  ``sqlite_stat1``, que también usa el paginador del admin.
+- ``vacuum``: ``PRAGMA incremental_vacuum`` de pocas páginas a la vez, hasta
+  vaciar la lista de páginas libres o agotar el tiempo. Sin bloquear a la caja:
+  entre pasos se suelta el lock. Requiere ``auto_vacuum = INCREMENTAL``; la base se
+  convierte una vez con ``convert()`` (VACUUM completo, ``db_maintenance --convert``).
+- ``integrity``: ``PRAGMA quick_check`` (o ``integrity_check`` completo).
+
+``run()`` mide antes y después el tamaño de la base y del WAL, las páginas
+libres y el tiempo de unas consultas representativas (``PROBES``), y lo deja
+todo en un ``MaintenanceRun``. La tarea ``db_maintenance`` de la cola (jobs.py)
+corre dentro de DB_MAINTENANCE_WINDOW y se vuelve a programar para la
+siguiente ventana.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+STEPS = ("checkpoint", "analyze", "vacuum", "integrity")
+
+
+# ---------- Ventana de mantenimiento ----------
+def window():
+    """(inicio, fin) como ``datetime.time`` en hora local; el fin puede ser del día siguiente."""
+    start, end = getattr(settings, "DB_MAINTENANCE_WINDOW", ("02:00", "05:00"))
+    return datetime.strptime(start, "%H:%M").time(), datetime.strptime(end, "%H:%M").time()
+
+
+def window_end(now=None):
+    """Fin de la ventana en curso, o None si ``now`` está fuera de ella."""
+    now = timezone.localtime(now)
+    start, end = window()
+    for day in (now.date() - timedelta(days=1), now.date()):
+        opens = timezone.make_aware(datetime.combine(day, start))
+        closes = timezone.make_aware(datetime.combine(day + timedelta(days=1) if end <= start else day, end))
+        if opens <= now < closes:
+            return closes
+    return None
+
+
+def next_window(now=None):
+    """Próximo inicio de ventana estrictamente después de ``now``."""
+    now = timezone.localtime(now)
+    opens = timezone.make_aware(datetime.combine(now.date(), window()[0]))
+    return opens if opens > now else opens + timedelta(days=1)
+
+
+# ---------- Mediciones ----------
+def db_path():
+    return os.fspath(connection.settings_dict["NAME"])
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _pragma(name):
+    with connection.cursor() as cur:
+        cur.execute(f"PRAGMA {name}")
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _timed(fn, repeat=5):
+    """Mediana en ms de ``repeat`` ejecuciones."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return round(sorted(times)[len(times) // 2], 3)
+
+
+def _probe_sales_page():
+    from .models import Sale, Store
+    list(Sale.objects.filter(store=Store.objects.current()).order_by("-created_at", "-id")[:25].values_list("id", flat=True))
+
+
+def _probe_top_products():
+    from . import rankings
+    rankings.top_products("30d")
+
+
+def _probe_product_search():
+    from . import search
+    search.products("a")
+
+
+def _probe_customer_search():
+    from . import search
+    search.customers("a")
+
+
+PROBES = (
+    ("sales_page", _probe_sales_page),
+    ("top_products", _probe_top_products),
+    ("product_search", _probe_product_search),
+    ("customer_search", _probe_customer_search),
+)
+
+
+def measure(probes=True):
+    path = db_path()
+    out = {
+        "db_bytes": _size(path), "wal_bytes": _size(f"{path}-wal"),
+        "page_size": _pragma("page_size"), "page_count": _pragma("page_count"),
+        "freelist_count": _pragma("freelist_count"),
+    }
+    if probes:
+        out["probes_ms"] = {name: _timed(fn) for name, fn in PROBES}
+    return out
+
+
+# ---------- Pasos ----------
+def checkpoint():
+    with connection.cursor() as cur:
+        cur.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        busy, log, done = cur.fetchone()
+    return {"busy": bool(busy), "wal_pages": log, "checkpointed": done}
+
+
+def analyze(full=False):
+    with connection.cursor() as cur:
+        cur.execute("ANALYZE" if full else "PRAGMA optimize")
+    return {"mode": "full" if full else "optimize"}
+
+
+def vacuum(seconds=None, pages=None, pause=0.05, deadline=None):
+    """Libera páginas en pasos de ``pages`` hasta agotar ``seconds`` (o la ventana); no bloquea más de un paso."""
+    seconds = getattr(settings, "DB_MAINTENANCE_VACUUM_SECONDS", 30) if seconds is None else seconds
+    pages = pages or getattr(settings, "DB_MAINTENANCE_VACUUM_PAGES", 256)
+    if _pragma("auto_vacuum") != 2:
+        return {"skipped": "auto_vacuum no es INCREMENTAL; convertir una vez con db_maintenance --convert"}
+    stop = time.monotonic() + seconds
+    if deadline is not None:
+        stop = min(stop, time.monotonic() + max(0.0, (deadline - timezone.now()).total_seconds()))
+    start_free = _pragma("freelist_count")
+    while time.monotonic() < stop:
+        free = _pragma("freelist_count")
+        if not free:
+            break
+        with connection.cursor() as cur:
+            # con execute() el módulo sqlite3 da un solo paso y libera una página; executescript los corre todos
+            cur.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        time.sleep(pause)
+    return {"freed_pages": start_free - _pragma("freelist_count"), "remaining": _pragma("freelist_count")}
+
+
+def integrity(full=False):
+    with connection.cursor() as cur:
+        cur.execute("PRAGMA integrity_check" if full else "PRAGMA quick_check")
+        rows = [r[0] for r in cur.fetchall()]
+    return {"ok": rows == ["ok"], "mode": "full" if full else "quick", "messages": rows[:20]}
+
+
+def convert():
+    """Cambia la base a auto_vacuum INCREMENTAL; es un VACUUM completo (bloquea), hacerlo una sola vez."""
+    before = _size(db_path())
+    with connection.cursor() as cur:
+        cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cur.execute("VACUUM")
+    return {"auto_vacuum": _pragma("auto_vacuum"), "db_bytes_before": before, "db_bytes_after": _size(db_path())}
+
+
+# ---------- Corrida completa ----------
+def run(steps=STEPS, trigger="manual", full_analyze=False, full_check=False, vacuum_seconds=None, vacuum_pages=None,
+        deadline=None, probes=True):
+    """Ejecuta ``steps`` midiendo antes y después; regresa el ``MaintenanceRun`` guardado."""
+    from .models import MaintenanceRun
+    if connection.vendor != "sqlite":
+        raise RuntimeError("El mantenimiento solo aplica a SQLite")
+    record = MaintenanceRun.objects.create(trigger=trigger)
+    record.before = measure(probes)
+    record.size_before = record.before["db_bytes"] + record.before["wal_bytes"]
+    actions = {
+        "checkpoint": checkpoint,
+        "analyze": lambda: analyze(full_analyze),
+        "vacuum": lambda: vacuum(vacuum_seconds, vacuum_pages, deadline=deadline),
+        "integrity": lambda: integrity(full_check),
+    }
+    status = "ok"
+    try:
+        for name in steps:
+            started = time.perf_counter()
+            result = actions[name]()
+            record.steps[name] = {"ms": round((time.perf_counter() - started) * 1000, 1), "result": result}
+            if name == "integrity" and not result["ok"]:
+                status = "problems"
+        # el checkpoint final deja el WAL en cero y la medición "después" compara lo mismo
+        if "checkpoint" in steps:
+            checkpoint()
+        record.after = measure(probes)
+        record.size_after = record.after["db_bytes"] + record.after["wal_bytes"]
+    except Exception as e:
+        status, record.error = "failed", f"{type(e).__name__}: {e}"
+    record.status, record.finished_at = status, timezone.now()
+    record.save()
+    return record
+
+
+def schedule(now=None, exclude=None):
+    """Deja programada (una sola) la tarea ``db_maintenance`` para el inicio de la siguiente ventana."""
+    from . import jobs
+    from .models import Job
+    pending = (Job.objects.filter(kind="db_maintenance", status__in=("pending", "running"))
+               .exclude(pk=exclude).first())
+    if pending:
+        return pending
+    return jobs.enqueue("db_maintenance", priority=-5, max_attempts=1, run_after=next_window(now))
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AppTienda import archive, rollups
+
+
+class Command(BaseCommand):
+    help = "Mueve las ventas anteriores al horizonte (SALES_ARCHIVE_DAYS) a la tabla de archivo, por lotes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Días que se quedan en Sale (default: SALES_ARCHIVE_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Pausa entre lotes (segundos) para no bloquear la caja")
+        parser.add_argument("--rebuild", action="store_true", help="Si los agregados no cuadran, recalcularlos antes de archivar")
+        parser.add_argument("--dry-run", action="store_true", help="Solo verificar y contar")
+
+    def handle(self, *args, days=None, batch_size=1000, sleep=0.0, rebuild=False, dry_run=False, **opts):
+        before = archive.cutoff(days)
+        n = archive.pending(before).count()
+        self.stdout.write(f"{n} venta(s) anteriores a {before:%Y-%m-%d}.")
+        if not n:
+            return
+
+        problems = archive.verify(before)
+        if problems and rebuild:
+            self.stdout.write(self.style.WARNING(f"{len(problems)} diferencia(s); recalculando agregados..."))
+            rollups.rebuild_customer_stats()
+            rollups.rebuild_product_rollups()
+            rollups.rebuild_store_rollups()
+            problems = archive.verify(before)
+        if problems:
+            for p in problems[:20]:
+                self.stderr.write(f"  {p}")
+            raise CommandError(f"{len(problems)} diferencia(s) entre ventas y agregados; usa --rebuild o rebuild_* primero.")
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS("Agregados verificados; nada se movió (--dry-run)."))
+            return
+
+        moved, started = 0, time.monotonic()
+        while True:
+            try:
+                k = archive.move_batch(before, batch_size)
+            except ValueError as e:
+                raise CommandError(f"{e} ({moved} venta(s) archivadas antes)")
+            if not k:
+                break
+            moved += k
+            self.stdout.write(f"  {moved}/{n}")
+            if sleep:
+                time.sleep(sleep)
+        self.stdout.write(self.style.SUCCESS(f"{moved} venta(s) archivadas en {time.monotonic() - started:.1f}s."))
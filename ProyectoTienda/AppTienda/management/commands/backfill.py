@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AppTienda import backfill
+
+
+class Command(BaseCommand):
+    help = "Corrige datos históricos por trozos de pk con UPDATE set-based, con checkpoint para reanudar (ver AppTienda/backfill.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", nargs="?", help="Backfill registrado; sin nombre lista los disponibles")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Filas (rango de pk) por UPDATE")
+        parser.add_argument("--sleep", type=float, default=0.05, help="Pausa mínima entre trozos (segundos)")
+        parser.add_argument("--sleep-ratio", type=float, default=1.0,
+                            help="Además duerme esta fracción de lo que tardó el trozo (deja pasar a la caja)")
+        parser.add_argument("--partitions", type=int, default=1, help="Tramos de pk, cada uno con su checkpoint")
+        parser.add_argument("--partition", type=int, action="append",
+                            help="Correr solo este tramo (0..N-1); repetible. Útil para repartir entre procesos")
+        parser.add_argument("--parallel", type=int, default=1, help="Tramos simultáneos en hilos")
+        parser.add_argument("--max-seconds", type=float, default=None, help="Detenerse tras este tiempo (se reanuda después)")
+        parser.add_argument("--restart", action="store_true", help="Olvidar el checkpoint y empezar de nuevo")
+        parser.add_argument("--dry-run", action="store_true", help="Solo contar filas pendientes")
+
+    def handle(self, *args, name=None, chunk_size=1000, sleep=0.05, sleep_ratio=1.0, partitions=1, partition=None,
+               parallel=1, max_seconds=None, restart=False, dry_run=False, **opts):
+        if not name:
+            for spec in backfill.REGISTRY.values():
+                self.stdout.write(f"{spec.name:<28} {spec.model.__name__:<14} {spec.description}")
+            return
+        try:
+            spec = backfill.get(name)
+        except LookupError as e:
+            raise CommandError(str(e))
+        if partitions < 1 or any(not 0 <= p < partitions for p in partition or ()):
+            raise CommandError("--partition debe estar entre 0 y --partitions - 1")
+        if chunk_size < 1:
+            raise CommandError("--chunk-size debe ser al menos 1")
+
+        n = backfill.pending(name)
+        self.stdout.write(f"{name}: {n} fila(s) de {spec.model.__name__} por corregir.")
+        if dry_run or not n:
+            return
+
+        cps = backfill.checkpoints(name, partitions, restart=restart)
+        if partition:
+            cps = [cp for cp in cps if cp.partition in partition]
+        cps = [cp for cp in cps if not cp.done]
+        if not cps:
+            self.stdout.write(self.style.WARNING("Los tramos pedidos ya terminaron; usa --restart para recorrer de nuevo."))
+            return
+
+        def progress(cp):
+            if cp.chunks % 20 == 0 or cp.done:
+                self.stdout.write(f"  tramo {cp.partition}: pk {cp.last_pk}/{cp.range_end}  {cp.rows_updated} fila(s)")
+
+        started = time.monotonic()
+        kw = dict(chunk_size=chunk_size, sleep=sleep, sleep_ratio=sleep_ratio, max_seconds=max_seconds, progress=progress)
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+            done = list(pool.map(lambda cp: backfill.run_partition(cp, **kw), cps))
+        rows = sum(cp.rows_updated for cp in done)
+        unfinished = [cp.partition for cp in done if not cp.done]
+        msg = f"{rows} fila(s) actualizadas en {time.monotonic() - started:.1f}s."
+        if unfinished:
+            self.stdout.write(self.style.WARNING(f"{msg} Tramos sin terminar: {unfinished}; vuelve a correr para reanudar."))
+        else:
+            self.stdout.write(self.style.SUCCESS(msg))
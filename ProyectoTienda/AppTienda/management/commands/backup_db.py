@@ -0,0 +1,53 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AppTienda import backup
+
+
+def _mb(n):
+    return f"{(n or 0) / 1024 / 1024:.2f} MB"
+
+
+class Command(BaseCommand):
+    help = "Respaldo en línea de SQLite por pasos (sin detener la caja), comprimido, con retención y reporte"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--incremental", action="store_true",
+                            help="Solo las páginas que cambiaron desde el último respaldo completo")
+        parser.add_argument("--pages", type=int, default=None, help="Páginas por paso (BACKUP_PAGES)")
+        parser.add_argument("--pause", type=float, default=None, help="Segundos de pausa entre pasos (BACKUP_PAUSE)")
+        parser.add_argument("--level", type=int, default=6, choices=range(1, 10), help="Nivel de gzip")
+        parser.add_argument("--keep", type=int, default=None, help="Respaldos completos a conservar (BACKUP_KEEP)")
+        parser.add_argument("--list", action="store_true", help="Listar los respaldos y salir")
+        parser.add_argument("--restore", metavar="ARCHIVO", help="Armar la base de este respaldo en --to")
+        parser.add_argument("--to", help="Destino de --restore (nunca la base en uso)")
+
+    def handle(self, *args, incremental=False, pages=None, pause=None, level=6, keep=None, restore=None, to=None,
+               **opts):
+        if opts["list"]:
+            for m in backup.manifests():
+                self.stdout.write(f"  {m['file']:<40} {m['kind']:<11} {_mb(m['bytes']):>10}  {m['created_at']}")
+            return
+        if restore:
+            if not to:
+                raise CommandError("--restore requiere --to")
+            if os.path.exists(to):
+                raise CommandError(f"{to} ya existe; elige otro destino.")
+            info = backup.restore(restore, to)
+            self.stdout.write(self.style.SUCCESS(f"{info['file']} restaurado en {to} ({info['page_count']} páginas)."))
+            return
+
+        try:
+            r = backup.run(incremental=incremental, pages=pages, pause=pause, compress_level=level, keep=keep)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        if r["kind"] == "incremental":
+            self.stdout.write(f"  incremental sobre {r['base']}: {r['changed_pages']} de {r['page_count']} páginas")
+        self.stdout.write(f"  copia       {_mb(r['db_bytes'])} en {r['seconds']} s ({r['mb_per_s']} MB/s), "
+                          f"{r['steps']} pasos, paso más largo {r['max_step_ms']} ms, reinicios {r['restarts']}"
+                          f"{'' if r['wal'] else ' (sin WAL)'}")
+        self.stdout.write(f"  gzip        {_mb(r['bytes'])} en {r['compress_seconds']} s")
+        for name in r["removed"]:
+            self.stdout.write(f"  eliminado   {name}")
+        self.stdout.write(self.style.SUCCESS(f"Respaldo {r['file']} listo."))
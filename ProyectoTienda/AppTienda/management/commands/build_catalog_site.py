@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from AppTienda import catalog_site
+
+
+class Command(BaseCommand):
+    help = "Genera el catálogo público en HTML estático (todas las categorías o solo las indicadas)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--category", type=int, action="append", default=[], help="Solo esta categoría (repetible)")
+        parser.add_argument("--no-prune", action="store_true", help="No borrar páginas de categorías que ya no existen")
+
+    def handle(self, *args, category=(), no_prune=False, **opts):
+        if catalog_site.root() is None:
+            raise CommandError("CATALOG_SITE_ROOT no está configurado.")
+        if category:
+            changed = catalog_site.regenerate(category)
+            self.stdout.write(self.style.SUCCESS(f"{len(changed)} página(s) reescritas en {catalog_site.root()}."))
+            return
+        stats = catalog_site.build_all(prune=not no_prune)
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['pages']} página(s) de categoría, {stats['changed']} reescritas, {stats['removed']} eliminadas "
+            f"en {catalog_site.root()}."))
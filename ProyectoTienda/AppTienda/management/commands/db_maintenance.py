@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from AppTienda import maintenance
+
+
+def _mb(n):
+    return f"{(n or 0) / 1024 / 1024:.2f} MB"
+
+
+class Command(BaseCommand):
+    help = "Mantenimiento de SQLite: checkpoint del WAL, ANALYZE/optimize, vacuum incremental y quick_check, con reporte antes/después"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--steps", default=",".join(maintenance.STEPS),
+                            help=f"Pasos separados por coma (default: {','.join(maintenance.STEPS)})")
+        parser.add_argument("--vacuum-seconds", type=float, default=None, help="Tiempo máximo del vacuum incremental")
+        parser.add_argument("--vacuum-pages", type=int, default=None, help="Páginas por paso de vacuum")
+        parser.add_argument("--full-analyze", action="store_true", help="ANALYZE completo en lugar de PRAGMA optimize")
+        parser.add_argument("--full-check", action="store_true", help="integrity_check completo en lugar de quick_check")
+        parser.add_argument("--no-probes", action="store_true", help="No medir tiempos de consultas")
+        parser.add_argument("--force", action="store_true", help="Correr aunque se esté fuera de DB_MAINTENANCE_WINDOW")
+        parser.add_argument("--convert", action="store_true",
+                            help="Una sola vez: pasar la base a auto_vacuum INCREMENTAL (VACUUM completo, bloquea)")
+        parser.add_argument("--schedule", action="store_true",
+                            help="Programar la tarea db_maintenance en la cola para la siguiente ventana y salir")
+
+    def handle(self, *args, steps="", vacuum_seconds=None, vacuum_pages=None, full_analyze=False, full_check=False,
+               no_probes=False, force=False, convert=False, schedule=False, **opts):
+        if schedule:
+            job = maintenance.schedule()
+            self.stdout.write(self.style.SUCCESS(f"Tarea #{job.pk} programada para {timezone.localtime(job.run_after):%Y-%m-%d %H:%M}."))
+            return
+
+        steps = [s.strip() for s in steps.split(",") if s.strip()]
+        unknown = set(steps) - set(maintenance.STEPS)
+        if unknown:
+            raise CommandError(f"Pasos desconocidos: {', '.join(sorted(unknown))}")
+        closes = maintenance.window_end()
+        if closes is None and not force:
+            start, end = maintenance.window()
+            raise CommandError(f"Fuera de la ventana {start:%H:%M}-{end:%H:%M} (DB_MAINTENANCE_WINDOW); usa --force.")
+
+        if convert:
+            self.stdout.write(self.style.WARNING("VACUUM completo para activar auto_vacuum INCREMENTAL..."))
+            r = maintenance.convert()
+            self.stdout.write(f"  auto_vacuum={r['auto_vacuum']}  {_mb(r['db_bytes_before'])} -> {_mb(r['db_bytes_after'])}")
+
+        record = maintenance.run(steps, full_analyze=full_analyze, full_check=full_check, vacuum_seconds=vacuum_seconds,
+                                 vacuum_pages=vacuum_pages, deadline=None if force else closes, probes=not no_probes)
+        for name, info in record.steps.items():
+            self.stdout.write(f"  {name:<11} {info['ms']:>9.1f} ms  {info['result']}")
+        if record.after:
+            b, a = record.before, record.after
+            self.stdout.write(f"  tamaño      {_mb(record.size_before)} -> {_mb(record.size_after)}"
+                              f"  (páginas libres {b['freelist_count']} -> {a['freelist_count']})")
+            for name, ms in b.get("probes_ms", {}).items():
+                self.stdout.write(f"  {name:<16} {ms:>8.3f} -> {a['probes_ms'][name]:.3f} ms")
+        if record.status == "failed":
+            raise CommandError(f"Mantenimiento #{record.pk} falló: {record.error}")
+        style = self.style.SUCCESS if record.status == "ok" else self.style.WARNING
+        self.stdout.write(style(f"Mantenimiento #{record.pk}: {record.get_status_display()}."))
@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from AppTienda import columnar
+
+
+class Command(BaseCommand):
+    help = "Exporta el historial de ventas en formato columnar (.ptcol, ver AppTienda/columnar.py) o Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("out", help="Archivo destino")
+        parser.add_argument("--since", type=date.fromisoformat, help="Desde este día (AAAA-MM-DD)")
+        parser.add_argument("--until", type=date.fromisoformat, help="Hasta este día, sin incluirlo")
+        parser.add_argument("--no-archived", action="store_true", help="Sin las ventas archivadas")
+        parser.add_argument("--format", choices=("ptcol", "parquet"), default="ptcol", help="parquet requiere pyarrow")
+        parser.add_argument("--block-rows", type=int, default=65536, help="Filas por bloque (acota la memoria)")
+        parser.add_argument("--no-compression", action="store_true", help="Sin zlib: más grande, se lee sin copiar")
+
+    def handle(self, *args, out, since=None, until=None, no_archived=False, block_rows=65536, no_compression=False,
+               **opts):
+        def progress(done, total):
+            self.stdout.write(f"{done}/{total} ventas...")
+
+        try:
+            stats = columnar.export_sales(
+                out, since=since, until=until, include_archived=not no_archived, block_rows=block_rows,
+                compression="none" if no_compression else "zlib", fmt=opts["format"], progress=progress)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['rows']} ventas en {stats['blocks']} bloque(s), {stats['bytes']} bytes -> {out}"))
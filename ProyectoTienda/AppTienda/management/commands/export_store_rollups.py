@@ -0,0 +1,34 @@
+import json
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from AppTienda.models import Store, StoreSalesRollup
+
+
+class Command(BaseCommand):
+    help = "Exporta los totales diarios de esta sucursal (JSON) para integrarlos en el consolidado"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat, help="Primer día a exportar (AAAA-MM-DD)")
+        parser.add_argument("--out", help="Archivo destino (por defecto, salida estándar)")
+
+    def handle(self, *args, since=None, out=None, **opts):
+        store = Store.objects.current()
+        qs = StoreSalesRollup.objects.filter(store=store).order_by("day")
+        if since:
+            qs = qs.filter(day__gte=since)
+        payload = {
+            "store": {"code": store.code, "name": store.name},
+            "rows": [{"day": r.day.isoformat(), "sales_count": r.sales_count, "quantity": r.quantity,
+                      "revenue": r.revenue, "stock_in": r.stock_in} for r in qs],
+        }
+        fh = open(out, "w", encoding="utf-8") if out else sys.stdout
+        try:
+            json.dump(payload, fh, ensure_ascii=False)
+        finally:
+            if out:
+                fh.close()
+        if out:
+            self.stdout.write(self.style.SUCCESS(f"{len(payload['rows'])} día(s) de {store.code} exportados a {out}"))
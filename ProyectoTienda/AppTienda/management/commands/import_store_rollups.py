@@ -0,0 +1,33 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from AppTienda.models import Store, StoreSalesRollup
+
+FIELDS = ("sales_count", "quantity", "revenue", "stock_in")
+
+
+class Command(BaseCommand):
+    help = "Integra los totales diarios exportados por otras sucursales (reemplaza los días recibidos)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Archivos JSON generados con export_store_rollups")
+
+    def handle(self, *args, files=(), **opts):
+        home = Store.objects.current()
+        for path in files:
+            with open(path, encoding="utf-8") as fh:
+                payload = json.load(fh)
+            code = payload["store"]["code"]
+            if code == home.code:
+                raise CommandError(f"{path}: es la sucursal local ({code}); sus totales ya se mantienen aquí")
+            with transaction.atomic():
+                store, _ = Store.objects.update_or_create(code=code, defaults={"name": payload["store"]["name"]})
+                for row in payload["rows"]:
+                    StoreSalesRollup.objects.update_or_create(
+                        store=store, day=date.fromisoformat(row["day"]),
+                        defaults={f: row.get(f, 0) for f in FIELDS},
+                    )
+            self.stdout.write(self.style.SUCCESS(f"{code}: {len(payload['rows'])} día(s) integrados."))
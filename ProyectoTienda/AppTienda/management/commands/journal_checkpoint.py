@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from AppTienda import journal
+
+
+class Command(BaseCommand):
+    help = "Muestra el lag de cada consumidor de la bitácora o fija su checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("consumer", nargs="?", help="Consumidor a consultar/actualizar (por defecto, todos)")
+        parser.add_argument("--set", type=int, dest="seq", help="Fija el checkpoint del consumidor en esta secuencia")
+
+    def handle(self, *args, consumer=None, seq=None, **opts):
+        if seq is not None:
+            if not consumer:
+                raise CommandError("--set requiere indicar el consumidor")
+            journal.set_checkpoint(consumer, seq)
+
+        head = journal.head_seq()
+        segs = journal.segments()
+        self.stdout.write(f"Bitácora: {journal.journal_dir()}")
+        self.stdout.write(f"Head seq: {head}  ·  segmentos: {len(segs)}")
+
+        names = [consumer] if consumer else journal.consumers()
+        if not names:
+            self.stdout.write(self.style.WARNING("No hay consumidores registrados."))
+        for name in names:
+            done = journal.get_checkpoint(name)
+            lag = max(head - done, 0)
+            style = self.style.SUCCESS if lag == 0 else self.style.WARNING
+            self.stdout.write(style(f"{name}: checkpoint {done}  ·  lag {lag}"))
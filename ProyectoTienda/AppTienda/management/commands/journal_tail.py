@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from AppTienda import journal
+
+
+class Command(BaseCommand):
+    help = "Reproduce la bitácora de ventas/stock desde una secuencia (o desde el checkpoint de un consumidor)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-seq", type=int, default=None, help="Entregar registros con seq mayor a este valor")
+        parser.add_argument("--consumer", help="Usar (y avanzar con --commit) el checkpoint de este consumidor")
+        parser.add_argument("--follow", action="store_true", help="Seguir esperando registros nuevos (tail -f)")
+        parser.add_argument("--commit", action="store_true", help="Guardar el checkpoint del consumidor al terminar")
+
+    def handle(self, *args, **opts):
+        after = opts["from_seq"]
+        if after is None:
+            after = journal.get_checkpoint(opts["consumer"]) if opts["consumer"] else 0
+
+        records = journal.follow(after) if opts["follow"] else journal.iter_records(after)
+        last = after
+        try:
+            for rec in records:
+                self.stdout.write(json.dumps(rec, ensure_ascii=False))
+                last = rec["seq"]
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if opts["consumer"] and opts["commit"] and last > after:
+                journal.set_checkpoint(opts["consumer"], last)
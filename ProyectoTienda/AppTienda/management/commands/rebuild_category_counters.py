@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from AppTienda import listcache, rollups
+
+
+class Command(BaseCommand):
+    help = "Verifica o recalcula los contadores por categoría (productos, unidades, valor del inventario) con un GROUP BY"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify", action="store_true", help="Solo comparar; sale con error si hay diferencias")
+
+    def handle(self, *args, verify=False, **opts):
+        problems = rollups.verify_category_counters()
+        if verify:
+            for p in problems[:50]:
+                self.stderr.write(f"  {p}")
+            if problems:
+                raise CommandError(f"{len(problems)} categoría(s) con contadores distintos; corre rebuild_category_counters.")
+            self.stdout.write(self.style.SUCCESS("Contadores por categoría correctos."))
+            return
+        n = rollups.rebuild_category_counters()
+        listcache.touch("category_stock")
+        self.stdout.write(self.style.SUCCESS(f"{n} categoría(s) recalculadas ({len(problems)} tenían diferencias)."))
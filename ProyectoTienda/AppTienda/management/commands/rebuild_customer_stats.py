@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from AppTienda import rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcula valor de vida, nº de compras, ticket promedio y primera/última compra de cada cliente"
+
+    def handle(self, *args, **opts):
+        n = rollups.rebuild_customer_stats()
+        self.stdout.write(self.style.SUCCESS(f"Agregados recalculados para {n} cliente(s) con compras."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from AppTienda import rankings, rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcula los rollups de ventas por producto/día/mes que alimentan los rankings y el dashboard, y los top-K"
+
+    def handle(self, *args, **opts):
+        n = rollups.rebuild_product_rollups()
+        ranked = rankings.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{n} fila(s) de rollup generadas; {ranked} en los rankings."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from AppTienda import rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcula los totales de turno (ventas, importe y unidades por producto) a partir de las ventas"
+
+    def add_arguments(self, parser):
+        parser.add_argument("shifts", nargs="*", type=int, help="Ids de turno (default: todos)")
+
+    def handle(self, *args, shifts=None, **opts):
+        n = rollups.rebuild_shift_totals(shifts or None)
+        self.stdout.write(self.style.SUCCESS(f"{n} turno(s) recalculados."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from AppTienda import rollups
+
+
+class Command(BaseCommand):
+    help = "Recalcula los totales diarios de las sucursales a partir de sus ventas y entradas locales"
+
+    def handle(self, *args, **opts):
+        n = rollups.rebuild_store_rollups()
+        self.stdout.write(self.style.SUCCESS(f"{n} día(s)-sucursal recalculados."))
@@ -0,0 +1,53 @@
+import os
+import shutil
+
+from django.core.management.base import BaseCommand
+
+from AppTienda import thumbnails
+from AppTienda.models import Product, User
+
+
+class Command(BaseCommand):
+    help = "Regenera en bloque las miniaturas (p. ej. al cambiar THUMBNAIL_SIZES) y descarga imágenes pendientes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Reescribir también las miniaturas existentes")
+        parser.add_argument("--fetch", action="store_true", help="Descargar ahora las imágenes de productos/usuarios sin procesar")
+        parser.add_argument("--prune", action="store_true", help="Borrar carpetas de tamaños que ya no están configurados")
+
+    def handle(self, *args, force=False, fetch=False, prune=False, **opts):
+        if fetch:
+            self._fetch_pending()
+
+        originals = os.path.join(thumbnails.root(), "originals")
+        digests = [d for d in os.listdir(originals) if thumbnails.HASH_RE.match(d)] if os.path.isdir(originals) else []
+        written = errors = 0
+        for i, digest in enumerate(digests, 1):
+            try:
+                written += thumbnails.generate(digest, only_missing=not force)
+            except Exception as e:
+                errors += 1
+                self.stderr.write(f"{digest}: {e}")
+            if i % 500 == 0:
+                self.stdout.write(f"{i}/{len(digests)} originales...")
+        self.stdout.write(self.style.SUCCESS(f"{len(digests)} originales, {written} miniaturas escritas, {errors} errores."))
+
+        if prune:
+            keep = {str(px) for px in thumbnails.sizes().values()} | {"originals"}
+            for name in os.listdir(thumbnails.root()):
+                path = os.path.join(thumbnails.root(), name)
+                if name not in keep and name.isdigit() and os.path.isdir(path):
+                    shutil.rmtree(path)
+                    self.stdout.write(f"Eliminado tamaño obsoleto: {name}px")
+
+    def _fetch_pending(self):
+        for model in (Product, User):
+            pending = model.objects.exclude(image_url="").values_list("pk", "image_url", "image_source")
+            for pk, url, source in pending.iterator():
+                if url == source:
+                    continue
+                try:
+                    digest = thumbnails.ingest(thumbnails.fetch(url))
+                    model.objects.filter(pk=pk, image_url=url).update(image_hash=digest, image_source=url)
+                except Exception as e:
+                    self.stderr.write(f"{model.__name__} #{pk} ({url}): {e}")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from AppTienda import events
+from AppTienda.models import OutboxEvent
+
+
+class Command(BaseCommand):
+    help = "Entrega a los handlers diferidos los eventos del outbox que su proceso no entregó (plazo vencido)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Eventos por lote")
+        parser.add_argument("--schedule", action="store_true", help="Programar la reentrega periódica en la cola y salir")
+
+    def handle(self, *args, batch_size=500, schedule=False, **opts):
+        if schedule:
+            job = events.schedule()
+            self.stdout.write(self.style.SUCCESS(f"Tarea #{job.pk} programada."))
+            return
+        n = events.replay(batch_size=batch_size)
+        self.stdout.write(f"{n} evento(s) reentregados; {OutboxEvent.objects.count()} en curso en el outbox.")
+        self.stdout.write(self.style.SUCCESS("Listo."))
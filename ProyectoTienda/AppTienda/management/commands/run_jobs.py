@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from AppTienda import events, jobs, rankings, reservations
+
+
+class Command(BaseCommand):
+    help = "Worker de la cola de tareas: ejecuta los Job pendientes en un pool de hilos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=2, help="Tareas simultáneas")
+        parser.add_argument("--poll", type=float, default=1.0, help="Segundos entre consultas cuando no hay trabajo")
+        parser.add_argument("--once", action="store_true", help="Procesar lo pendiente y salir")
+
+    def handle(self, *args, threads=2, poll=1.0, once=False, **opts):
+        name = jobs.worker_name()
+        recovered = jobs.recover_stale()
+        if recovered:
+            self.stdout.write(self.style.WARNING(f"{recovered} tarea(s) huérfanas regresaron a pendiente."))
+        reservations.schedule()  # barrido periódico de apartados vencidos (se reprograma solo)
+        events.schedule()        # reentrega de eventos diferidos que dejó un proceso caído (ídem)
+        rankings.schedule()      # top-K de más vendidos al cambiar de día (ídem)
+        self.stdout.write(self.style.SUCCESS(f"Worker {name} con {threads} hilo(s)."))
+
+        running = {}  # futuro -> id del job
+        next_beat = time.monotonic() + jobs.heartbeat_seconds()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            try:
+                while True:
+                    running = {f: pk for f, pk in running.items() if not f.done()}
+                    if time.monotonic() >= next_beat:
+                        # el heartbeat sale de aquí y no de ctx.progress(): una tarea larga que no reporta
+                        # avance (respaldo, mantenimiento) no parece huérfana a los demás workers
+                        jobs.heartbeat(name, running.values())
+                        recovered = jobs.recover_stale()
+                        if recovered:
+                            self.stdout.write(self.style.WARNING(f"{recovered} tarea(s) huérfanas regresaron a pendiente."))
+                        next_beat = time.monotonic() + jobs.heartbeat_seconds()
+                    claimed = None
+                    if len(running) < threads:
+                        claimed = jobs.claim(name)
+                        if claimed:
+                            self.stdout.write(f"→ {claimed}")
+                            running[pool.submit(jobs.run, claimed)] = claimed.pk
+                            continue
+                    if once and not claimed and not running:
+                        break
+                    time.sleep(poll)
+            except KeyboardInterrupt:
+                self.stdout.write("Deteniendo worker; esperando tareas en curso...")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from AppTienda import reservations
+
+
+class Command(BaseCommand):
+    help = "Libera los apartados de stock vencidos (por lotes); --rebuild recalcula Product.reserved"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Apartados por transacción")
+        parser.add_argument("--rebuild", action="store_true", help="Recalcular Product.reserved desde los apartados vigentes")
+        parser.add_argument("--schedule", action="store_true", help="Programar el barrido periódico en la cola y salir")
+
+    def handle(self, *args, batch_size=500, rebuild=False, schedule=False, **opts):
+        if schedule:
+            job = reservations.schedule()
+            self.stdout.write(self.style.SUCCESS(f"Tarea #{job.pk} programada."))
+            return
+        released = reservations.sweep(batch_size=batch_size)
+        self.stdout.write(f"{released} apartado(s) vencidos liberados.")
+        if rebuild:
+            n = reservations.rebuild_reserved()
+            self.stdout.write(f"Product.reserved recalculado ({n} producto(s) con apartados).")
+        self.stdout.write(self.style.SUCCESS("Listo."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from AppTienda import warmup
+
+
+class Command(BaseCommand):
+    help = "Compila plantillas, abre la base y precarga las cachés (lo mismo que hace el worker al arrancar)"
+
+    def handle(self, *args, **opts):
+        state = warmup.run()
+        for name, step in state["steps"].items():
+            self.stdout.write(f"  {name:<12} {step['ms']:>8} ms  ({step['result']})")
+        if not state["ready"]:
+            raise CommandError(f"Calentamiento incompleto: {state['error']}")
+        self.stdout.write(self.style.SUCCESS("Listo para recibir tráfico."))
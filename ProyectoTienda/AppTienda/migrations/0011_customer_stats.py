@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:01
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Max, Min, Sum
+
+
+def fill_customer_stats(apps, schema_editor):
+    Customer = apps.get_model('AppTienda', 'Customer')
+    Sale = apps.get_model('AppTienda', 'Sale')
+    stats = (Sale.objects.filter(customer__isnull=False).values('customer')
+             .annotate(ltv=Sum(F('quantity') * F('unit_price'), output_field=FloatField()),
+                       n=Count('id'), first=Min('created_at'), last=Max('created_at')))
+    for row in stats.iterator():
+        ltv = float(row['ltv'] or 0.0)
+        Customer.objects.filter(pk=row['customer']).update(
+            lifetime_value=ltv, order_count=row['n'], avg_ticket=ltv / row['n'],
+            first_purchase_at=row['first'], last_purchase_at=row['last'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0010_product_image_hash_product_image_source_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='avg_ticket',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='first_purchase_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='last_purchase_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='lifetime_value',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='order_count',
+            field=models.PositiveIntegerField(db_index=True, default=0),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['customer', 'created_at'], name='AppTienda_s_custome_bd1e66_idx'),
+        ),
+        migrations.RunPython(fill_customer_stats, migrations.RunPython.noop),
+    ]
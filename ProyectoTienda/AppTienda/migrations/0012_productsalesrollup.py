@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+
+def fill_rollups(apps, schema_editor):
+    Sale = apps.get_model('AppTienda', 'Sale')
+    Rollup = apps.get_model('AppTienda', 'ProductSalesRollup')
+    tz = timezone.get_current_timezone()
+    for period, trunc in (('d', TruncDate('created_at', tzinfo=tz)), ('m', TruncMonth('created_at', tzinfo=tz))):
+        rows = (Sale.objects.annotate(start=trunc).values('product', 'start')
+                .annotate(n=Count('id'), qty=Sum('quantity'),
+                          rev=Sum(F('quantity') * F('unit_price'), output_field=FloatField())))
+        Rollup.objects.bulk_create([
+            Rollup(product_id=r['product'], period=period,
+                   start=r['start'].date() if hasattr(r['start'], 'date') else r['start'],
+                   sales_count=r['n'], quantity=r['qty'] or 0, revenue=float(r['rev'] or 0.0))
+            for r in rows
+        ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0011_customer_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('d', 'Día'), ('m', 'Mes')], max_length=1)),
+                ('start', models.DateField()),
+                ('sales_count', models.IntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0.0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='AppTienda.product')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('period', 'start', 'product'), name='uniq_sales_rollup')],
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
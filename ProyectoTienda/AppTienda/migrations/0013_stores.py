@@ -0,0 +1,94 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def assign_home_store(apps, schema_editor):
+    Store = apps.get_model('AppTienda', 'Store')
+    Sale = apps.get_model('AppTienda', 'Sale')
+    StockEntry = apps.get_model('AppTienda', 'StockEntry')
+    Rollup = apps.get_model('AppTienda', 'StoreSalesRollup')
+    code = getattr(settings, 'STORE_CODE', 'main')
+    store, _ = Store.objects.get_or_create(code=code, defaults={'name': getattr(settings, 'STORE_NAME', code)})
+    Sale.objects.filter(store__isnull=True).update(store=store)
+    StockEntry.objects.filter(store__isnull=True).update(store=store)
+
+    day = TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+    rows = {}
+    for r in (Sale.objects.annotate(day=day).values('day')
+              .annotate(n=Count('id'), qty=Sum('quantity'),
+                        rev=Sum(F('quantity') * F('unit_price'), output_field=FloatField()))):
+        rows[r['day']] = Rollup(store=store, day=r['day'], sales_count=r['n'], quantity=r['qty'] or 0,
+                                revenue=float(r['rev'] or 0.0))
+    for r in StockEntry.objects.annotate(day=day).values('day').annotate(qty=Sum('quantity')):
+        rows.setdefault(r['day'], Rollup(store=store, day=r['day'])).stock_in = r['qty'] or 0
+    Rollup.objects.bulk_create(rows.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0012_productsalesrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Store',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=20, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['code'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StoreSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('sales_count', models.IntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0.0)),
+                ('stock_in', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-day', 'store'],
+            },
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='store',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='sales', to='AppTienda.store'),
+        ),
+        migrations.AddField(
+            model_name='stockentry',
+            name='store',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='stock_entries', to='AppTienda.store'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['store', 'created_at'], name='AppTienda_s_store_i_f41ff4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockentry',
+            index=models.Index(fields=['store', 'created_at'], name='AppTienda_s_store_i_83d921_idx'),
+        ),
+        migrations.AddField(
+            model_name='storesalesrollup',
+            name='store',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='AppTienda.store'),
+        ),
+        migrations.AddConstraint(
+            model_name='storesalesrollup',
+            constraint=models.UniqueConstraint(fields=('store', 'day'), name='uniq_store_rollup'),
+        ),
+        migrations.RunPython(assign_home_store, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0013_stores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableGeneration',
+            fields=[
+                ('table', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('generation', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0014_table_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSale',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_price', models.FloatField()),
+                ('total_amount', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_sales', to='AppTienda.customer')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_sales', to='AppTienda.product')),
+                ('store', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_sales', to='AppTienda.store')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['customer', 'created_at'], name='AppTienda_a_custome_f74d95_idx'), models.Index(fields=['store', 'created_at'], name='AppTienda_a_store_i_de88c5_idx')],
+            },
+        ),
+    ]
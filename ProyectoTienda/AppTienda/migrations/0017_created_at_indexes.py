@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0016_product_sku_barcodes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['created_at'], name='AppTienda_a_created_5236ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['created_at'], name='AppTienda_s_created_57819a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockentry',
+            index=models.Index(fields=['created_at'], name='AppTienda_s_created_d86d26_idx'),
+        ),
+    ]
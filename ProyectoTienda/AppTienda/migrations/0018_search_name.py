@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:15
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def search_key(text):
+    # copia congelada de AppTienda.models.search_key: la migración no debe cambiar si esa cambia
+    text = unicodedata.normalize("NFKD", text or "")
+    return " ".join("".join(c for c in text if not unicodedata.combining(c)).casefold().split())
+
+
+def fill_search_names(apps, schema_editor):
+    Product = apps.get_model('AppTienda', 'Product')
+    Customer = apps.get_model('AppTienda', 'Customer')
+    for p in Product.objects.only('id', 'name').iterator():
+        Product.objects.filter(pk=p.pk).update(search_name=search_key(p.name)[:255])
+    for c in Customer.objects.only('id', 'first_name', 'last_name').iterator():
+        Customer.objects.filter(pk=c.pk).update(search_name=search_key(f"{c.first_name} {c.last_name}")[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0017_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0018_search_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigger', models.CharField(default='manual', max_length=16)),
+                ('status', models.CharField(choices=[('running', 'En proceso'), ('ok', 'Correcto'), ('problems', 'Con problemas'), ('failed', 'Fallido')], default='running', max_length=10)),
+                ('steps', models.JSONField(blank=True, default=dict)),
+                ('before', models.JSONField(blank=True, default=dict)),
+                ('after', models.JSONField(blank=True, default=dict)),
+                ('size_before', models.BigIntegerField(default=0)),
+                ('size_after', models.BigIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0019_maintenance_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64)),
+                ('partition', models.PositiveSmallIntegerField(default=0)),
+                ('partitions', models.PositiveSmallIntegerField(default=1)),
+                ('range_start', models.BigIntegerField(default=0)),
+                ('range_end', models.BigIntegerField(default=0)),
+                ('last_pk', models.BigIntegerField(default=0)),
+                ('rows_updated', models.BigIntegerField(default=0)),
+                ('chunks', models.PositiveIntegerField(default=0)),
+                ('done', models.BooleanField(default=False)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name', 'partitions', 'partition'],
+                'constraints': [models.UniqueConstraint(fields=('name', 'partitions', 'partition'), name='uniq_backfill_partition')],
+            },
+        ),
+    ]
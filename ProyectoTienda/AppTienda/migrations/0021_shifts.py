@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:28
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0020_backfill_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedsale',
+            name='vendor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_sales', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='vendor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='Shift',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opened_at', models.DateTimeField(auto_now_add=True)),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('opening_cash', models.FloatField(default=0.0, validators=[django.core.validators.MinValueValidator(0.0)])),
+                ('counted_cash', models.FloatField(blank=True, null=True)),
+                ('sales_count', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0.0)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='shifts', to='AppTienda.store')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='shifts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-opened_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='archivedsale',
+            name='shift',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_sales', to='AppTienda.shift'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='shift',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='sales', to='AppTienda.shift'),
+        ),
+        migrations.CreateModel(
+            name='ShiftProductTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sales_count', models.IntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0.0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shift_totals', to='AppTienda.product')),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_totals', to='AppTienda.shift')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='shift',
+            index=models.Index(fields=['store', 'opened_at'], name='AppTienda_s_store_i_ed0b15_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='shift',
+            constraint=models.UniqueConstraint(condition=models.Q(('closed_at__isnull', True)), fields=('vendor', 'store'), name='one_open_shift_per_vendor'),
+        ),
+        migrations.AddConstraint(
+            model_name='shiftproducttotal',
+            constraint=models.UniqueConstraint(fields=('shift', 'product'), name='uniq_shift_product'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:31
+
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Sum
+
+
+def fill_counters(apps, schema_editor):
+    Category = apps.get_model('AppTienda', 'Category')
+    Product = apps.get_model('AppTienda', 'Product')
+    rows = (Product.objects.order_by().values('category')
+            .annotate(n=Count('id'), units=Sum('stock'), value=Sum(F('stock') * F('price'), output_field=FloatField())))
+    for r in rows:
+        if r['category'] is not None:
+            Category.objects.filter(pk=r['category']).update(
+                product_count=r['n'], units_on_hand=r['units'] or 0, stock_value=r['value'] or 0.0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0021_shifts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='stock_value',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='units_on_hand',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:10
+
+from django.db import migrations
+
+
+def enable_wal(apps, schema_editor):
+    # journal_mode queda guardado en el archivo: se cambia una vez aquí y no en cada conexión
+    # (warmup.tune_connection solo aplica PRAGMA de la conexión, que no tocan la base)
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cur:
+            cur.execute('PRAGMA journal_mode = WAL')
+
+
+def disable_wal(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cur:
+            cur.execute('PRAGMA journal_mode = DELETE')
+
+
+class Migration(migrations.Migration):
+    atomic = False  # journal_mode no se puede cambiar dentro de una transacción
+
+    dependencies = [
+        ('AppTienda', '0023_stock_reservations'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_wal, disable_wal),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 12:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0025_outbox_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shift',
+            name='late_revenue',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='shift',
+            name='late_sales',
+            field=models.IntegerField(default=0),
+        ),
+    ]
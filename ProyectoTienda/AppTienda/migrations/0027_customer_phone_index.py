@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0026_shift_late_adjustments'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customer',
+            name='phone',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=30),
+        ),
+    ]
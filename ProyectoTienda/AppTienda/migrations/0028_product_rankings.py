@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('AppTienda', '0027_customer_phone_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingBuild',
+            fields=[
+                ('window', models.CharField(max_length=5, primary_key=True, serialize=False)),
+                ('as_of', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(max_length=5)),
+                ('metric', models.CharField(max_length=7)),
+                ('scope', models.IntegerField(default=0)),
+                ('value', models.FloatField(default=0.0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0.0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='AppTienda.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['window', 'metric', 'scope', '-value', 'product'], name='AppTienda_p_window_37072a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('window', 'metric', 'scope', 'product'), name='uniq_product_ranking')],
+            },
+        ),
+    ]
@@ -1,7 +1,20 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
+import unicodedata
+
+
+def search_key(text):
+    """Minúsculas, sin acentos y con espacios simples: lo que se indexa para buscar por prefijo."""
+    text = unicodedata.normalize("NFKD", text or "")
+    return " ".join("".join(c for c in text if not unicodedata.combining(c)).casefold().split())
+
 
 # ---------- USER ----------
 class UserManager(BaseUserManager):
@@ -33,6 +46,8 @@ class User(AbstractUser):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='vendor')
     created_at = models.DateTimeField(auto_now_add=True)
     image_url = models.CharField(max_length=255, blank=True, default="")
+    image_hash = models.CharField(max_length=64, blank=True, default="")    # sha256 del original (miniaturas)
+    image_source = models.CharField(max_length=255, blank=True, default="")  # image_url del que salió image_hash
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
     objects = UserManager()
@@ -40,13 +55,55 @@ class User(AbstractUser):
         return f"{self.email} ({self.role})"
 
 
+# ---------- STORE (sucursal) ----------
+class StoreManager(models.Manager):
+    _current = None
+
+    def current(self):
+        """La sucursal de esta instalación (settings.STORE_CODE); se cachea por proceso."""
+        code = getattr(settings, "STORE_CODE", "main")
+        if StoreManager._current is None or StoreManager._current.code != code:
+            StoreManager._current, _ = self.get_or_create(
+                code=code, defaults={"name": getattr(settings, "STORE_NAME", code)})
+        return StoreManager._current
+
+
+class Store(models.Model):
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    objects = StoreManager()
+
+    class Meta:
+        ordering = ['code']
+
+    def __str__(self):  # pragma: no cover
+        return f"{self.name} ({self.code})"
+
+
 # ---------- CUSTOMER (separado de User) ----------
 class Customer(models.Model):
     first_name = models.CharField(max_length=150, blank=True, default="")
     last_name  = models.CharField(max_length=150, blank=True, default="")
     address    = models.CharField(max_length=255, blank=True, default="")
-    phone      = models.CharField(max_length=30,  blank=True, default="")
+    phone      = models.CharField(max_length=30,  blank=True, default="", db_index=True)  # búsqueda exacta en caja y admin
     created_at = models.DateTimeField(auto_now_add=True)
+    # agregados de compras (rollups.py los mantiene en cada venta; rebuild_customer_stats los recalcula)
+    lifetime_value   = models.FloatField(default=0.0, db_index=True)
+    order_count      = models.PositiveIntegerField(default=0, db_index=True)
+    avg_ticket       = models.FloatField(default=0.0)
+    first_purchase_at = models.DateTimeField(null=True, blank=True)
+    last_purchase_at  = models.DateTimeField(null=True, blank=True, db_index=True)
+    search_name = models.CharField(max_length=255, blank=True, default="", db_index=True, editable=False)  # search_key(nombre)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"first_name", "last_name"} & set(update_fields):
+            self.search_name = search_key(f"{self.first_name} {self.last_name}")[:255]
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "search_name"}
+        super().save(*args, **kwargs)
+
     def __str__(self):  # pragma: no cover
         return f"{self.first_name} {self.last_name}".strip()
 
@@ -56,6 +113,10 @@ class Category(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
+    # contadores denormalizados (handlers.py; recalcular: manage.py rebuild_category_counters)
+    product_count = models.IntegerField(default=0, editable=False)
+    units_on_hand = models.IntegerField(default=0, editable=False)
+    stock_value = models.FloatField(default=0.0, editable=False)   # suma de stock * precio actual
     class Meta:
         ordering = ['name']
     def __str__(self):  # pragma: no cover
@@ -63,35 +124,87 @@ class Category(models.Model):
 
 
 # ---------- PRODUCT ----------
+COUNTER_FIELDS = frozenset({"stock", "reserved"})  # nunca se escriben desde un save() completo
+
+
 class Product(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, default="")
     price = models.FloatField(validators=[MinValueValidator(0.0)])  # DOUBLE
     stock = models.PositiveIntegerField(default=0)  # 👈 entero
+    reserved = models.PositiveIntegerField(default=0, editable=False)  # apartado por carritos abiertos (StockReservation)
     created_at = models.DateTimeField(auto_now_add=True)
     image_url = models.CharField(max_length=255, blank=True, default="")
+    image_hash = models.CharField(max_length=64, blank=True, default="")    # sha256 del original (miniaturas)
+    image_source = models.CharField(max_length=255, blank=True, default="")  # image_url del que salió image_hash
     category = models.ForeignKey('Category', on_delete=models.PROTECT, null=True, related_name='products')
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)  # código principal (escaneable)
+    search_name = models.CharField(max_length=255, blank=True, default="", db_index=True, editable=False)  # search_key(name)
 
     class Meta:
         ordering = ['-id']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        # categoría con la que se leyó: si cambia, el evento product.saved lleva ambas (contadores por categoría)
+        obj._loaded_category_id = obj.__dict__.get("category_id")
+        return obj
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "name" in update_fields:  # no en cada cambio de stock
+            self.search_name = search_key(self.name)[:255]
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "search_name"}
+        if kwargs.get("update_fields") is None and not self._state.adding:
+            # stock y reserved solo se mueven con UPDATE condicionales (ventas, entradas, apartados);
+            # un save() completo con el valor leído pisaría lo que se confirmó entre la lectura y el save
+            kwargs["update_fields"] = [f.name for f in self._meta.concrete_fields
+                                       if not f.primary_key and f.name not in COUNTER_FIELDS]
+        super().save(*args, **kwargs)
+        self._loaded_category_id = self.category_id
+
+    @property
+    def available(self):
+        """Disponible para vender: existencias menos lo apartado por otros carritos."""
+        return max(0, self.stock - self.reserved)
+
     def __str__(self):
         return self.name
 
 
+# ---------- CÓDIGOS DE BARRAS adicionales (un producto puede tener varios) ----------
+class ProductBarcode(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='barcodes')
+    code = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.code} → {self.product_id}"
+
+
 # ---------- STOCK ENTRIES (altas de inventario) ----------
 class StockEntry(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_entries')
+    store = models.ForeignKey('Store', null=True, on_delete=models.PROTECT, related_name='stock_entries')
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])  # 👈 entero
     note = models.CharField(max_length=255, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['store', 'created_at']), models.Index(fields=['created_at'])]
+
     def save(self, *a, **kw):
-        is_new = self.pk is None
-        super().save(*a, **kw)
-        if is_new:
-            self.product.stock = (self.product.stock or 0) + int(self.quantity)
-            self.product.save(update_fields=['stock'])
+        if self.store_id is None:
+            self.store = Store.objects.current()
+        if self.pk is not None:
+            return super().save(*a, **kw)
+        # alta: suma al stock con un UPDATE atómico, sin leer ni re-guardar el producto;
+        # lo derivado (listados, rollups, bitácora) lo hacen los handlers de stock.entry_created
+        with transaction.atomic():
+            super().save(*a, **kw)
+            Product.objects.filter(pk=self.product_id).update(stock=F('stock') + int(self.quantity))
 
     def __str__(self):
         return f"{self.product} +{self.quantity}"
@@ -101,6 +214,9 @@ class StockEntry(models.Model):
 class Sale(models.Model):
     product = models.ForeignKey('Product', on_delete=models.PROTECT, related_name='sales')
     customer = models.ForeignKey('Customer', null=True, blank=True, on_delete=models.SET_NULL, related_name='sales')
+    store = models.ForeignKey('Store', null=True, on_delete=models.PROTECT, related_name='sales')
+    vendor = models.ForeignKey('User', null=True, blank=True, on_delete=models.SET_NULL, related_name='sales')
+    shift = models.ForeignKey('Shift', null=True, blank=True, on_delete=models.PROTECT, related_name='sales')
     quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])   # entero
     unit_price = models.FloatField(validators=[MinValueValidator(0.0)])        # se fija desde product
     total_amount = models.FloatField(default=0.0)                               # 👈 nuevo: total guardado
@@ -108,6 +224,8 @@ class Sale(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [models.Index(fields=['customer', 'created_at']), models.Index(fields=['store', 'created_at']),
+                   models.Index(fields=['created_at'])]  # ordering, archive_sales y date_hierarchy del admin
 
     @property
     def total_price(self) -> float:
@@ -115,6 +233,8 @@ class Sale(models.Model):
         return float(self.total_amount)
 
     def save(self, *args, **kwargs):
+        if self.store_id is None:
+            self.store = Store.objects.current()
         # completa unit_price si no viene (ya no lo pedimos en el form)
         if (self.unit_price is None or self.unit_price == 0) and self.product_id:
             self.unit_price = float(self.product.price)
@@ -122,18 +242,333 @@ class Sale(models.Model):
         # calcula y guarda el total
         self.total_amount = round(float(self.unit_price) * int(self.quantity or 0), 2)
 
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
+        if self.pk is not None:
+            return super().save(*args, **kwargs)
 
-        # descuenta stock solo en la creación
-        if is_new:
-            prod = self.product
-            new_stock = int(prod.stock or 0) - int(self.quantity)
-            if new_stock < 0:
-                self.delete()
-                raise ValueError("Stock insuficiente para esta venta")
-            prod.stock = new_stock
-            prod.save(update_fields=['stock'])
+        # alta: descuenta stock con un UPDATE condicional antes de insertar; lo apartado por otros carritos
+        # no se puede vender y lo que apartó este carrito (``sale.cart``) se convierte en la venta.
+        # Si no alcanza no se escribe nada. Lo derivado va en los handlers de sale.created
+        cart, qty = getattr(self, "cart", None), int(self.quantity)
+        with transaction.atomic():
+            held = StockReservation.objects.take(cart, self.product_id) if cart else 0
+            for attempt in (1, 2):
+                taken = Product.objects.filter(pk=self.product_id, stock__gte=F('reserved') - held + qty).update(
+                    stock=F('stock') - qty, reserved=F('reserved') - held)
+                if taken:
+                    break
+                # quizá lo retienen apartados ya vencidos que el barrido no ha liberado
+                if attempt == 2 or not StockReservation.objects.sweep(product_id=self.product_id):
+                    raise ValueError("Stock insuficiente para esta venta (o apartado en otra caja)")
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Sale #{self.pk} - {self.product} x {self.quantity}"
+
+
+# ---------- VENTAS ARCHIVADAS (frío; ver management/commands/archive_sales.py) ----------
+class ArchivedSale(models.Model):
+    """Ventas viejas que salieron de Sale con el mismo id; ya están contadas en los rollups y agregados."""
+    id = models.BigIntegerField(primary_key=True)
+    product = models.ForeignKey('Product', on_delete=models.PROTECT, related_name='archived_sales')
+    customer = models.ForeignKey('Customer', null=True, blank=True, on_delete=models.SET_NULL, related_name='archived_sales')
+    store = models.ForeignKey('Store', null=True, on_delete=models.PROTECT, related_name='archived_sales')
+    vendor = models.ForeignKey('User', null=True, blank=True, on_delete=models.SET_NULL, related_name='archived_sales')
+    shift = models.ForeignKey('Shift', null=True, blank=True, on_delete=models.PROTECT, related_name='archived_sales')
+    quantity = models.PositiveIntegerField()
+    unit_price = models.FloatField()
+    total_amount = models.FloatField(default=0.0)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['customer', 'created_at']), models.Index(fields=['store', 'created_at']),
+                   models.Index(fields=['created_at'])]  # ordering, archive_sales y date_hierarchy del admin
+
+    def __str__(self):
+        return f"Sale #{self.pk} (archivada) - {self.product_id} x {self.quantity}"
+
+
+# ---------- ROLLUP de ventas por producto (día y mes) ----------
+class ProductSalesRollup(models.Model):
+    """Ventas acumuladas por producto y periodo; rankings.py lee de aquí en lugar de Sale."""
+    PERIOD_CHOICES = (('d', 'Día'), ('m', 'Mes'))
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='sales_rollups')
+    period = models.CharField(max_length=1, choices=PERIOD_CHOICES)
+    start = models.DateField()  # día, o primer día del mes
+    sales_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['period', 'start', 'product'], name='uniq_sales_rollup')]
+
+    def __str__(self):  # pragma: no cover
+        return f"{self.product_id} {self.period}:{self.start} x{self.quantity}"
+
+
+# ---------- TOP-K de más vendidos por ventana, métrica y categoría (ver rankings.py) ----------
+class ProductRanking(models.Model):
+    """Los RANKINGS_DEPTH mejores productos de cada ventana/métrica/categoría; se lee con un LIMIT sobre el índice."""
+    window = models.CharField(max_length=5)
+    metric = models.CharField(max_length=7)
+    scope = models.IntegerField(default=0)  # id de categoría; 0 = todas
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='rankings')
+    value = models.FloatField(default=0.0)  # la métrica (cantidad o ingreso): la llave de orden
+    quantity = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['window', 'metric', 'scope', 'product'], name='uniq_product_ranking')]
+        indexes = [models.Index(fields=['window', 'metric', 'scope', '-value', 'product'])]  # top_products: LIMIT k
+
+    def __str__(self):  # pragma: no cover
+        return f"{self.window}/{self.metric}/{self.scope} {self.product_id}={self.value}"
+
+
+class RankingBuild(models.Model):
+    """Día para el que se recalculó cada ventana de ProductRanking (al cambiar de día salen días de la ventana)."""
+    window = models.CharField(max_length=5, primary_key=True)
+    as_of = models.DateField()
+
+    def __str__(self):  # pragma: no cover
+        return f"{self.window} @ {self.as_of}"
+
+
+# ---------- ROLLUP diario por sucursal (reportes consolidados) ----------
+class StoreSalesRollup(models.Model):
+    """Totales por sucursal y día; es lo único que se exporta/mezcla entre sucursales."""
+    store = models.ForeignKey('Store', on_delete=models.CASCADE, related_name='sales_rollups')
+    day = models.DateField()
+    sales_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0.0)
+    stock_in = models.IntegerField(default=0)  # unidades recibidas (StockEntry)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['store', 'day'], name='uniq_store_rollup')]
+        ordering = ['-day', 'store']
+
+    def __str__(self):  # pragma: no cover
+        return f"{self.store_id} {self.day}: ${self.revenue:.2f}"
+
+
+# ---------- JOB (cola de tareas en segundo plano) ----------
+class Job(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'Pendiente'), ('running', 'En proceso'),
+        ('done', 'Terminado'), ('failed', 'Fallido'),
+    )
+    kind = models.CharField(max_length=64)
+    params = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0)  # mayor = se atiende antes
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    progress = models.PositiveSmallIntegerField(default=0)  # 0-100
+    message = models.CharField(max_length=255, blank=True, default="")
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=64, blank=True, default="")
+    created_by = models.ForeignKey('User', null=True, blank=True, on_delete=models.SET_NULL, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [models.Index(fields=['status', 'priority', 'run_after'])]
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ('done', 'failed')
+
+    def __str__(self):
+        return f"Job #{self.pk} {self.kind} ({self.status})"
+
+
+# ---------- GENERACIÓN por tabla (caché de listados) ----------
+class TableGeneration(models.Model):
+    """Sube en cada cambio de la tabla; listcache.py la usa como parte de la llave."""
+    table = models.CharField(max_length=50, primary_key=True)
+    generation = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.table} v{self.generation}"
+
+
+# ---------- MANTENIMIENTO de la base (ver maintenance.py / manage.py db_maintenance) ----------
+class MaintenanceRun(models.Model):
+    STATUS_CHOICES = (
+        ('running', 'En proceso'), ('ok', 'Correcto'),
+        ('problems', 'Con problemas'), ('failed', 'Fallido'),
+    )
+    trigger = models.CharField(max_length=16, default='manual')  # manual / scheduled
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    steps = models.JSONField(default=dict, blank=True)    # {paso: {"ms": .., "result": ..}}
+    before = models.JSONField(default=dict, blank=True)   # tamaños, páginas libres y tiempos de consultas
+    after = models.JSONField(default=dict, blank=True)
+    size_before = models.BigIntegerField(default=0)       # bytes de db + wal
+    size_after = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"Mantenimiento #{self.pk} ({self.get_status_display()})"
+
+
+# ---------- BACKFILL: avance por partición (ver backfill.py / manage.py backfill) ----------
+class BackfillCheckpoint(models.Model):
+    name = models.CharField(max_length=64)
+    partition = models.PositiveSmallIntegerField(default=0)
+    partitions = models.PositiveSmallIntegerField(default=1)
+    range_start = models.BigIntegerField(default=0)   # pk incluidos: (range_start, range_end]
+    range_end = models.BigIntegerField(default=0)
+    last_pk = models.BigIntegerField(default=0)       # todo lo <= last_pk ya se procesó
+    rows_updated = models.BigIntegerField(default=0)
+    chunks = models.PositiveIntegerField(default=0)
+    done = models.BooleanField(default=False)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name', 'partitions', 'partition']
+        constraints = [models.UniqueConstraint(fields=['name', 'partitions', 'partition'], name='uniq_backfill_partition')]
+
+    def __str__(self):
+        return f"{self.name} {self.partition + 1}/{self.partitions} @ {self.last_pk}"
+
+
+# ---------- TURNOS (corte de caja) ----------
+class ShiftManager(models.Manager):
+    def open_for(self, user, store=None):
+        """Turno abierto del usuario en esta sucursal, o None."""
+        if not getattr(user, "is_authenticated", False):
+            return None
+        return self.filter(vendor=user, store=store or Store.objects.current(), closed_at__isnull=True).first()
+
+
+class Shift(models.Model):
+    """Turno de un vendedor; los totales los suben los handlers de venta al confirmar (ver rollups.shift_sales)."""
+    store = models.ForeignKey('Store', on_delete=models.PROTECT, related_name='shifts')
+    vendor = models.ForeignKey('User', on_delete=models.PROTECT, related_name='shifts')
+    opened_at = models.DateTimeField(auto_now_add=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    opening_cash = models.FloatField(default=0.0, validators=[MinValueValidator(0.0)])   # fondo de caja
+    counted_cash = models.FloatField(null=True, blank=True)                             # contado al cerrar
+    sales_count = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0.0)
+    # ventas que llegaron (+) o se borraron (-) con el turno ya cerrado: el corte no cambia, queda el ajuste aparte
+    late_sales = models.IntegerField(default=0)
+    late_revenue = models.FloatField(default=0.0)
+    objects = ShiftManager()
+
+    class Meta:
+        ordering = ['-opened_at']
+        indexes = [models.Index(fields=['store', 'opened_at'])]
+        constraints = [models.UniqueConstraint(fields=['vendor', 'store'], condition=Q(closed_at__isnull=True),
+                                               name='one_open_shift_per_vendor')]
+
+    @property
+    def is_open(self):
+        return self.closed_at is None
+
+    @property
+    def expected_cash(self):
+        # todas las ventas se cobran en efectivo
+        return round(self.opening_cash + self.revenue, 2)
+
+    @property
+    def difference(self):
+        return None if self.counted_cash is None else round(self.counted_cash - self.expected_cash, 2)
+
+    def __str__(self):
+        return f"Turno #{self.pk} {self.vendor_id} ({'abierto' if self.is_open else 'cerrado'})"
+
+
+class ShiftProductTotal(models.Model):
+    shift = models.ForeignKey('Shift', on_delete=models.CASCADE, related_name='product_totals')
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='shift_totals')
+    sales_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['shift', 'product'], name='uniq_shift_product')]
+
+    def __str__(self):  # pragma: no cover
+        return f"{self.shift_id}/{self.product_id} x{self.quantity}"
+
+
+# ---------- APARTADOS de stock por carrito abierto (ver reservations.py) ----------
+class StockReservationManager(models.Manager):
+    def take(self, cart, product_id):
+        """Borra el apartado del carrito para ese producto; regresa cuántas unidades tenía (0 si no había)."""
+        row = self.filter(cart=cart, product_id=product_id).values_list("pk", "quantity").first()
+        if row is None:
+            return 0
+        self.filter(pk=row[0]).delete()
+        return row[1]
+
+    def sweep(self, product_id=None, batch_size=500, now=None):
+        """Libera los apartados vencidos por lotes (índice de expires_at); regresa cuántos liberó."""
+        now, released = now or timezone.now(), 0
+        while True:
+            with transaction.atomic():
+                qs = self.filter(expires_at__lte=now)
+                if product_id is not None:
+                    qs = qs.filter(product_id=product_id)
+                rows = list(qs.order_by("expires_at").values_list("pk", "product_id", "quantity")[:batch_size])
+                if not rows:
+                    break
+                per_product = {}
+                for _pk, pid, qty in rows:
+                    per_product[pid] = per_product.get(pid, 0) + qty
+                self.filter(pk__in=[r[0] for r in rows]).delete()
+                for pid, qty in per_product.items():
+                    Product.objects.filter(pk=pid).update(reserved=Greatest(F("reserved") - qty, 0))
+            released += len(rows)
+            if len(rows) < batch_size:
+                break
+        return released
+
+
+class StockReservation(models.Model):
+    """Unidades apartadas por un carrito (la sesión de una caja) hasta ``expires_at``; Product.reserved las suma."""
+    cart = models.CharField(max_length=64)
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    user = models.ForeignKey('User', null=True, blank=True, on_delete=models.SET_NULL, related_name='reservations')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)   # el barrido recorre solo los vencidos
+    objects = StockReservationManager()
+
+    class Meta:
+        ordering = ['expires_at']
+        constraints = [models.UniqueConstraint(fields=['cart', 'product'], name='one_reservation_per_cart_product')]
+
+    def __str__(self):  # pragma: no cover
+        return f"{self.cart[:8]} {self.product_id} x{self.quantity}"
+
+
+# ---------- OUTBOX de eventos con handlers diferidos (ver events.py) ----------
+class OutboxEvent(models.Model):
+    """Evento guardado en la misma transacción que lo causó; se borra cuando los handlers diferidos lo entregan."""
+    name = models.CharField(max_length=64)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    owner = models.CharField(max_length=96, blank=True, default="")   # proceso que lo entrega (host:pid)
+    lease_until = models.DateTimeField(db_index=True)                 # vencido: el proceso murió; events.replay() lo toma
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):  # pragma: no cover
+        return f"{self.name} #{self.pk} ({self.owner})"
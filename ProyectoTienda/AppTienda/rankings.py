@@ -0,0 +1,155 @@
+"""
+Rankings de más vendidos (top-K) por cantidad o ingreso, por ventana de tiempo
+y opcionalmente por categoría.
+
+Se guardan ya ordenados en ``ProductRanking``: los ``RANKINGS_DEPTH`` mejores de
+cada ventana, métrica y categoría (``scope`` 0 = todas), así que leer es un
+``LIMIT k`` sobre el índice (window, metric, scope, -value), sin GROUP BY.
+
+El handler diferido de rollups los mantiene: por cada producto vendido se
+suma su total de la ventana (a lo más 30 filas diarias o 12 mensuales de
+``ProductSalesRollup``) y entra si supera al último. Dentro de un día los
+totales solo crecen, así que la tabla sigue siendo exactamente el top; lo que
+puede sacar a alguien sin que otro venda (el cambio de día, una venta borrada,
+un cambio de categoría) reconstruye la ventana desde los rollups (``rebuild``).
+El cambio de día lo hace la tarea ``refresh_rankings`` a medianoche.
+"""
+import heapq
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import ProductRanking, ProductSalesRollup, RankingBuild
+
+WINDOWS = {
+    "today": "Hoy",
+    "7d": "Últimos 7 días",
+    "30d": "Últimos 30 días",
+    "year": "Este año",
+}
+METRICS = {"qty": "Cantidad", "revenue": "Ingresos"}
+
+
+def depth():
+    """Cuántos se guardan por ventana/métrica/categoría: el k más grande que se puede pedir."""
+    return getattr(settings, "RANKINGS_DEPTH", 50)
+
+
+def window_filter(window, today=None):
+    today = today or timezone.localdate()
+    if window == "today":
+        return {"period": "d", "start": today}
+    if window == "7d":
+        return {"period": "d", "start__gte": today - timedelta(days=6)}
+    if window == "30d":
+        return {"period": "d", "start__gte": today - timedelta(days=29)}
+    if window == "year":
+        return {"period": "m", "start__gte": today.replace(month=1, day=1)}
+    raise ValueError(f"Ventana desconocida: {window}")
+
+
+def _totals(window, today, products=None):
+    """{producto: (categoría, cantidad, ingreso)} de la ventana, sumando sus rollups."""
+    qs = ProductSalesRollup.objects.filter(**window_filter(window, today))
+    if products is not None:
+        qs = qs.filter(product__in=products)
+    rows = qs.values("product", "product__category").annotate(qty=Sum("quantity"), revenue=Sum("revenue"))
+    return {r["product"]: (r["product__category"] or 0, int(r["qty"] or 0), float(r["revenue"] or 0.0)) for r in rows}
+
+
+def _value(metric, qty, revenue):
+    return float(qty) if metric == "qty" else revenue
+
+
+def _scopes(category):
+    return (0, category) if category else (0,)
+
+
+@transaction.atomic
+def rebuild(windows=None, today=None):
+    """Recalcula desde los rollups el top de las ventanas dadas (o de todas). Regresa las filas escritas."""
+    today, keep, written = today or timezone.localdate(), depth(), 0
+    for window in windows or WINDOWS:
+        totals = _totals(window, today)
+        rows = []
+        for metric in METRICS:
+            groups = {}
+            for pk, (category, qty, revenue) in totals.items():
+                if qty > 0:
+                    for scope in _scopes(category):
+                        groups.setdefault(scope, []).append((-_value(metric, qty, revenue), pk, qty, revenue))
+            for scope, items in groups.items():
+                rows += [ProductRanking(window=window, metric=metric, scope=scope, product_id=pk,
+                                        value=-neg, quantity=qty, revenue=revenue)
+                         for neg, pk, qty, revenue in heapq.nsmallest(keep, items)]
+        ProductRanking.objects.filter(window=window).delete()
+        written += len(ProductRanking.objects.bulk_create(rows, batch_size=1000))
+        RankingBuild.objects.update_or_create(window=window, defaults={"as_of": today})
+    return written
+
+
+def _offer(window, metric, scope, product_id, qty, revenue, keep):
+    """Actualiza al producto si ya está en el top; si no, entra cuando supera al último (que sale)."""
+    value = _value(metric, qty, revenue)
+    top = ProductRanking.objects.filter(window=window, metric=metric, scope=scope)
+    if top.filter(product_id=product_id).update(value=value, quantity=qty, revenue=revenue):
+        return
+    if top.count() >= keep:
+        last = top.order_by("value", "-product_id").first()
+        if (value, -product_id) <= (last.value, -last.product_id):
+            return
+        top.filter(pk=last.pk).delete()
+    ProductRanking.objects.create(window=window, metric=metric, scope=scope, product_id=product_id,
+                                  value=value, quantity=qty, revenue=revenue)
+
+
+@transaction.atomic
+def products_sold(products, today=None):
+    """Ofrece al top los productos de un lote de ventas ya sumado a los rollups."""
+    today, keep = today or timezone.localdate(), depth()
+    built = dict(RankingBuild.objects.values_list("window", "as_of"))
+    for window in WINDOWS:
+        if built.get(window) != today:  # cambió el día (o nunca se construyó): salieron días de la ventana
+            rebuild([window], today)
+            continue
+        for pk, (category, qty, revenue) in _totals(window, today, products).items():
+            if qty > 0:
+                for metric in METRICS:
+                    for scope in _scopes(category):
+                        _offer(window, metric, scope, pk, qty, revenue, keep)
+
+
+def top_products(window="30d", metric="qty", category=None, k=10):
+    """[{product, name, price, qty, revenue}, ...] ordenado por la métrica, máximo k (hasta RANKINGS_DEPTH)."""
+    window_filter(window)  # valida la ventana
+    today = timezone.localdate()
+    if not RankingBuild.objects.filter(window=window, as_of=today).exists():
+        rebuild([window], today)  # primera lectura del día antes de la tarea de medianoche y de la primera venta
+    rows = (ProductRanking.objects.filter(window=window, metric="qty" if metric == "qty" else "revenue", scope=category or 0)
+            .select_related("product").only("product_id", "product__name", "product__price", "quantity", "revenue")
+            .order_by("-value", "product_id")[:min(k, depth())])
+    return [{"product": r.product_id, "name": r.product.name, "price": float(r.product.price or 0.0),
+             "qty": r.quantity, "revenue": round(r.revenue, 2)} for r in rows]
+
+
+def schedule(exclude=None):
+    """Deja programada (una sola) la tarea ``refresh_rankings`` para el inicio del día siguiente."""
+    from . import jobs
+    from .models import Job
+    pending = (Job.objects.filter(kind="refresh_rankings", status__in=("pending", "running"))
+               .exclude(pk=exclude).first())
+    if pending:
+        return pending
+    midnight = timezone.make_aware(datetime.combine(timezone.localdate() + timedelta(days=1), time.min))
+    return jobs.enqueue("refresh_rankings", priority=-1, max_attempts=1, run_after=midnight + timedelta(minutes=1))
+
+
+def daily_totals(days=30):
+    """{fecha: {"revenue", "orders"}} de los últimos ``days`` días."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rows = (ProductSalesRollup.objects.filter(period="d", start__gte=since)
+            .values("start").annotate(revenue=Sum("revenue"), orders=Sum("sales_count")))
+    return {r["start"]: {"revenue": float(r["revenue"] or 0.0), "orders": int(r["orders"] or 0)} for r in rows}
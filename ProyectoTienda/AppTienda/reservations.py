@@ -0,0 +1,119 @@
+"""
+Apartados de stock mientras la caja arma la venta.
+
+Al escanear o elegir un producto la caja aparta las unidades por
+``STOCK_RESERVATION_SECONDS`` (cada cambio de cantidad renueva el plazo). Así
+dos cajas no cobran la última unidad: lo disponible es ``stock - reserved`` y
+``reserved`` es un contador en ``Product`` que se mueve con UPDATE
+condicionales, de modo que revisar la disponibilidad es leer una fila.
+
+Al guardar la venta, ``Sale.save`` convierte el apartado de su carrito en la
+venta (ver ``Sale.cart``). Lo que nadie cobró vence: ``sweep()`` recorre por
+lotes solo los vencidos por el índice de ``expires_at`` (tarea
+``sweep_reservations`` de la cola, que se vuelve a programar sola, o
+``manage.py sweep_reservations``). Si un apartado vencido todavía no barrido
+estorba, ``reserve()`` y ``Sale.save`` barren ese producto y reintentan.
+
+El carrito es la sesión de la caja (``cart_for``).
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Product, StockReservation
+
+
+def ttl():
+    return timedelta(seconds=getattr(settings, "STOCK_RESERVATION_SECONDS", 300))
+
+
+def cart_for(request):
+    """Id del carrito de esta sesión (se crea la primera vez)."""
+    if "cart" not in request.session:
+        request.session["cart"] = uuid.uuid4().hex
+    return request.session["cart"]
+
+
+def available(product_id):
+    """Unidades que se pueden apartar o vender ahora (una fila por llave primaria)."""
+    row = Product.objects.filter(pk=product_id).values_list("stock", "reserved").first()
+    return max(0, row[0] - row[1]) if row else 0
+
+
+def _move(product_id, delta):
+    """Suma ``delta`` a reserved solo si alcanza el stock (restar siempre se puede)."""
+    qs = Product.objects.filter(pk=product_id)
+    if delta > 0:
+        return bool(qs.filter(stock__gte=F("reserved") + delta).update(reserved=F("reserved") + delta))
+    return bool(qs.update(reserved=Greatest(F("reserved") + delta, 0)))
+
+
+def reserve(cart, product_id, quantity, user=None):
+    """Deja apartadas ``quantity`` unidades (el total del carrito, no un incremento); regresa (ok, disponible).
+
+    Si no alcanza, el apartado anterior del carrito queda como estaba.
+    """
+    with transaction.atomic():
+        for attempt in (1, 2):
+            held = StockReservation.objects.filter(cart=cart, product_id=product_id).values_list(
+                "quantity", flat=True).first() or 0
+            if _move(product_id, quantity - held):
+                break
+            if attempt == 2 or not StockReservation.objects.sweep(product_id=product_id):
+                return False, available(product_id)
+        if quantity > 0:
+            StockReservation.objects.update_or_create(
+                cart=cart, product_id=product_id,
+                defaults={"quantity": quantity, "expires_at": timezone.now() + ttl(),
+                          "user": user if getattr(user, "is_authenticated", False) else None})
+        else:
+            StockReservation.objects.filter(cart=cart, product_id=product_id).delete()
+    return True, available(product_id)
+
+
+def release(cart, product_id=None):
+    """Suelta los apartados del carrito (o solo el de un producto); regresa cuántas unidades liberó."""
+    released = 0
+    with transaction.atomic():
+        qs = StockReservation.objects.filter(cart=cart)
+        if product_id is not None:
+            qs = qs.filter(product_id=product_id)
+        for pid, qty in list(qs.values_list("product_id", "quantity")):
+            StockReservation.objects.take(cart, pid)
+            _move(pid, -qty)
+            released += qty
+    return released
+
+
+def sweep(batch_size=500):
+    return StockReservation.objects.sweep(batch_size=batch_size)
+
+
+def rebuild_reserved():
+    """Recalcula Product.reserved desde los apartados vigentes (tras un corte o una restauración)."""
+    with transaction.atomic():
+        sweep()
+        totals = dict(StockReservation.objects.order_by().values("product").annotate(q=Sum("quantity"))
+                      .values_list("product", "q"))
+        Product.objects.exclude(pk__in=totals).exclude(reserved=0).update(reserved=0)
+        for pid, qty in totals.items():
+            Product.objects.filter(pk=pid).update(reserved=qty)
+    return len(totals)
+
+
+def schedule(exclude=None):
+    """Deja programada (una sola) la tarea ``sweep_reservations`` para dentro de STOCK_RESERVATION_SWEEP_SECONDS."""
+    from . import jobs
+    from .models import Job
+    pending = (Job.objects.filter(kind="sweep_reservations", status__in=("pending", "running"))
+               .exclude(pk=exclude).first())
+    if pending:
+        return pending
+    every = getattr(settings, "STOCK_RESERVATION_SWEEP_SECONDS", 60)
+    return jobs.enqueue("sweep_reservations", priority=-1, max_attempts=1,
+                        run_after=timezone.now() + timedelta(seconds=every))
@@ -0,0 +1,360 @@
+"""
+Agregados denormalizados que se mantienen de forma incremental (con UPDATE ...
+SET x = x + delta) y que se pueden recalcular por completo en una sola pasada
+agrupada cuando haga falta. Los incrementos llegan por lotes de eventos
+(handlers.py, después del commit): un UPDATE por llave y no uno por venta.
+
+El importe de una venta es ``quantity * unit_price`` (igual que el dashboard),
+así no dependemos de ``total_amount``, que en ventas históricas quedó en 0.
+
+Las ventas archivadas (``ArchivedSale``) siguen contando: salen de Sale sin
+disparar post_delete y los recálculos completos suman ambas tablas.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, Max, Min, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least, TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import (Customer, Sale, ArchivedSale, StockEntry, ProductSalesRollup, StoreSalesRollup, TableGeneration,
+                     Shift, ShiftProductTotal, Category, Product)
+
+SALE_AMOUNT = F("quantity") * F("unit_price")
+
+
+def sale_amount(row):
+    """Importe de una venta a partir de su payload de evento (dict)."""
+    return int(row["quantity"]) * float(row.get("unit_price", 0.0))
+
+
+def all_sales():
+    """Querysets de ventas vivas y archivadas; los recálculos agregan cada uno y suman."""
+    return Sale.objects.all(), ArchivedSale.objects.all()
+
+
+def bump(model, keys, create=True, **deltas):
+    """UPDATE ... SET campo = campo + delta; si la fila no existe (y create) la inserta."""
+    updates = {f: F(f) + v for f, v in deltas.items()}
+    if model.objects.filter(**keys).update(**updates) or not create:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **deltas)
+    except IntegrityError:  # otra transacción la creó primero
+        model.objects.filter(**keys).update(**updates)
+
+
+# ---------- Lotes de eventos (ver handlers.py) ----------
+def _day(row):
+    return timezone.localdate(row["created_at"])
+
+
+def _customer_keys(row):
+    return (row["customer_id"],) if row["customer_id"] else ()
+
+
+def _product_keys(row):
+    day = _day(row)
+    return ("d", day, row["product_id"]), ("m", day.replace(day=1), row["product_id"])
+
+
+def _store_keys(row):
+    return ((row["store_id"], _day(row)),) if row["store_id"] else ()
+
+
+def _shift_keys(row):
+    return (row["shift_id"],) if row.get("shift_id") else ()
+
+
+def _shift_product_keys(row):
+    return ((row["shift_id"], row["product_id"]),) if row.get("shift_id") else ()
+
+
+def _group(rows, keys):
+    """{llave: [ventas, unidades, importe, primera, última]} de un lote (una fila puede caer en varias llaves)."""
+    out = {}
+    for r in rows:
+        for k in keys(r):
+            g = out.setdefault(k, [0, 0, 0.0, r["created_at"], r["created_at"]])
+            g[0] += 1
+            g[1] += int(r["quantity"])
+            g[2] += sale_amount(r)
+            g[3], g[4] = min(g[3], r["created_at"]), max(g[4], r["created_at"])
+    return out
+
+
+@transaction.atomic
+def sales_added(rows):
+    """Suma un lote de ventas (payloads de ``sale.created``) con un UPDATE por cliente/producto-periodo/sucursal-día."""
+    customers_added(rows)
+    for (period, start, product_id), (n, qty, amt, _f, _l) in _group(rows, _product_keys).items():
+        bump(ProductSalesRollup, {"period": period, "start": start, "product_id": product_id},
+             sales_count=n, quantity=qty, revenue=amt)
+    for (store_id, day), (n, qty, amt, _f, _l) in _group(rows, _store_keys).items():
+        bump(StoreSalesRollup, {"store_id": store_id, "day": day}, sales_count=n, quantity=qty, revenue=amt)
+
+
+@transaction.atomic
+def sales_removed(rows):
+    customers_removed(rows)
+    for (period, start, product_id), (n, qty, amt, _f, _l) in _group(rows, _product_keys).items():
+        bump(ProductSalesRollup, {"period": period, "start": start, "product_id": product_id}, create=False,
+             sales_count=-n, quantity=-qty, revenue=-amt)
+    for (store_id, day), (n, qty, amt, _f, _l) in _group(rows, _store_keys).items():
+        bump(StoreSalesRollup, {"store_id": store_id, "day": day}, create=False,
+             sales_count=-n, quantity=-qty, revenue=-amt)
+
+
+@transaction.atomic
+def stock_added(rows, sign=1):
+    for (store_id, day), (_n, qty, _a, _f, _l) in _group(rows, _store_keys).items():
+        bump(StoreSalesRollup, {"store_id": store_id, "day": day}, create=sign > 0, stock_in=sign * qty)
+
+
+def stock_removed(rows):
+    stock_added(rows, sign=-1)
+
+
+def stock_removed_for_products(product_ids):
+    """
+    Resta de los rollups por sucursal las entradas de productos que se borran en
+    bloque (borrado crudo, sin stock.entry_deleted): un GROUP BY y un UPDATE por sucursal-día.
+    """
+    day = TruncDate("created_at", tzinfo=timezone.get_current_timezone())
+    for r in (StockEntry.objects.filter(product_id__in=product_ids, store__isnull=False).annotate(day=day)
+              .values("store_id", "day").annotate(qty=Sum("quantity"))):
+        bump(StoreSalesRollup, {"store_id": r["store_id"], "day": r["day"]}, create=False, stock_in=-(r["qty"] or 0))
+
+
+# ---------- Clientes: valor de vida, nº de compras, primera/última compra ----------
+def customers_added(rows):
+    for pk, (n, _qty, amt, first, last) in _group(rows, _customer_keys).items():
+        first, last = Value(first), Value(last)
+        # avg_ticket va primero: MySQL evalúa las asignaciones de izquierda a derecha
+        Customer.objects.filter(pk=pk).update(
+            avg_ticket=(F("lifetime_value") + amt) / (F("order_count") + float(n)),
+            lifetime_value=F("lifetime_value") + amt,
+            order_count=F("order_count") + n,
+            first_purchase_at=Coalesce(Least("first_purchase_at", first), first),
+            last_purchase_at=Coalesce(Greatest("last_purchase_at", last), last),
+        )
+
+
+def customers_removed(rows):
+    groups = _group(rows, _customer_keys)
+    for pk, (n, _qty, amt, _f, _l) in groups.items():
+        Customer.objects.filter(pk=pk).update(
+            avg_ticket=Case(
+                When(order_count__gt=n, then=(F("lifetime_value") - amt) / (F("order_count") - float(n))),
+                default=Value(0.0), output_field=FloatField(),
+            ),
+            lifetime_value=Greatest(F("lifetime_value") - amt, Value(0.0)),
+            order_count=Greatest(F("order_count") - n, Value(0)),
+        )
+    # solo si alguna venta borrada era la primera o la última (índice customer+created_at)
+    removed = {}
+    for r in rows:
+        if r["customer_id"]:
+            removed.setdefault(r["customer_id"], set()).add(r["created_at"])
+    for pk, first, last in Customer.objects.filter(pk__in=groups).values_list("pk", "first_purchase_at", "last_purchase_at"):
+        if first in removed[pk] or last in removed[pk]:
+            spans = [qs.filter(customer_id=pk).aggregate(first=Min("created_at"), last=Max("created_at"))
+                     for qs in all_sales()]
+            firsts, lasts = [s["first"] for s in spans if s["first"]], [s["last"] for s in spans if s["last"]]
+            Customer.objects.filter(pk=pk).update(first_purchase_at=min(firsts, default=None),
+                                                  last_purchase_at=max(lasts, default=None))
+
+
+@transaction.atomic
+def rebuild_customer_stats(batch_size=1000):
+    """Recalcula los agregados de todos los clientes con un GROUP BY sobre Sale (y otro sobre el archivo)."""
+    merged = {}
+    for qs in all_sales():
+        stats = (qs.filter(customer__isnull=False).values("customer")
+                 .annotate(ltv=Sum(SALE_AMOUNT, output_field=FloatField()), n=Count("id"),
+                           first=Min("created_at"), last=Max("created_at")))
+        for row in stats.iterator(chunk_size=batch_size):
+            m = merged.setdefault(row["customer"], [0.0, 0, row["first"], row["last"]])
+            m[0] += float(row["ltv"] or 0.0)
+            m[1] += row["n"]
+            m[2], m[3] = min(m[2], row["first"]), max(m[3], row["last"])
+    Customer.objects.update(lifetime_value=0.0, order_count=0, avg_ticket=0.0,
+                            first_purchase_at=None, last_purchase_at=None)
+    batch, total = [], 0
+    for pk, (ltv, n, first, last) in merged.items():
+        batch.append(Customer(pk=pk, lifetime_value=ltv, order_count=n, avg_ticket=ltv / n,
+                              first_purchase_at=first, last_purchase_at=last))
+        if len(batch) >= batch_size:
+            total += _flush_customers(batch)
+    total += _flush_customers(batch)
+    bump(TableGeneration, {"table": "customer"}, generation=1)  # ver listcache.py
+    return total
+
+
+def _flush_customers(batch):
+    n = len(batch)
+    if batch:
+        Customer.objects.bulk_update(batch, ["lifetime_value", "order_count", "avg_ticket",
+                                             "first_purchase_at", "last_purchase_at"])
+        batch.clear()
+    return n
+
+
+# ---------- Productos: ventas por día y por mes (rankings / dashboard) ----------
+@transaction.atomic
+def rebuild_product_rollups(batch_size=2000):
+    """Recalcula los rollups diarios y mensuales con un GROUP BY por periodo."""
+    ProductSalesRollup.objects.all().delete()
+    tz = timezone.get_current_timezone()
+    total = 0
+    for period, trunc in (("d", TruncDate("created_at", tzinfo=tz)), ("m", TruncMonth("created_at", tzinfo=tz))):
+        rows = {}
+        for qs in all_sales():
+            for r in (qs.annotate(start=trunc).values("product", "start")
+                      .annotate(n=Count("id"), qty=Sum("quantity"), rev=Sum(SALE_AMOUNT, output_field=FloatField()))
+                      .iterator(chunk_size=batch_size)):
+                start = r["start"].date() if hasattr(r["start"], "date") else r["start"]
+                obj = rows.setdefault((r["product"], start), ProductSalesRollup(product_id=r["product"], period=period, start=start))
+                obj.sales_count += r["n"]
+                obj.quantity += r["qty"] or 0
+                obj.revenue += float(r["rev"] or 0.0)
+        total += len(ProductSalesRollup.objects.bulk_create(rows.values(), batch_size=batch_size))
+    return total
+
+
+# ---------- Sucursales: totales por día (se exportan para el consolidado) ----------
+@transaction.atomic
+def rebuild_store_rollups(store=None):
+    """Recalcula los totales diarios de una sucursal (o de todas las que tienen ventas locales)."""
+    day = TruncDate("created_at", tzinfo=timezone.get_current_timezone())
+    sales, entries = list(all_sales()), StockEntry.objects.all()
+    if store is not None:
+        sales, entries = [qs.filter(store=store) for qs in sales], entries.filter(store=store)
+    store_ids = set(entries.values_list("store", flat=True).distinct())
+    for qs in sales:
+        store_ids |= set(qs.values_list("store", flat=True).distinct())
+    store_ids.discard(None)
+    StoreSalesRollup.objects.filter(store_id__in=store_ids).delete()
+
+    rows = {}
+    for qs in sales:
+        for r in (qs.annotate(day=day).values("store", "day")
+                  .annotate(n=Count("id"), qty=Sum("quantity"), rev=Sum(SALE_AMOUNT, output_field=FloatField()))):
+            obj = rows.setdefault((r["store"], r["day"]), StoreSalesRollup(store_id=r["store"], day=r["day"]))
+            obj.sales_count += r["n"]
+            obj.quantity += r["qty"] or 0
+            obj.revenue += float(r["rev"] or 0.0)
+    for r in entries.annotate(day=day).values("store", "day").annotate(qty=Sum("quantity")):
+        key = (r["store"], r["day"])
+        rows.setdefault(key, StoreSalesRollup(store_id=r["store"], day=r["day"])).stock_in = r["qty"] or 0
+    StoreSalesRollup.objects.bulk_create(rows.values(), batch_size=2000)
+    return len(rows)
+
+
+# ---------- Turnos: totales corrientes para el corte de caja ----------
+@transaction.atomic
+def shift_sales(rows, sign=1):
+    """Suma (o resta con sign=-1) un lote de ventas a sus turnos y a los totales por producto del turno.
+
+    Un turno ya cerrado no cambia su corte: la venta tardía (o borrada) va a ``late_sales``/``late_revenue``.
+    """
+    open_shifts = set()
+    for pk, (n, qty, amt, _f, _l) in _group(rows, _shift_keys).items():
+        if Shift.objects.filter(pk=pk, closed_at__isnull=True).update(
+                sales_count=F("sales_count") + sign * n, units=F("units") + sign * qty, revenue=F("revenue") + sign * amt):
+            open_shifts.add(pk)
+        else:
+            Shift.objects.filter(pk=pk).update(late_sales=F("late_sales") + sign * n,
+                                               late_revenue=F("late_revenue") + sign * amt)
+    for (shift_id, product_id), (n, qty, amt, _f, _l) in _group(rows, _shift_product_keys).items():
+        if shift_id in open_shifts:
+            bump(ShiftProductTotal, {"shift_id": shift_id, "product_id": product_id}, create=sign > 0,
+                 sales_count=sign * n, quantity=sign * qty, revenue=sign * amt)
+
+
+@transaction.atomic
+def rebuild_shift_totals(shifts=None):
+    """Recalcula los totales de los turnos dados (o de todos) con un GROUP BY turno+producto.
+
+    De un turno cerrado, lo vendido después de ``closed_at`` cuenta como ajuste tardío; una venta borrada
+    tras el cierre ya no existe y deja de contar en el corte.
+    """
+    targets = Shift.objects.all() if shifts is None else Shift.objects.filter(pk__in=shifts)
+    ids = list(targets.values_list("pk", flat=True))
+    ShiftProductTotal.objects.filter(shift_id__in=ids).delete()
+    rows, per_shift = {}, {pk: [0, 0, 0.0, 0, 0.0] for pk in ids}
+    late = Case(When(shift__closed_at__isnull=False, created_at__gt=F("shift__closed_at"), then=Value(True)),
+                default=Value(False))
+    for qs in all_sales():
+        for r in (qs.filter(shift_id__in=ids).annotate(late=late).values("shift", "product", "late")
+                  .annotate(n=Count("id"), qty=Sum("quantity"), rev=Sum(SALE_AMOUNT, output_field=FloatField()))):
+            t = per_shift[r["shift"]]
+            if r["late"]:
+                t[3], t[4] = t[3] + r["n"], t[4] + float(r["rev"] or 0.0)
+                continue
+            obj = rows.setdefault((r["shift"], r["product"]), ShiftProductTotal(shift_id=r["shift"], product_id=r["product"]))
+            obj.sales_count += r["n"]
+            obj.quantity += r["qty"] or 0
+            obj.revenue += float(r["rev"] or 0.0)
+            t[0], t[1], t[2] = t[0] + r["n"], t[1] + (r["qty"] or 0), t[2] + float(r["rev"] or 0.0)
+    ShiftProductTotal.objects.bulk_create(rows.values(), batch_size=2000)
+    Shift.objects.bulk_update([Shift(pk=pk, sales_count=n, units=qty, revenue=rev, late_sales=ln, late_revenue=lrev)
+                               for pk, (n, qty, rev, ln, lrev) in per_shift.items()],
+                              ["sales_count", "units", "revenue", "late_sales", "late_revenue"], batch_size=500)
+    return len(ids)
+
+
+# ---------- Categorías: nº de productos, unidades y valor del inventario ----------
+COUNTER_FIELDS = ("product_count", "units_on_hand", "stock_value")
+
+
+@transaction.atomic
+def category_stock_changed(rows, sign):
+    """Mueve unidades y valor de las categorías por un lote de ventas (sign=-1) o entradas (sign=1).
+
+    El valor usa el precio actual del producto (una consulta por lote). Regresa los ids de categoría tocados.
+    """
+    if not rows:
+        return set()
+    products = {p["pk"]: p for p in Product.objects.filter(pk__in={r["product_id"] for r in rows})
+                .values("pk", "category_id", "price")}
+    deltas = {}
+    for r in rows:
+        p = products.get(r["product_id"])
+        if not p or not p["category_id"]:
+            continue
+        d = deltas.setdefault(p["category_id"], [0, 0.0])
+        d[0] += sign * int(r["quantity"])
+        d[1] += sign * int(r["quantity"]) * float(p["price"] or 0.0)
+    for pk, (units, value) in deltas.items():
+        Category.objects.filter(pk=pk).update(units_on_hand=F("units_on_hand") + units, stock_value=F("stock_value") + value)
+    return set(deltas)
+
+
+def category_counts(products=None):
+    """{category_id: (productos, unidades, valor)} con un solo GROUP BY sobre Product."""
+    qs = Product.objects.all() if products is None else products
+    rows = (qs.order_by().values("category")
+            .annotate(n=Count("id"), units=Sum("stock"), value=Sum(F("stock") * F("price"), output_field=FloatField())))
+    return {r["category"]: (r["n"], int(r["units"] or 0), float(r["value"] or 0.0)) for r in rows}
+
+
+@transaction.atomic
+def rebuild_category_counters(categories=None):
+    """Recalcula los contadores de las categorías dadas (o de todas)."""
+    targets = list(Category.objects.all() if categories is None else Category.objects.filter(pk__in=categories))
+    products = None if categories is None else Product.objects.filter(category__in=categories)
+    counts = category_counts(products)
+    for c in targets:
+        c.product_count, c.units_on_hand, c.stock_value = counts.get(c.pk, (0, 0, 0.0))
+    Category.objects.bulk_update(targets, COUNTER_FIELDS, batch_size=500)
+    return len(targets)
+
+
+def verify_category_counters():
+    """Diferencias entre los contadores guardados y lo que dice Product (vacía = todo cuadra)."""
+    counts, problems = category_counts(), []
+    for pk, name, *stored in Category.objects.values_list("pk", "name", *COUNTER_FIELDS):
+        n, units, value = counts.get(pk, (0, 0, 0.0))
+        if stored[0] != n or stored[1] != units or abs(stored[2] - value) > 0.01:
+            problems.append(f"categoría {pk} {name}: guardado {tuple(stored)} != real {(n, units, round(value, 2))}")
+    return problems
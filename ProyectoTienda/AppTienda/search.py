@@ -0,0 +1,54 @@
+"""
+Búsqueda por prefijo para los selectores con autocompletado (typeahead).
+
+Se compara contra ``search_name`` (minúsculas, sin acentos, indexado) con un
+rango ``>= término AND < término + U+10FFFF`` en lugar de LIKE/icontains, así
+la base recorre solo el tramo del índice que empieza con lo tecleado.
+"""
+from django.db.models import Q
+
+from .models import Product, Customer, search_key
+from . import barcodes
+
+MAX_RESULTS = 20
+
+
+def prefix_range(field, term):
+    return {f"{field}__gte": term, f"{field}__lt": term + "\U0010ffff"}
+
+
+def product_item(p):
+    return {"id": p.id, "label": p.name, "sku": p.sku or "", "price": float(p.price), "stock": p.stock}
+
+
+def customer_item(c):
+    return {"id": c.id, "label": str(c) or f"Cliente #{c.id}", "phone": c.phone}
+
+
+def products(term, limit=10):
+    limit = max(1, min(int(limit), MAX_RESULTS))
+    key = search_key(term)
+    if not key:
+        return []
+    fields = ("id", "name", "sku", "price", "stock")
+    found = list(Product.objects.filter(**prefix_range("search_name", key)).order_by("search_name").only(*fields)[:limit])
+    code = barcodes.normalize(term)
+    pid = barcodes.lookup(code) if code else None  # un código escaneado o tecleado completo va primero
+    if pid and all(p.id != pid for p in found):
+        found = list(Product.objects.filter(pk=pid).only(*fields)) + found[:limit - 1]
+    elif len(found) < limit and code:
+        seen = {p.id for p in found}
+        skus = Q(**prefix_range("sku", code)) | Q(**prefix_range("sku", code.upper()))  # SKU tecleado en minúsculas
+        found += [p for p in Product.objects.filter(skus).order_by("sku").only(*fields)[:limit]
+                  if p.id not in seen][:limit - len(found)]
+    return [product_item(p) for p in found]
+
+
+def customers(term, limit=10):
+    limit = max(1, min(int(limit), MAX_RESULTS))
+    key = search_key(term)
+    if not key:
+        return []
+    qs = (Customer.objects.filter(**prefix_range("search_name", key)).order_by("search_name")
+          .only("id", "first_name", "last_name", "phone"))
+    return [customer_item(c) for c in qs[:limit]]
@@ -0,0 +1,183 @@
+"""
+Catálogo compartido entre procesos: id, precio, nombre y SKU de cada producto
+en un archivo binario que cada worker mapea con ``mmap``.
+
+Todos los workers leen las mismas páginas del caché del sistema operativo (una
+sola copia en memoria, sin cargar nada al arrancar) y la búsqueda es una
+bisección sobre el arreglo de ids, sin consulta a la base. La caja lo usa para
+el nombre y el precio que muestra al escanear; lo que se cobra sale de la base
+(``Product.price``), porque entre un cambio de precio y que cada worker vea la
+versión nueva hay una ventana.
+
+Formato (``SHARED_CATALOG_PATH``, orden de bytes de la máquina):
+
+    cabecera   MAGIC, versión, n, bytes de texto, fecha de publicación
+    ids        int64[n]   ordenados
+    precios    float64[n]
+    offsets    uint32[2n + 1]   nombre i = texto[o[2i]:o[2i+1]], sku i = texto[o[2i+1]:o[2i+2]]
+    texto      UTF-8
+
+``publish()`` lo reescribe completo en un temporal y lo cambia con
+``os.replace`` subiendo la versión: un lector nunca ve un archivo a medias y el
+que ya tenía el anterior mapeado lo sigue leyendo hasta soltarlo. Lo llama el
+handler diferido ``handlers.publish_shared_catalog`` tras cada lote que cambia
+nombre, SKU o precio. El stock no va en el archivo: cambia con cada venta y
+reescribirlo en cada cobro costaría recorrer todos los productos; la caja lo lee
+de la fila del producto (``reservations.available``). Cada proceso revisa con
+un ``stat`` a lo más cada ``SHARED_CATALOG_RECHECK_SECONDS`` si hay versión
+nueva. Un producto que todavía no está en el archivo se busca en la base.
+"""
+import bisect
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .models import Product
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin candado entre procesos
+    fcntl = None
+
+FIELDS = frozenset({"name", "sku", "price"})   # campos de Product que guarda el archivo
+MAGIC = b"PTCAT\x00\x02\x00"
+HEADER = struct.Struct("=8sQIId")   # magic, versión, n, bytes de texto, publicado (epoch)
+
+_lock = threading.Lock()
+_snapshot, _stat, _checked = None, None, 0.0
+
+
+def path():
+    return os.fspath(getattr(settings, "SHARED_CATALOG_PATH", settings.BASE_DIR / "catalog.bin"))
+
+
+# ---------- Lectura ----------
+class Snapshot:
+    """Vista de solo lectura sobre el archivo mapeado (memoryview, sin copiar)."""
+
+    def __init__(self, filename):
+        with open(filename, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, n, text_len, self.published_at = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} no es un catálogo compartido")
+        view, offset = memoryview(self._mm), HEADER.size
+
+        def take(size, fmt=None):
+            nonlocal offset
+            part = view[offset:offset + size]
+            offset += size
+            return part.cast(fmt) if fmt else part
+
+        self.ids = take(8 * n, "q")
+        self.prices = take(8 * n, "d")
+        self.offsets = take(4 * (2 * n + 1), "I")
+        self.text = take(text_len)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def index(self, pk):
+        i = bisect.bisect_left(self.ids, pk)
+        return i if i < len(self.ids) and self.ids[i] == pk else None
+
+    def _str(self, j):
+        return bytes(self.text[self.offsets[j]:self.offsets[j + 1]]).decode("utf-8")
+
+    def get(self, pk):
+        """{"id", "name", "sku", "price"} del producto, o None si no está."""
+        i = self.index(pk)
+        if i is None:
+            return None
+        return {"id": pk, "name": self._str(2 * i), "sku": self._str(2 * i + 1) or None,
+                "price": self.prices[i]}
+
+
+def current():
+    """Snapshot vigente en este proceso (vuelve a mapear si otro publicó), o None si aún no hay archivo."""
+    global _snapshot, _stat, _checked
+    now = time.monotonic()
+    if _snapshot is not None and now - _checked < getattr(settings, "SHARED_CATALOG_RECHECK_SECONDS", 0.2):
+        return _snapshot
+    with _lock:
+        _checked = now
+        try:
+            st = os.stat(path())
+        except FileNotFoundError:
+            _snapshot = _stat = None
+            return None
+        ident = (st.st_ino, st.st_mtime_ns, st.st_size)  # os.replace cambia el inodo
+        if ident != _stat:
+            try:
+                _snapshot, _stat = Snapshot(path()), ident
+            except ValueError:  # formato anterior: se busca en la base hasta que se publique de nuevo
+                _snapshot = _stat = None
+        return _snapshot
+
+
+def lookup(pk):
+    snap = current()
+    return snap.get(pk) if snap is not None else None
+
+
+# ---------- Publicación ----------
+@contextmanager
+def _publishing():
+    """Candado entre procesos para que dos publicaciones no usen la misma versión."""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path()}.lock", "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _version_on_disk():
+    try:
+        with open(path(), "rb") as fh:
+            magic, version, *_ = HEADER.unpack(fh.read(HEADER.size))
+        return version if magic == MAGIC else 0
+    except (FileNotFoundError, struct.error):
+        return 0
+
+
+def publish():
+    """Escribe un snapshot nuevo de todos los productos y lo cambia atómicamente; regresa la versión."""
+    os.makedirs(os.path.dirname(path()) or ".", exist_ok=True)
+    # la lectura también va dentro del candado: un proceso con datos más viejos no puede reemplazar al más nuevo
+    with _publishing():
+        ids, prices, offsets, text = array("q"), array("d"), array("I", [0]), bytearray()
+        rows = Product.objects.order_by("pk").values_list("pk", "price", "name", "sku")
+        for pk, p, name, sku in rows.iterator(chunk_size=5000):
+            ids.append(pk)
+            prices.append(float(p))
+            text += name.encode("utf-8")
+            offsets.append(len(text))
+            text += (sku or "").encode("utf-8")
+            offsets.append(len(text))
+        version = _version_on_disk() + 1
+        tmp = f"{path()}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(HEADER.pack(MAGIC, version, len(ids), len(text), time.time()))
+            for part in (ids, prices, offsets):
+                part.tofile(fh)
+            fh.write(text)
+        os.replace(tmp, path())
+    return version
+
+
+def warm():
+    """Publica si todavía no hay archivo (o es de otro formato) y lo mapea en este proceso; regresa cuántos productos tiene."""
+    if not _version_on_disk():
+        publish()
+    snap = current()
+    return len(snap) if snap is not None else 0
@@ -0,0 +1,100 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import Sale, StockEntry, Product, ProductBarcode, User, Category, Customer
+from . import events, warmup
+
+# UPDATE/DELETE masivos no disparan post_save/post_delete; quien mantenga algo
+# derivado de Product se conecta aquí. kwargs: action, ids, fields, categories
+products_bulk_changed = Signal()
+
+
+# ---------- Conexiones (PRAGMA de SQLite, ver warmup.py) ----------
+@receiver(connection_created)
+def tune_connection(sender, connection, **kw):
+    warmup.tune_connection(connection)
+
+
+# ---------- Señales de Django -> eventos de dominio (suscriptores en handlers.py) ----------
+# Aquí no se hace trabajo: solo se copia lo que los handlers necesitan y se emite;
+# el despacho ocurre tras el commit, por lotes (events.py).
+def _sale_payload(sale):
+    return {
+        "id": sale.pk, "store_id": sale.store_id, "product_id": sale.product_id, "customer_id": sale.customer_id,
+        "vendor_id": sale.vendor_id, "shift_id": sale.shift_id,
+        "quantity": int(sale.quantity), "unit_price": float(sale.unit_price),
+        "total_amount": float(sale.total_amount), "created_at": sale.created_at,
+    }
+
+
+def _stock_payload(entry):
+    return {
+        "id": entry.pk, "store_id": entry.store_id, "product_id": entry.product_id, "quantity": int(entry.quantity),
+        "note": entry.note, "created_at": entry.created_at,
+    }
+
+
+@receiver(post_save, sender=Sale)
+def sale_saved(sender, instance, created, **kw):
+    if created:
+        events.emit("sale.created", **_sale_payload(instance))
+
+
+@receiver(post_delete, sender=Sale)
+def sale_deleted(sender, instance, **kw):
+    events.emit("sale.deleted", **_sale_payload(instance))
+
+
+@receiver(post_save, sender=StockEntry)
+def stock_saved(sender, instance, created, **kw):
+    if created:
+        events.emit("stock.entry_created", **_stock_payload(instance))
+
+
+@receiver(post_delete, sender=StockEntry)
+def stock_deleted(sender, instance, **kw):
+    events.emit("stock.entry_deleted", **_stock_payload(instance))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, update_fields=None, **kw):
+    events.emit("product.saved", id=instance.pk, created=created,
+                update_fields=sorted(update_fields) if update_fields is not None else None,
+                category_id=instance.category_id, previous_category_id=getattr(instance, "_loaded_category_id", None),
+                image_url=instance.image_url, image_source=instance.image_source)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kw):
+    events.emit("product.deleted", id=instance.pk, category_id=instance.category_id)
+
+
+@receiver(products_bulk_changed)
+def products_bulk(sender, action, ids=(), fields=None, categories=(), **kw):
+    events.emit("products.bulk_changed", action=action, ids=list(ids), fields=fields, categories=list(categories))
+
+
+@receiver(post_save, sender=ProductBarcode)
+def barcode_saved(sender, instance, **kw):
+    events.emit("barcode.saved", code=instance.code, product_id=instance.product_id)
+
+
+@receiver(post_delete, sender=ProductBarcode)
+def barcode_deleted(sender, instance, **kw):
+    events.emit("barcode.deleted", code=instance.code, product_id=instance.product_id)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kw):
+    events.emit("category.changed", id=instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Customer)
+def customer_changed(sender, instance, **kw):
+    events.emit("customer.changed", id=instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kw):
+    events.emit("user.saved", id=instance.pk, image_url=instance.image_url, image_source=instance.image_source)
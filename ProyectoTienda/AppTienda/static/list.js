@@ -0,0 +1,75 @@
+// Búsqueda en vivo y paginación de modules/list.html sin recargar la página:
+// se pide solo el fragmento de la tabla (cabecera HX-Request) y se reemplaza.
+(function () {
+  const box = document.getElementById("listTable");
+  const filter = document.getElementById("listFilter");
+  if (!box || !filter) return;
+
+  const DEBOUNCE_MS = 300;
+  let timer = null;
+  let inflight = null;
+
+  function syncBulk() {
+    const card = box.querySelector("[data-total]");
+    document.querySelectorAll("[data-list-total]").forEach(el => {
+      el.textContent = card ? card.dataset.total : "0";
+    });
+    const q = filter.querySelector('[name="q"]');
+    const bulkQ = document.querySelector('#bulkForm [name="q"]');
+    if (q && bulkQ) bulkQ.value = q.value;
+  }
+
+  function load(url) {
+    if (inflight) inflight.abort();
+    inflight = new AbortController();
+    box.setAttribute("aria-busy", "true");
+    fetch(url, { headers: { "HX-Request": "true" }, signal: inflight.signal, credentials: "same-origin" })
+      .then(r => {
+        if (!r.ok || r.redirected) throw new Error(r.status);
+        return r.text();
+      })
+      .then(html => {
+        box.innerHTML = html;
+        history.replaceState(null, "", url);
+        syncBulk();
+      })
+      .catch(err => {
+        if (err.name !== "AbortError") window.location.assign(url);  // sesión vencida, error: página completa
+      })
+      .finally(() => box.removeAttribute("aria-busy"));
+  }
+
+  function filterUrl() {
+    const params = new URLSearchParams(new FormData(filter));
+    for (const [k, v] of [...params]) if (!v) params.delete(k);
+    const qs = params.toString();
+    return box.dataset.listUrl + (qs ? "?" + qs : "");
+  }
+
+  filter.addEventListener("input", e => {
+    if (e.target.name !== "q") return;
+    clearTimeout(timer);
+    timer = setTimeout(() => load(filterUrl()), DEBOUNCE_MS);
+  });
+  filter.addEventListener("change", e => {
+    if (e.target.tagName === "SELECT") load(filterUrl());
+  });
+  filter.addEventListener("submit", e => {
+    e.preventDefault();
+    clearTimeout(timer);
+    load(filterUrl());
+  });
+
+  box.addEventListener("click", e => {
+    const a = e.target.closest("a.page-link");
+    if (!a || e.ctrlKey || e.metaKey || e.shiftKey) return;
+    e.preventDefault();
+    load(a.href);
+  });
+
+  // "Seleccionar todos" de las acciones masivas (la tabla se reemplaza, por eso va delegado)
+  box.addEventListener("change", e => {
+    if (e.target.id !== "bulkAll") return;
+    box.querySelectorAll('input[name="ids"][form="bulkForm"]').forEach(cb => { cb.checked = e.target.checked; });
+  });
+})();
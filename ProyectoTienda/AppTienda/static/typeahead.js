@@ -0,0 +1,98 @@
+// Selectores con autocompletado (widgets.TypeaheadSelect): el id va en el input
+// oculto; el texto visible busca en el servidor y muestra los primeros N.
+// Eventos: "typeahead:select" (detail = item o null) al elegir; para fijar un
+// item desde fuera, despachar "typeahead:set" sobre el contenedor.
+(function () {
+  const DEBOUNCE_MS = 150;
+
+  function meta(item) {
+    const parts = [];
+    if (item.sku) parts.push(item.sku);
+    if (item.price !== undefined) parts.push("$" + Number(item.price).toFixed(2));
+    if (item.stock !== undefined) parts.push("stock " + item.stock);
+    if (item.phone) parts.push(item.phone);
+    return parts.join(" · ");
+  }
+
+  function setup(box) {
+    const hidden = box.querySelector('input[type="hidden"]');
+    const input = box.querySelector(".typeahead-input");
+    const menu = box.querySelector(".typeahead-menu");
+    const initial = box.querySelector('script[type="application/json"]');
+    let items = [], active = -1, timer = null, ctrl = null;
+    box.typeaheadItem = initial ? JSON.parse(initial.textContent) : null;
+
+    function close() {
+      menu.classList.remove("show");
+      input.setAttribute("aria-expanded", "false");
+      active = -1;
+    }
+
+    function render() {
+      menu.replaceChildren(...items.map((it, i) => {
+        const b = document.createElement("button");
+        b.type = "button";
+        b.className = "dropdown-item d-flex justify-content-between gap-3" + (i === active ? " active" : "");
+        b.setAttribute("role", "option");
+        const name = document.createElement("span");
+        name.textContent = it.label;
+        const small = document.createElement("small");
+        small.className = "text-muted";
+        small.textContent = meta(it);
+        b.append(name, small);
+        b.addEventListener("mousedown", e => { e.preventDefault(); choose(it); });
+        return b;
+      }));
+      if (!items.length) {
+        const empty = document.createElement("span");
+        empty.className = "dropdown-item-text text-muted";
+        empty.textContent = "Sin resultados";
+        menu.append(empty);
+      }
+      menu.classList.add("show");
+      input.setAttribute("aria-expanded", "true");
+    }
+
+    function choose(item) {
+      box.typeaheadItem = item;
+      hidden.value = item ? item.id : "";
+      input.value = item ? item.label : "";
+      close();
+      hidden.dispatchEvent(new Event("change", { bubbles: true }));
+      box.dispatchEvent(new CustomEvent("typeahead:select", { detail: item, bubbles: true }));
+    }
+
+    function search() {
+      const q = input.value.trim();
+      if (!q) { items = []; close(); return; }
+      if (ctrl) ctrl.abort();
+      ctrl = new AbortController();
+      fetch(box.dataset.url + "?limit=10&q=" + encodeURIComponent(q), { signal: ctrl.signal, credentials: "same-origin" })
+        .then(r => r.ok ? r.json() : { results: [] })
+        .then(data => { items = data.results || []; active = items.length ? 0 : -1; render(); })
+        .catch(() => {});
+    }
+
+    input.addEventListener("input", () => {
+      if (box.typeaheadItem) { box.typeaheadItem = null; hidden.value = ""; box.dispatchEvent(new CustomEvent("typeahead:select", { detail: null, bubbles: true })); }
+      clearTimeout(timer);
+      timer = setTimeout(search, DEBOUNCE_MS);
+    });
+    input.addEventListener("keydown", e => {
+      if (e.key === "ArrowDown" || e.key === "ArrowUp") {
+        if (!items.length) return;
+        e.preventDefault();
+        active = (active + (e.key === "ArrowDown" ? 1 : items.length - 1)) % items.length;
+        render();
+      } else if (e.key === "Enter") {
+        if (menu.classList.contains("show") && items[active]) { e.preventDefault(); choose(items[active]); }
+      } else if (e.key === "Escape") {
+        close();
+      }
+    });
+    input.addEventListener("blur", () => setTimeout(close, 100));
+    box.addEventListener("typeahead:set", e => choose(e.detail));
+  }
+
+  document.querySelectorAll(".typeahead").forEach(setup);
+})();
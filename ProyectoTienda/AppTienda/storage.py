@@ -0,0 +1,50 @@
+"""
+Storage de archivos estáticos: nombres con hash (ManifestStaticFilesStorage)
+más copias precomprimidas ``.gz`` y ``.br`` generadas en ``collectstatic``,
+para que ``views_static.serve`` solo tenga que elegir cuál enviar.
+"""
+import gzip
+import os
+
+import brotli
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+COMPRESSIBLE = (".css", ".js", ".mjs", ".svg", ".json", ".txt", ".html", ".xml", ".ttf", ".eot", ".ico")
+MIN_SIZE = 256  # bytes; abajo de esto no vale la pena
+
+
+def compress_file(path):
+    """Escribe path.gz y path.br si reducen al menos 5%. Regresa las rutas escritas."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if len(data) < MIN_SIZE:
+        return []
+    written = []
+    for ext, blob in ((".gz", lambda: gzip.compress(data, compresslevel=9, mtime=0)),
+                      (".br", lambda: brotli.compress(data, quality=11))):
+        out = blob()
+        if len(out) < len(data) * 0.95:
+            with open(path + ext, "wb") as fh:
+                fh.write(out)
+            written.append(path + ext)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # sin manifiesto (antes de collectstatic, en pruebas) se usa el nombre sin hash en lugar de fallar el render
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:  # tampoco está en STATIC_ROOT: no se puede calcular su hash
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                compress_file(self.path(name))
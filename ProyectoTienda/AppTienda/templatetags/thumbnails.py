@@ -0,0 +1,11 @@
+from django import template
+
+from AppTienda import thumbnails
+
+register = template.Library()
+
+
+@register.filter
+def thumb(obj, size="icon"):
+    """URL de la miniatura de un producto/usuario: {{ product|thumb:"icon" }}"""
+    return thumbnails.url_for(obj, size)
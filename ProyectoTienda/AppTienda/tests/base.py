@@ -0,0 +1,47 @@
+"""
+Base de las pruebas de AppTienda.
+
+Los handlers diferidos corren en el hilo que confirma (EVENTS_DEFERRED=False)
+para que cada prueba vea su efecto sin esperar al hilo de fondo, y todo lo que
+escribe archivos (bitácora, catálogos, exportaciones) va a una carpeta temporal.
+"""
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from AppTienda import journal
+from AppTienda.models import Product, StockEntry, StoreManager
+
+
+class StoreTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.mkdtemp(prefix="apptienda-tests-")
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        self.enterContext(override_settings(
+            EVENTS_DEFERRED=False, CATALOG_SITE_ROOT=None, SHARED_CATALOG_PATH=os.path.join(tmp, "catalog.bin"),
+            JOURNAL_DIR=os.path.join(tmp, "journal"), JOBS_OUTPUT_DIR=os.path.join(tmp, "exports"),
+        ))
+        self.enterContext(mock.patch.object(journal.writer, "directory", os.path.join(tmp, "journal")))
+        self.addCleanup(journal.writer.flush)  # antes de restaurar la carpeta y borrarla
+        StoreManager._current = None  # la sucursal cacheada es de otra prueba (su transacción ya se revirtió)
+
+    def committed(self):
+        """
+        Como si el bloque confirmara: despacha los eventos que emitió. La prueba
+        nunca confirma, así que un lote abierto fuera de este bloque se queda sin
+        despachar y absorbe los eventos de los siguientes.
+        """
+        return self.captureOnCommitCallbacks(execute=True)
+
+    def product(self, stock=0, price=10.0, **kw):
+        """Producto con ``stock`` unidades dadas de alta como entrada de inventario."""
+        with self.committed():
+            p = Product.objects.create(name=kw.pop("name", "Producto"), price=price, **kw)
+            if stock:
+                StockEntry.objects.create(product=p, quantity=stock)
+        p.refresh_from_db()
+        return p
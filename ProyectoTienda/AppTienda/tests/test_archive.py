@@ -0,0 +1,60 @@
+from unittest import mock
+
+from django.db.models import F
+
+from AppTienda import archive
+from AppTienda.models import ArchivedSale, Customer, ProductSalesRollup, Sale
+
+from .base import StoreTestCase
+
+
+class ArchiveTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.before = archive.cutoff(days=-1)  # mañana: todas las ventas de la prueba quedan antes del corte
+        with self.committed():
+            self.customer = Customer.objects.create(first_name="Ana")
+        self.p = self.product(stock=10, price=12.5)
+
+    def sell(self, n, customer=True):
+        with self.committed():
+            for _ in range(n):
+                Sale(product=self.p, quantity=2, unit_price=self.p.price, customer=self.customer if customer else None).save()
+
+    def test_batches_move_everything_and_keep_the_aggregates(self):
+        self.sell(3)
+        self.assertEqual(archive.verify(self.before), [])
+
+        self.assertEqual(archive.move_batch(self.before, batch_size=2), 2)
+        self.assertEqual(archive.move_batch(self.before, batch_size=2), 1)
+        self.assertEqual(archive.move_batch(self.before, batch_size=2), 0)
+
+        self.assertFalse(Sale.objects.exists())
+        self.assertEqual(ArchivedSale.objects.count(), 3)
+        self.customer.refresh_from_db()
+        self.assertEqual((self.customer.order_count, self.customer.lifetime_value), (3, 75.0))
+        self.assertEqual(ProductSalesRollup.objects.get(period="d").revenue, 75.0)
+        self.assertEqual(archive.verify(self.before), [])
+
+    def test_verify_reports_a_revenue_mismatch(self):
+        self.sell(2, customer=False)
+        ProductSalesRollup.objects.filter(period="d").update(revenue=F("revenue") + 5)  # mismas ventas y unidades
+        problems = archive.verify(self.before)
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith(f"rollup producto {self.p.pk}"))
+
+    def test_verify_reports_a_customer_lifetime_value_mismatch(self):
+        self.sell(2)
+        Customer.objects.filter(pk=self.customer.pk).update(lifetime_value=1.0)
+        problems = archive.verify(self.before)
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith(f"cliente {self.customer.pk}"))
+
+    def test_mismatched_batch_rolls_back(self):
+        self.sell(2)
+        totals = [{"n": 2, "qty": 4, "rev": 50.0}, {"n": 1, "qty": 2, "rev": 25.0}]  # se "perdió" una venta
+        with mock.patch.object(archive, "_batch_totals", side_effect=totals), self.assertRaises(ValueError):
+            archive.move_batch(self.before)
+
+        self.assertEqual(Sale.objects.count(), 2)
+        self.assertFalse(ArchivedSale.objects.exists())
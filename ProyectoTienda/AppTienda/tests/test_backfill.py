@@ -0,0 +1,65 @@
+from AppTienda import backfill
+from AppTienda.models import BackfillCheckpoint, Sale
+
+from .base import StoreTestCase
+
+NAME = "sale_total_amount"
+
+
+class BackfillTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        p = self.product(stock=20, price=2.5)
+        for qty in (1, 2, 3, 4, 5):
+            Sale(product=p, quantity=qty, unit_price=p.price).save()
+        Sale.objects.update(total_amount=0)  # como antes de la migración 0008
+        self.pks = sorted(Sale.objects.values_list("pk", flat=True))
+
+    def run_all(self, cp, **kw):
+        return backfill.run_partition(cp, sleep=0, sleep_ratio=0, **kw)
+
+    def test_chunks_cover_the_whole_range(self):
+        [cp] = backfill.checkpoints(NAME)
+        self.assertEqual((cp.range_start, cp.range_end), (self.pks[0] - 1, self.pks[-1]))
+
+        cp = self.run_all(cp, chunk_size=2)
+        self.assertEqual((cp.done, cp.chunks, cp.rows_updated), (True, 3, 5))
+        self.assertEqual(backfill.pending(NAME), 0)
+        self.assertEqual(sorted(Sale.objects.values_list("total_amount", flat=True)), [2.5, 5.0, 7.5, 10.0, 12.5])
+
+    def test_interrupted_run_resumes_from_the_checkpoint(self):
+        [cp] = backfill.checkpoints(NAME)
+
+        def stop(cp):
+            raise KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            self.run_all(cp, chunk_size=2, progress=stop)
+
+        [cp] = backfill.checkpoints(NAME)  # el mismo checkpoint, ya avanzado
+        self.assertEqual((cp.last_pk, cp.chunks, cp.rows_updated, cp.done), (self.pks[1], 1, 2, False))
+        self.assertEqual(backfill.pending(NAME), 3)
+
+        cp = self.run_all(cp, chunk_size=2)
+        cp.refresh_from_db()
+        self.assertEqual((cp.done, cp.chunks, cp.rows_updated), (True, 3, 5))
+        self.assertEqual(backfill.pending(NAME), 0)
+
+    def test_rerun_changes_nothing(self):
+        [cp] = backfill.checkpoints(NAME)
+        self.run_all(cp, chunk_size=10)
+        [cp] = backfill.checkpoints(NAME, restart=True)
+        self.assertEqual(self.run_all(cp, chunk_size=10).rows_updated, 0)
+
+    def test_partitions_split_the_range_contiguously(self):
+        cps = backfill.checkpoints(NAME, partitions=2)
+        self.assertEqual(cps[0].range_start, self.pks[0] - 1)
+        self.assertEqual(cps[0].range_end, cps[1].range_start)
+        self.assertEqual(cps[1].range_end, self.pks[-1])
+
+        self.assertEqual(sum(self.run_all(cp, chunk_size=1).rows_updated for cp in cps), 5)
+        self.assertEqual(BackfillCheckpoint.objects.filter(name=NAME, partitions=2, done=True).count(), 2)
+
+    def test_chunk_size_below_one_is_rejected(self):
+        [cp] = backfill.checkpoints(NAME)
+        with self.assertRaises(ValueError):
+            self.run_all(cp, chunk_size=0)
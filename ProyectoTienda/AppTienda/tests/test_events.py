@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from AppTienda import events
+from AppTienda.models import OutboxEvent
+
+from .base import StoreTestCase
+
+
+class EventTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = {"now": [], "later": []}
+        self.subscribe("now", deferred=False)
+        self.subscribe("later", deferred=True)
+
+    def subscribe(self, key, deferred, names=("test.ping",)):
+        def record(batch):
+            self.calls[key].append([(e.name, e.data) for e in batch])
+        events.handler(*names, deferred=deferred)(record)
+        self.addCleanup(events._handlers.remove, (frozenset(names), record, deferred))
+
+    def test_one_call_per_committed_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                events.emit("test.ping", n=1)
+                events.emit("test.ping", n=2)
+                events.emit("test.other", n=3)
+            self.assertEqual(self.calls, {"now": [], "later": []})  # nada antes del commit
+
+        expected = [[("test.ping", {"n": 1}), ("test.ping", {"n": 2})]]
+        self.assertEqual(self.calls, {"now": expected, "later": expected})
+        self.assertFalse(OutboxEvent.objects.exists())  # entregado: el outbox queda vacío
+
+    def test_rollback_drops_the_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                events.emit("test.ping", n=1)
+                raise RuntimeError
+
+        self.assertEqual(self.calls, {"now": [], "later": []})
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_nested_blocks_share_the_outer_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                events.emit("test.ping", n=1)
+                with transaction.atomic():
+                    events.emit("test.ping", n=2)
+                events.emit("test.ping", n=3)
+
+        expected = [[("test.ping", {"n": 1}), ("test.ping", {"n": 2}), ("test.ping", {"n": 3})]]
+        self.assertEqual(self.calls, {"now": expected, "later": expected})
+
+    def test_rolled_back_savepoint_is_not_delivered_to_deferred_handlers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                events.emit("test.ping", n=1)
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    events.emit("test.ping", n=2)
+                    raise RuntimeError
+
+        # los inmediatos lo reciben (limitación documentada en events.py); su fila del outbox se revirtió
+        self.assertEqual(self.calls["now"], [[("test.ping", {"n": 1}), ("test.ping", {"n": 2})]])
+        self.assertEqual(self.calls["later"], [[("test.ping", {"n": 1})]])
+
+    def test_batch_opened_in_a_rolled_back_savepoint_is_replaced(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    events.emit("test.ping", n=1)
+                    raise RuntimeError
+                events.emit("test.ping", n=2)
+
+        self.assertEqual(self.calls["now"], [[("test.ping", {"n": 2})]])
+        self.assertEqual(self.calls["later"], [[("test.ping", {"n": 2})]])
+
+    def test_failing_handler_does_not_stop_the_others(self):
+        def boom(batch):
+            raise ValueError("falla a propósito")
+        events.handler("test.ping")(boom)
+        self.addCleanup(events._handlers.remove, (frozenset({"test.ping"}), boom, False))
+
+        with self.assertLogs("AppTienda.events", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+            events.emit("test.ping", n=1)
+
+        self.assertEqual(len(self.calls["now"]), 1)
+        self.assertEqual(len(self.calls["later"]), 1)
+
+
+class OutboxTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.delivered = []
+
+        def record(batch):
+            self.delivered.extend(batch)
+        events.handler("test.ping", deferred=True)(record)
+        self.addCleanup(events._handlers.remove, (frozenset({"test.ping"}), record, True))
+
+    def orphan(self, owner="otro-host:1", expired=True, **data):
+        """Fila que dejó un proceso que murió antes de entregarla (o que sigue vivo, con ``expired=False``)."""
+        delta = timedelta(seconds=-1 if expired else 300)
+        return OutboxEvent.objects.create(name="test.ping", data=data, owner=owner, lease_until=timezone.now() + delta)
+
+    def test_emit_persists_only_events_with_deferred_handlers(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            events.emit("test.ping", n=1)
+            events.emit("test.nobody", n=2)
+        self.assertEqual(list(OutboxEvent.objects.values_list("name", "data")), [("test.ping", {"n": 1})])
+
+    def test_replay_delivers_expired_rows_once(self):
+        at = timezone.now().replace(microsecond=0)
+        self.orphan(n=1, created_at=at)
+        self.orphan(n=2, created_at=at)
+
+        with self.assertLogs("AppTienda.events", "WARNING"):
+            self.assertEqual(events.replay(), 2)
+        self.assertEqual(events.replay(), 0)
+        self.assertEqual([e.data["n"] for e in self.delivered], [1, 2])
+        self.assertEqual(self.delivered[0].data["created_at"], at)  # las fechas regresan como datetime
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_replay_skips_rows_whose_owner_is_still_delivering(self):
+        self.orphan(expired=False, n=1)
+        self.assertEqual(events.replay(), 0)
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    def test_deliver_skips_rows_claimed_by_a_replay(self):
+        row = self.orphan(owner=events._owner(), n=1)
+        OutboxEvent.objects.filter(pk=row.pk).update(owner="otro-host:1:replay")
+
+        events.deliver([events.Event("test.ping", {"n": 1}, timezone.now(), row.pk)])
+        self.assertEqual(self.delivered, [])
+        self.assertTrue(OutboxEvent.objects.filter(pk=row.pk).exists())
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from AppTienda import jobs
+from AppTienda.models import Job
+
+from .base import StoreTestCase
+
+
+@override_settings(JOBS_STALE_SECONDS=600)
+class HeartbeatTests(StoreTestCase):
+    def running(self, worker, minutes_ago=15):
+        at = timezone.now() - timedelta(minutes=minutes_ago)
+        return Job.objects.create(kind="export_sales", status="running", worker=worker, started_at=at, heartbeat_at=at)
+
+    def test_heartbeat_keeps_a_silent_job_from_being_recovered(self):
+        mine, lost = self.running("a:1"), self.running("b:2")
+        self.assertEqual(jobs.heartbeat("a:1", [mine.pk]), 1)
+
+        self.assertEqual(jobs.recover_stale(), 1)
+        mine.refresh_from_db(), lost.refresh_from_db()
+        self.assertEqual((mine.status, mine.worker), ("running", "a:1"))
+        self.assertEqual((lost.status, lost.worker), ("pending", ""))
+
+    def test_heartbeat_ignores_jobs_taken_over_by_another_worker(self):
+        job = self.running("b:2")
+        self.assertEqual(jobs.heartbeat("a:1", [job.pk]), 0)
+        self.assertEqual(jobs.heartbeat("a:1", []), 0)
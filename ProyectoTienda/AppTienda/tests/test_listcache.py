@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from AppTienda import listcache
+from AppTienda.models import Category, Product, Sale
+
+from .base import StoreTestCase
+
+
+class ListCacheTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        with self.committed():
+            self.client.force_login(get_user_model().objects.create_user(email="admin@empresa.com", password="x", role="admin"))
+            self.category = Category.objects.create(name="Bebidas")
+        self.p = self.product(stock=8, name="Agua", category=self.category)
+
+    def table(self, name="products"):
+        return self.client.get(reverse(f"{name}_list"), HTTP_HX_REQUEST="true").content.decode()
+
+    def generations(self, name="products"):
+        return listcache.generations(listcache.LISTS[name])
+
+    def test_sale_keeps_the_cached_table_and_shows_the_new_stock(self):
+        self.assertIn("<td class=\"text-nowrap\">8</td>", self.table())
+        before = self.generations()
+
+        with self.committed():
+            Sale(product=self.p, quantity=3, unit_price=self.p.price).save()
+
+        self.assertEqual(self.generations(), before)
+        html = self.table()
+        self.assertIn("<td class=\"text-nowrap\">5</td>", html)
+        self.assertNotIn("<!--live:", html)
+        self.assertEqual(cache.get("listcache:stats:products:hits"), 1)
+
+    def test_product_edit_invalidates_the_list(self):
+        self.table()
+        with self.committed():
+            self.p.name = "Agua mineral"
+            self.p.save()
+        self.assertIn("Agua mineral", self.table())
+
+    def test_category_rename_invalidates_products_but_counters_do_not(self):
+        self.table()
+        products, categories = self.generations(), self.generations("categories")
+        with self.committed():
+            Sale(product=self.p, quantity=1, unit_price=self.p.price).save()  # recalcula contadores de categoría
+        self.assertEqual(self.generations(), products)
+        self.assertNotEqual(self.generations("categories"), categories)
+
+        with self.committed():
+            self.category.name = "Refrescos"
+            self.category.save()
+        self.assertIn("Refrescos", self.table())
+
+    @override_settings(LIST_CACHE_SECONDS=0)
+    def test_live_cells_are_filled_without_the_cache(self):
+        html = self.table()
+        self.assertIn("<td class=\"text-nowrap\">8</td>", html)
+        self.assertNotIn("<!--live:", html)
+
+    def test_a_name_cannot_forge_a_live_cell(self):
+        with self.committed():
+            Product.objects.filter(pk=self.p.pk).update(name=f"<!--live:stock:{self.p.pk}-->")
+            listcache.touch("product")
+        self.assertIn("&lt;!--live:stock:", self.table())
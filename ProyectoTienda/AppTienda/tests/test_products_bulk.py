@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from AppTienda import events, reservations
+from AppTienda.models import (Category, Product, ProductBarcode, ProductSalesRollup, Sale, StockEntry,
+                              StockReservation, StoreSalesRollup)
+
+from .base import StoreTestCase
+
+
+class ProductsBulkTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.committed():
+            self.client.force_login(get_user_model().objects.create_user(email="admin@empresa.com", password="x", role="admin"))
+        self.bulk = []
+
+        def record(batch):
+            self.bulk.extend(e.data for e in batch)
+        events.handler("products.bulk_changed", "product.deleted")(record)
+        self.addCleanup(events._handlers.remove, (frozenset({"products.bulk_changed", "product.deleted"}), record, False))
+
+    def post(self, products, **data):
+        with self.committed():
+            return self.client.post(reverse("products_bulk"), {"ids": [p.pk for p in products], **data})
+
+    def test_reprice_by_percentage(self):
+        a, b = self.product(price=10.0), self.product(price=3.33)
+        self.post([a, b], action="reprice", mode="pct", value="10")
+
+        self.assertEqual(sorted(Product.objects.values_list("price", flat=True)), [3.66, 11.0])
+        self.assertEqual([(d["action"], d["fields"]) for d in self.bulk], [("reprice", ["price"])])
+
+    def test_recategorize_reports_both_categories(self):
+        with self.committed():
+            old, new = Category.objects.create(name="Vieja"), Category.objects.create(name="Nueva")
+        p = self.product(category=old)
+        self.post([p], action="recategorize", category=new.pk)
+
+        p.refresh_from_db()
+        self.assertEqual(p.category, new)
+        self.assertEqual(sorted(self.bulk[0]["categories"]), sorted([old.pk, new.pk]))
+
+    def test_delete_skips_products_with_sales_and_sends_one_event(self):
+        sold, a, b = self.product(stock=5), self.product(stock=2), self.product()
+        with self.committed():
+            Sale(product=sold, quantity=1, unit_price=sold.price).save()
+        self.post([sold, a, b], action="delete")
+
+        self.assertEqual(list(Product.objects.values_list("pk", flat=True)), [sold.pk])
+        self.assertEqual(len(self.bulk), 1)  # ni un product.deleted por fila
+        self.assertEqual((self.bulk[0]["action"], sorted(self.bulk[0]["ids"])), ("delete", sorted([a.pk, b.pk])))
+
+    def test_delete_removes_dependent_rows_and_the_store_stock_in(self):
+        keep, doomed = self.product(stock=4), self.product(stock=6)
+        with self.committed():
+            ProductBarcode.objects.create(product=doomed, code="750000000001")
+        reservations.reserve("a", doomed.pk, 2)
+        ProductSalesRollup.objects.create(product=doomed, period="d", start=StoreSalesRollup.objects.get().day)
+        self.assertEqual(StoreSalesRollup.objects.get().stock_in, 10)
+
+        self.post([doomed], action="delete")
+
+        for model in (ProductBarcode, StockEntry, ProductSalesRollup, StockReservation):
+            self.assertFalse(model.objects.filter(product_id=doomed.pk).exists(), model.__name__)
+        self.assertTrue(StockEntry.objects.filter(product=keep).exists())
+        self.assertEqual(StoreSalesRollup.objects.get().stock_in, 4)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from AppTienda import rankings
+from AppTienda.models import Category, Product, ProductRanking, RankingBuild, Sale
+
+from .base import StoreTestCase
+
+
+class RankingTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.committed():
+            self.food, self.toys = Category.objects.create(name="Comida"), Category.objects.create(name="Juguetes")
+
+    def sell(self, product, quantity):
+        with self.committed():
+            sale = Sale(product=product, quantity=quantity, unit_price=product.price)
+            sale.save()
+        return sale
+
+    def names(self, **kw):
+        return [(r["name"], r["qty"]) for r in rankings.top_products(**kw)]
+
+    def test_top_is_kept_per_metric_and_category(self):
+        a = self.product(stock=20, price=1.0, name="A", category=self.food)
+        b = self.product(stock=20, price=50.0, name="B", category=self.toys)
+        c = self.product(stock=20, price=2.0, name="C", category=self.food)
+        self.sell(a, 5)
+        self.sell(b, 1)
+        self.sell(c, 3)
+        self.sell(c, 4)
+
+        self.assertEqual(self.names(window="today"), [("C", 7), ("A", 5), ("B", 1)])
+        self.assertEqual(self.names(window="7d", metric="revenue"), [("B", 1), ("C", 7), ("A", 5)])
+        self.assertEqual(self.names(window="30d", category=self.food.pk, k=1), [("C", 7)])
+        self.assertEqual(ProductRanking.objects.filter(window="today", metric="qty", scope=0).count(), 3)
+
+    @override_settings(RANKINGS_DEPTH=2)
+    def test_a_product_that_passes_the_last_one_takes_its_place(self):
+        a, b, c = (self.product(stock=20, name=n) for n in "ABC")
+        self.sell(a, 5)
+        self.sell(b, 3)
+        self.sell(c, 2)
+        self.assertEqual(self.names(window="today", k=10), [("A", 5), ("B", 3)])
+
+        self.sell(c, 2)
+        self.assertEqual(self.names(window="today", k=10), [("A", 5), ("C", 4)])
+        self.assertEqual(ProductRanking.objects.filter(window="today", metric="qty", scope=0).count(), 2)
+
+    def test_a_new_day_rebuilds_the_window(self):
+        a = self.product(stock=20, name="A")
+        self.sell(a, 2)
+        RankingBuild.objects.update(as_of=timezone.localdate() - timedelta(days=1))
+        ProductRanking.objects.all().delete()
+
+        self.assertEqual(self.names(window="today"), [("A", 2)])
+        self.assertEqual(RankingBuild.objects.get(window="today").as_of, timezone.localdate())
+
+    def test_deleted_sale_leaves_the_top(self):
+        a, b = self.product(stock=20, name="A"), self.product(stock=20, name="B")
+        sale = self.sell(a, 5)
+        self.sell(b, 1)
+
+        with self.committed():
+            sale.delete()
+        self.assertEqual(self.names(window="today"), [("B", 1)])
+
+    def test_moved_product_changes_category_top(self):
+        a = self.product(stock=20, name="A", category=self.food)
+        self.sell(a, 3)
+
+        with self.committed():
+            moved = Product.objects.get(pk=a.pk)
+            moved.category = self.toys
+            moved.save()
+        self.assertEqual(self.names(window="today", category=self.food.pk), [])
+        self.assertEqual(self.names(window="today", category=self.toys.pk), [("A", 3)])
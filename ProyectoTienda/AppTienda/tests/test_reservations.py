@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from AppTienda import reservations
+from AppTienda.models import Product, Sale, StockEntry, StockReservation
+
+from .base import StoreTestCase
+
+
+class ReservationTests(StoreTestCase):
+    def expire(self, cart):
+        StockReservation.objects.filter(cart=cart).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    def assertCounters(self, product, stock, reserved):
+        product.refresh_from_db()
+        self.assertEqual((product.stock, product.reserved), (stock, reserved))
+
+    def test_reserve_then_sell_consumes_the_hold(self):
+        p = self.product(stock=5)
+        self.assertEqual(reservations.reserve("a", p.pk, 3), (True, 2))
+        self.assertEqual(reservations.reserve("b", p.pk, 3), (False, 2))
+
+        sale = Sale(product=p, quantity=3, unit_price=p.price)
+        sale.cart = "a"
+        sale.save()
+
+        self.assertCounters(p, stock=2, reserved=0)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_reserve_sets_the_cart_total_not_an_increment(self):
+        p = self.product(stock=5)
+        reservations.reserve("a", p.pk, 2)
+        reservations.reserve("a", p.pk, 4)
+        self.assertCounters(p, stock=5, reserved=4)
+        self.assertEqual(reservations.reserve("a", p.pk, 0), (True, 5))
+        self.assertCounters(p, stock=5, reserved=0)
+
+    def test_sale_cannot_take_units_held_by_another_cart(self):
+        p = self.product(stock=5)
+        reservations.reserve("b", p.pk, 4)
+
+        with self.assertRaises(ValueError):
+            Sale(product=p, quantity=2, unit_price=p.price).save()
+
+        self.assertCounters(p, stock=5, reserved=4)
+        self.assertFalse(Sale.objects.exists())
+
+    def test_insufficient_stock_rolls_back_and_keeps_the_cart_hold(self):
+        p = self.product(stock=3)
+        reservations.reserve("a", p.pk, 2)
+
+        sale = Sale(product=p, quantity=5, unit_price=p.price)
+        sale.cart = "a"
+        with self.assertRaises(ValueError):
+            sale.save()
+
+        self.assertCounters(p, stock=3, reserved=2)
+        self.assertEqual(StockReservation.objects.get(cart="a").quantity, 2)
+        self.assertFalse(Sale.objects.exists())
+
+    def test_expired_reservations_are_swept(self):
+        p = self.product(stock=3)
+        reservations.reserve("a", p.pk, 3)
+        reservations.reserve("b", p.pk, 0)
+        self.expire("a")
+
+        self.assertEqual(reservations.sweep(), 1)
+        self.assertCounters(p, stock=3, reserved=0)
+        self.assertEqual(reservations.available(p.pk), 3)
+
+    def test_sweep_leaves_live_reservations(self):
+        p = self.product(stock=5)
+        reservations.reserve("a", p.pk, 2)
+        reservations.reserve("b", p.pk, 1)
+        self.expire("a")
+
+        self.assertEqual(reservations.sweep(batch_size=1), 1)
+        self.assertCounters(p, stock=5, reserved=1)
+        self.assertEqual(list(StockReservation.objects.values_list("cart", flat=True)), ["b"])
+
+    def test_expired_hold_not_yet_swept_does_not_block_a_reserve(self):
+        p = self.product(stock=3)
+        reservations.reserve("a", p.pk, 3)
+        self.expire("a")
+
+        self.assertEqual(reservations.reserve("b", p.pk, 2), (True, 1))
+        self.assertCounters(p, stock=3, reserved=2)
+
+    def test_expired_hold_not_yet_swept_does_not_block_a_sale(self):
+        p = self.product(stock=3)
+        reservations.reserve("a", p.pk, 3)
+        self.expire("a")
+
+        Sale(product=p, quantity=3, unit_price=p.price).save()
+        self.assertCounters(p, stock=0, reserved=0)
+
+    def test_release_frees_the_cart(self):
+        p = self.product(stock=4)
+        reservations.reserve("a", p.pk, 3)
+        self.assertEqual(reservations.release("a"), 3)
+        self.assertCounters(p, stock=4, reserved=0)
+
+    def test_rebuild_reserved_matches_live_reservations(self):
+        p = self.product(stock=6)
+        reservations.reserve("a", p.pk, 2)
+        reservations.reserve("b", p.pk, 3)
+        Product.objects.filter(pk=p.pk).update(reserved=0)
+
+        reservations.rebuild_reserved()
+        self.assertCounters(p, stock=6, reserved=5)
+
+
+class ProductEditRaceTests(StoreTestCase):
+    def test_edit_keeps_a_stock_change_committed_after_the_load(self):
+        p = self.product(stock=1)
+        loaded = Product.objects.get(pk=p.pk)
+        StockEntry.objects.create(product=p, quantity=10)   # otra caja surte mientras se edita
+        Sale(product=p, quantity=2, unit_price=p.price).save()
+
+        loaded.name, loaded.price = "Renombrado", 12.5
+        loaded.save()
+
+        p.refresh_from_db()
+        self.assertEqual((p.name, p.price, p.stock), ("Renombrado", 12.5, 9))
+
+    def test_edit_keeps_a_reservation_made_after_the_load(self):
+        p = self.product(stock=5)
+        loaded = Product.objects.get(pk=p.pk)
+        reservations.reserve("a", p.pk, 2)
+
+        loaded.description = "Nueva descripción"
+        loaded.save()
+
+        p.refresh_from_db()
+        self.assertEqual((p.stock, p.reserved), (5, 2))
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from AppTienda import rollups
+from AppTienda.models import Sale, Shift, ShiftProductTotal
+
+from .base import StoreTestCase
+
+
+class ShiftTests(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.committed():
+            self.vendor = get_user_model().objects.create_user(email="caja@empresa.com", password="x", role="vendor")
+            self.client.force_login(self.vendor)
+        self.p = self.product(stock=50, price=4.0)
+
+    def open(self, opening_cash="100"):
+        with self.committed():
+            self.client.post(reverse("shifts_open"), {"opening_cash": opening_cash})
+        return Shift.objects.get(vendor=self.vendor, closed_at__isnull=True)
+
+    def sell(self, quantity):
+        with self.committed():
+            return self.client.post(reverse("sales_add"), {"product": self.p.pk, "quantity": quantity})
+
+    def close(self, shift, counted):
+        with self.committed():
+            return self.client.post(reverse("shifts_close", args=[shift.pk]), {"counted_cash": counted})
+
+    def test_only_one_open_shift_per_vendor(self):
+        shift = self.open()
+        resp = self.client.post(reverse("shifts_open"), {"opening_cash": "50"})
+        self.assertRedirects(resp, reverse("shifts_detail", args=[shift.pk]), fetch_redirect_response=False)
+        self.assertEqual(Shift.objects.filter(vendor=self.vendor).count(), 1)
+
+    def test_sales_add_up_in_the_open_shift(self):
+        shift = self.open()
+        self.sell(2)
+        self.sell(3)
+
+        shift.refresh_from_db()
+        self.assertEqual((shift.sales_count, shift.units, shift.revenue), (2, 5, 20.0))
+        self.assertEqual(shift.expected_cash, 120.0)
+        total = ShiftProductTotal.objects.get(shift=shift, product=self.p)
+        self.assertEqual((total.sales_count, total.quantity, total.revenue), (2, 5, 20.0))
+
+    def test_close_records_the_count_once(self):
+        shift = self.open()
+        self.sell(1)
+        self.close(shift, "103.5")
+        self.close(shift, "999")  # otra pestaña: no sobreescribe
+
+        shift.refresh_from_db()
+        self.assertFalse(shift.is_open)
+        self.assertEqual((shift.counted_cash, shift.difference), (103.5, -0.5))
+
+    def test_late_sale_does_not_change_a_closed_shift(self):
+        shift = self.open()
+        self.sell(1)
+        self.close(shift, "104")
+        with self.committed():  # venta confirmada con el turno ya cerrado (otra petición en vuelo)
+            Sale(product=self.p, quantity=2, unit_price=self.p.price, vendor=self.vendor, shift=shift).save()
+
+        shift.refresh_from_db()
+        self.assertEqual((shift.sales_count, shift.revenue, shift.difference), (1, 4.0, 0.0))
+        self.assertEqual((shift.late_sales, shift.late_revenue), (1, 8.0))
+
+    def test_rebuild_matches_the_incremental_totals(self):
+        shift = self.open()
+        self.sell(2)
+        self.sell(1)
+        self.close(shift, "112")
+        with self.committed():
+            Sale(product=self.p, quantity=1, unit_price=self.p.price, vendor=self.vendor, shift=shift).save()
+        shift.refresh_from_db()
+        incremental = (shift.sales_count, shift.units, shift.revenue, shift.late_sales, shift.late_revenue)
+
+        Shift.objects.filter(pk=shift.pk).update(sales_count=0, units=0, revenue=0, late_sales=0, late_revenue=0)
+        rollups.rebuild_shift_totals([shift.pk])
+        shift.refresh_from_db()
+        self.assertEqual((shift.sales_count, shift.units, shift.revenue, shift.late_sales, shift.late_revenue), incremental)
+        self.assertEqual(ShiftProductTotal.objects.get(shift=shift).quantity, 3)
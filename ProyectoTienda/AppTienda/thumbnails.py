@@ -0,0 +1,204 @@
+"""
+Miniaturas de imágenes de productos/usuarios con caché local por hash de contenido.
+
+La imagen original se descarga (o se sube) una sola vez y se guarda como
+``THUMBNAIL_ROOT/originals/<sha256>``. De ella se generan las miniaturas de
+``THUMBNAIL_SIZES`` en ``THUMBNAIL_ROOT/<px>/<sha256>.jpg``. Como el nombre
+depende del contenido y del tamaño, la URL nunca cambia de contenido y se
+puede servir con caché "para siempre" (ver ``views_media.thumbnail``).
+"""
+import hashlib
+import http.client
+import io
+import ipaddress
+import os
+import re
+import socket
+import urllib.parse
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from PIL import Image, ImageOps
+
+HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def root():
+    return os.fspath(getattr(settings, "THUMBNAIL_ROOT", settings.BASE_DIR / "thumbs"))
+
+
+def sizes():
+    return getattr(settings, "THUMBNAIL_SIZES", {"icon": 80, "sm": 160, "md": 480})
+
+
+def base_url():
+    return getattr(settings, "THUMBNAIL_URL", "/thumbs/")
+
+
+def original_path(digest):
+    return os.path.join(root(), "originals", digest)
+
+
+def thumb_path(digest, px):
+    return os.path.join(root(), str(px), f"{digest}.jpg")
+
+
+def original_url(digest):
+    return f"{base_url()}originals/{digest}"
+
+
+def thumb_url(digest, size):
+    px = sizes()[size]
+    return f"{base_url()}{px}/{digest}.jpg"
+
+
+def _atomic_write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+# ---------- Generación ----------
+def render_thumb(src_bytes, px):
+    """Miniatura cuadrada (recorte centrado) en JPEG."""
+    with Image.open(io.BytesIO(src_bytes)) as im:
+        im.draft("RGB", (px * 2, px * 2))  # JPEG grandes: decodifica a escala reducida
+        im = ImageOps.exif_transpose(im)
+        if im.mode in ("RGBA", "LA", "P"):
+            im = im.convert("RGBA")
+            bg = Image.new("RGB", im.size, (255, 255, 255))
+            bg.paste(im, mask=im.getchannel("A"))
+            im = bg
+        else:
+            im = im.convert("RGB")
+        im = ImageOps.fit(im, (px, px), Image.LANCZOS)
+        out = io.BytesIO()
+        im.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+def generate(digest, only_missing=True):
+    """Genera todas las miniaturas configuradas para un original. Regresa cuántas escribió."""
+    with open(original_path(digest), "rb") as fh:
+        data = fh.read()
+    written = 0
+    for px in sorted(set(sizes().values())):
+        path = thumb_path(digest, px)
+        if only_missing and os.path.exists(path):
+            continue
+        _atomic_write(path, render_thumb(data, px))
+        written += 1
+    return written
+
+
+def check(data):
+    """ValueError si los bytes no son una imagen que Pillow pueda abrir."""
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            im.verify()
+    except Exception as e:
+        raise ValueError(f"El archivo no es una imagen válida: {e}")
+
+
+def ingest(data):
+    """Guarda el original (si no existía) y sus miniaturas; regresa el hash."""
+    check(data)
+    digest = hashlib.sha256(data).hexdigest()
+    if not os.path.exists(original_path(digest)):
+        _atomic_write(original_path(digest), data)
+    generate(digest)
+    return digest
+
+
+# ---------- Descarga (URLs que escribe el usuario: solo hosts públicos) ----------
+class _PinnedHTTPConnection(http.client.HTTPConnection):
+    """Se conecta a la IP ya validada, no vuelve a resolver el nombre (evita DNS rebinding)."""
+
+    def __init__(self, host, addr, **kw):
+        super().__init__(host, **kw)
+        self.addr = addr
+
+    def connect(self):
+        self.sock = socket.create_connection((self.addr, self.port), self.timeout)
+
+
+class _PinnedHTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, host, addr, **kw):
+        super().__init__(host, **kw)
+        self.addr = addr
+
+    def connect(self):
+        sock = socket.create_connection((self.addr, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)  # el certificado se valida contra el nombre
+
+
+def public_address(host, port):
+    """IP a la que conectarse; ValueError si el nombre resuelve a alguna dirección interna."""
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise ValueError(f"No se pudo resolver {host}: {e}")
+    addrs = [ipaddress.ip_address(info[4][0].split("%", 1)[0]) for info in infos]
+    # loopback, privadas, link-local (metadatos de la nube), reservadas, multicast...
+    if not addrs or any(not a.is_global or a.is_multicast for a in addrs):
+        raise ValueError(f"No se permite descargar imágenes de {host}")
+    return str(addrs[0])
+
+
+def download(url, limit, redirects=3):
+    """GET de una imagen con tope de tamaño; cada redirección se vuelve a validar."""
+    timeout = getattr(settings, "THUMBNAIL_FETCH_TIMEOUT", 15)
+    for _ in range(redirects + 1):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"URL de imagen no válida: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        conn_class = _PinnedHTTPSConnection if parts.scheme == "https" else _PinnedHTTPConnection
+        conn = conn_class(parts.hostname, public_address(parts.hostname, port), port=port, timeout=timeout)
+        try:
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            conn.request("GET", path, headers={"User-Agent": "POS-thumbnails"})
+            resp = conn.getresponse()
+            location = resp.getheader("Location")
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if resp.status != 200:
+                raise ValueError(f"HTTP {resp.status} al descargar {url}")
+            length = resp.getheader("Content-Length", "")
+            if length.isdigit() and int(length) > limit:
+                raise ValueError("La imagen excede el tamaño máximo permitido")
+            data = resp.read(limit + 1)
+        finally:
+            conn.close()
+        if len(data) > limit:
+            raise ValueError("La imagen excede el tamaño máximo permitido")
+        return data
+    raise ValueError(f"Demasiadas redirecciones al descargar {url}")
+
+
+def fetch(source):
+    """Bytes de una imagen a partir de una URL http(s), una ruta estática o una original ya guardada."""
+    limit = getattr(settings, "THUMBNAIL_MAX_BYTES", 20 * 1024 * 1024)
+    if source.startswith(("http://", "https://")):
+        return download(source, limit)
+
+    if source.startswith(f"{base_url()}originals/"):
+        digest = source.rsplit("/", 1)[-1]
+        path = original_path(digest) if HASH_RE.match(digest) else None
+    else:
+        rel = source[len(settings.STATIC_URL):] if source.startswith(settings.STATIC_URL) else source
+        path = finders.find(rel.lstrip("/"))
+    if not path or not os.path.exists(path):
+        raise FileNotFoundError(f"No se encontró la imagen: {source}")
+    with open(path, "rb") as fh:
+        return fh.read(limit)
+
+
+def url_for(obj, size="icon"):
+    digest = getattr(obj, "image_hash", "")
+    if not digest or size not in sizes():
+        return ""
+    return thumb_url(digest, size)
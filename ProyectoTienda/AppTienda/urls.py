@@ -1,6 +1,10 @@
 from django.urls import path
 from . import views as v
 from . import views_category as cat
+from . import views_jobs as jobs
+from . import views_media as media
+from . import views_api as api
+from . import views_shifts as shifts
 
 
 urlpatterns = [
@@ -8,6 +12,10 @@ urlpatterns = [
     path("dashboard/", v.dashboard, name="dashboard"),
     path("login/", v.login_view, name="login"),
     path("logout/", v.logout_view, name="logout"),
+    path("rankings/", v.rankings_view, name="rankings"),
+    path("stores/report/", v.stores_report, name="stores_report"),
+    path("inventory/report/", v.inventory_report, name="inventory_report"),
+    path("modules/cache/", v.cache_stats, name="cache_stats"),
 
     # Users
     path("modules/users/", v.users_list, name="users_list"),
@@ -30,6 +38,7 @@ urlpatterns = [
     # Products
     path("modules/products/", v.products_list, name="products_list"),
     path("modules/products/add/", v.products_add, name="products_add"),
+    path("modules/products/bulk/", v.products_bulk, name="products_bulk"),
     path("modules/products/<int:pk>/edit/", v.products_edit, name="products_edit"),
     path("modules/products/<int:pk>/delete/", v.products_delete, name="products_delete"),
 
@@ -42,6 +51,31 @@ urlpatterns = [
     path("modules/sales/", v.sales_list, name="sales_list"),
     path("modules/sales/add/", v.sales_add, name="sales_add"),
     path("modules/sales/<int:pk>/delete/", v.sales_delete, name="sales_delete"),
+    path("modules/sales/export/", jobs.sales_export, name="sales_export"),
+
+    # Turnos (corte de caja)
+    path("modules/shifts/", shifts.shifts_list, name="shifts_list"),
+    path("modules/shifts/open/", shifts.shifts_open, name="shifts_open"),
+    path("modules/shifts/<int:pk>/", shifts.shifts_detail, name="shifts_detail"),
+    path("modules/shifts/<int:pk>/close/", shifts.shifts_close, name="shifts_close"),
+
+    # Miniaturas (caché por hash de contenido)
+    path("thumbs/originals/<str:digest>", media.original, name="thumb_original"),
+    path("thumbs/<int:px>/<str:name>", media.thumbnail, name="thumbnail"),
+
+    # API para la caja (escáner)
+    path("api/scan/", api.scan, name="api_scan"),
+    path("api/reservations/", api.reserve, name="api_reserve"),
+    path("api/reservations/release/", api.release, name="api_release"),
+    path("api/products/", api.products_search, name="api_products"),
+    path("api/customers/", api.customers_search, name="api_customers"),
+    path("healthz/", api.healthz, name="healthz"),
+
+    # Jobs (cola en segundo plano)
+    path("modules/jobs/", jobs.jobs_list, name="jobs_list"),
+    path("modules/jobs/<int:pk>/", jobs.jobs_detail, name="jobs_detail"),
+    path("modules/jobs/<int:pk>/status/", jobs.jobs_status, name="jobs_status"),
+    path("modules/jobs/<int:pk>/download/", jobs.jobs_download, name="jobs_download"),
 
     # Categories
     path("modules/categories/", cat.categories_list, name="categories_list"),
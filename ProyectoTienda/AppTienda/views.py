@@ -1,27 +1,42 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import HttpResponse
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from django.core.paginator import Paginator
-from django.db.models import Q, Sum, F, FloatField
+from django.db.models import CASCADE, Q, Count, Sum, F, FloatField, Exists, OuterRef, Value
+from django.db.models.functions import Greatest, Round
 from django.db import transaction
 
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
-from .models import Product, StockEntry, Sale, Customer, Category
+from .models import Product, StockEntry, Sale, ArchivedSale, Customer, Category, Store, StoreSalesRollup, Shift
 from .forms import (
     LoginForm, UserForm, ProductForm, StockEntryForm, SaleForm,
-    CustomerForm, CategoryForm
+    CustomerForm, CategoryForm, ProductBulkForm
 )
+from .signals import products_bulk_changed
 from .decorators import can_manage_required, user_can_manage
+from . import thumbnails, rankings, listcache, archive, reservations, rollups
 
 # ---------- Helpers ----------
 def _paginate(request, qs, per_page=10):
     p = Paginator(qs, per_page)
     return p.get_page(request.GET.get("page"))
 
+def _render_list(request, ctx):
+    """list.html completo, o solo la tabla si la pide la búsqueda en vivo (cabecera HX-Request)."""
+    partial = request.headers.get("HX-Request") == "true"
+    if partial and "table_html" in ctx:  # ya viene renderada (listcache)
+        resp = HttpResponse(ctx["table_html"])
+    else:
+        resp = render(request, "AppTienda/modules/_list_table.html" if partial else "AppTienda/modules/list.html", ctx)
+    patch_vary_headers(resp, ["HX-Request"])
+    return resp
+
 # ---------- Auth ----------
 def login_view(request):
     if request.user.is_authenticated:
@@ -44,40 +59,80 @@ def dashboard(request):
     kpi = {"revenue": 0.0, "orders": 0, "customers": 0, "top_sell": {"name":"—","qty":0,"revenue":0.0,"price":0.0}}
     try:
         today = timezone.localdate()
-        labels = [(today - timezone.timedelta(days=i)).strftime("%d %b") for i in range(29,-1,-1)]
-        since = timezone.now() - timezone.timedelta(days=30)
-        qs = Sale.objects.filter(created_at__gte=since)
+        days = [today - timezone.timedelta(days=i) for i in range(29,-1,-1)]
+        labels = [d.strftime("%d %b") for d in days]
 
-        agg = qs.values("product","product__name","product__price").annotate(
-            qty=Sum("quantity"),
-            rev=Sum(F("quantity") * F("unit_price"), output_field=FloatField())
-        )
-        if agg:
-            best = max(agg, key=lambda a: a.get("qty") or 0)
-            kpi["top_sell"] = {
-                "name": best["product__name"],
-                "qty": int(best.get("qty") or 0),
-                "revenue": round(best.get("rev") or 0.0, 2),
-                "price": float(best.get("product__price") or 0.0),
-            }
-
-        rev_map = {lbl:0.0 for lbl in labels}
-        day_sales = (qs.annotate(day=F("created_at__date"))
-                       .values("day")
-                       .annotate(rev=Sum(F("quantity") * F("unit_price"), output_field=FloatField())))
-        for d in day_sales:
-            lbl = d["day"].strftime("%d %b")
-            if lbl in rev_map:
-                rev_map[lbl] = float(d["rev"] or 0.0)
-        series = [rev_map[lbl] for lbl in labels]
+        # todo sale de los rollups diarios (rankings.py), no se recorre Sale
+        top = rankings.top_products("30d", "qty", k=1)
+        if top:
+            best = top[0]
+            kpi["top_sell"] = {"name": best["name"], "qty": best["qty"], "revenue": best["revenue"], "price": best["price"]}
+
+        totals = rankings.daily_totals(30)
+        series = [round(totals[d]["revenue"], 2) if d in totals else 0.0 for d in days]
 
         kpi["revenue"] = round(sum(series), 2)
-        kpi["orders"] = qs.count()
+        kpi["orders"] = sum(t["orders"] for t in totals.values())
         kpi["customers"] = Customer.objects.count()
     except Exception:
         pass
     return render(request, "AppTienda/dashboard.html", {"labels": labels, "sales": series, "kpi": kpi})
 
+@login_required(login_url="login")
+def rankings_view(request):
+    window = request.GET.get("window") if request.GET.get("window") in rankings.WINDOWS else "30d"
+    metric = request.GET.get("metric") if request.GET.get("metric") in rankings.METRICS else "qty"
+    category = request.GET.get("category") or ""
+    category = int(category) if category.isdigit() else None
+    rows = rankings.top_products(window, metric, category=category, k=10)
+    return render(request, "AppTienda/rankings.html", {
+        "title": "Más vendidos", "rows": rows, "window": window, "metric": metric, "category": category,
+        "windows": rankings.WINDOWS, "metrics": rankings.METRICS,
+        "categories": Category.objects.only("id", "name"),
+    })
+
+# ---------- Reporte consolidado por sucursal ----------
+@login_required(login_url="login")
+def stores_report(request):
+    days = request.GET.get("days") or "30"
+    days = int(days) if days.isdigit() and int(days) > 0 else 30
+    since = timezone.localdate() - timezone.timedelta(days=days - 1)
+    # solo rollups diarios (locales e importados), nunca las ventas de cada sucursal
+    rows = (StoreSalesRollup.objects.filter(day__gte=since).values("store__code", "store__name")
+            .annotate(orders=Sum("sales_count"), units=Sum("quantity"), revenue=Sum("revenue"), stock_in=Sum("stock_in"))
+            .order_by("-revenue"))
+    rows = list(rows)
+    totals = {k: sum((r[k] or 0) for r in rows) for k in ("orders", "units", "revenue", "stock_in")}
+    return render(request, "AppTienda/stores_report.html", {
+        "title": "Consolidado por sucursal", "rows": rows, "totals": totals, "days": days,
+        "current_store": Store.objects.current(),
+    })
+
+# ---------- Valor del inventario por categoría ----------
+@login_required(login_url="login")
+def inventory_report(request):
+    # contadores denormalizados de Category (handlers.update_category_counters): no recorre Product
+    rows = list(Category.objects.order_by("-stock_value", "name")
+                .values("id", "name", "product_count", "units_on_hand", "stock_value"))
+    # los productos sin categoría no tienen contador: un solo agregado, sobre el índice de category
+    loose = Product.objects.filter(category__isnull=True).aggregate(
+        product_count=Count("id"), units_on_hand=Sum("stock"),
+        stock_value=Sum(F("stock") * F("price"), output_field=FloatField()))
+    if loose["product_count"]:
+        rows.append({"id": None, "name": "Sin categoría", **loose})
+    totals = {k: sum((r[k] or 0) for r in rows) for k in ("product_count", "units_on_hand", "stock_value")}
+    return render(request, "AppTienda/inventory_report.html", {
+        "title": "Valor del inventario", "rows": rows, "totals": totals,
+    })
+
+# ---------- Caché de listados: aciertos por listado ----------
+@can_manage_required
+def cache_stats(request):
+    headers = ["Listado","Tablas","Generación","Aciertos","Fallos","% aciertos"]
+    items = [{"id":r["list"],"cells":[r["list"],", ".join(r["tables"]),".".join(map(str, r["generations"])),
+                                      r["hits"],r["misses"],f"{r['hit_rate']:.1%}"]} for r in listcache.stats()]
+    return render(request, "AppTienda/modules/list.html", {"title":"Caché de listados","headers":headers,"items":items})
+
 # ---------- Users ----------
 @login_required(login_url="login")
 def users_list(request):
@@ -87,16 +142,16 @@ def users_list(request):
         qs = qs.filter(Q(email__icontains=q)|Q(first_name__icontains=q)|Q(last_name__icontains=q)|Q(role__icontains=q))
     page_obj = _paginate(request, qs)
     headers = ["ID","Email","Nombre","Rol","Activo","Staff"]
-    items = [{"id":u.id,"cells":[u.id,u.email,f"{u.first_name} {u.last_name}".strip(),getattr(u,'role',''),"Sí" if u.is_active else "No","Sí" if u.is_staff else "No"]} for u in page_obj.object_list]
-    return render(request, "AppTienda/modules/list.html", {
+    items = [{"id":u.id,"thumb":thumbnails.url_for(u),"cells":[u.id,u.email,f"{u.first_name} {u.last_name}".strip(),getattr(u,'role',''),"Sí" if u.is_active else "No","Sí" if u.is_staff else "No"]} for u in page_obj.object_list]
+    return _render_list(request, {
         "title":"Usuarios","headers":headers,"items":items,"page_obj":page_obj,
-        "add_name":"users_add","edit_name":"users_edit","delete_name":"users_delete",
+        "add_name":"users_add","edit_name":"users_edit","delete_name":"users_delete","show_thumbs":True,
         "can_manage": user_can_manage(request.user),
     })
 
 @can_manage_required
 def users_add(request):
-    form = UserForm(request.POST or None)
+    form = UserForm(request.POST or None, request.FILES or None)
     if request.method == "POST" and form.is_valid():
         form.save(); messages.success(request, "Usuario creado."); return redirect("users_list")
     return render(request, "AppTienda/modules/form.html", {"title":"Nuevo usuario","form":form})
@@ -104,7 +159,7 @@ def users_add(request):
 @can_manage_required
 def users_edit(request, pk):
     obj = get_object_or_404(User, pk=pk)
-    form = UserForm(request.POST or None, instance=obj)
+    form = UserForm(request.POST or None, request.FILES or None, instance=obj)
     if request.method == "POST" and form.is_valid():
         form.save(); messages.success(request, "Usuario actualizado."); return redirect("users_list")
     return render(request, "AppTienda/modules/form.html", {"title":f"Editar usuario #{pk}","form":form})
@@ -118,20 +173,38 @@ def users_delete(request, pk):
 
 
 # ---------- Customers (separados) ----------
+# orden permitido -> columnas indexadas (lifetime_value, order_count, last_purchase_at)
+CUSTOMER_SORTS = {
+    "": ("Más recientes", ["-id"]),
+    "ltv": ("Mayor valor de vida", ["-lifetime_value", "-id"]),
+    "orders": ("Más compras", ["-order_count", "-id"]),
+    "last": ("Compra más reciente", [F("last_purchase_at").desc(nulls_last=True), "-id"]),
+    "ticket": ("Mayor ticket promedio", ["-avg_ticket", "-id"]),
+}
+
 @login_required(login_url="login")
 def customers_list(request):
     q = (request.GET.get("q") or "").strip()
-    qs = Customer.objects.all().order_by('-id')
-    if q:
-        qs = qs.filter(Q(first_name__icontains=q)|Q(last_name__icontains=q)|Q(address__icontains=q)|Q(phone__icontains=q))
-    page_obj = _paginate(request, qs)
-    headers = ["ID","Nombre","Teléfono","Dirección"]
-    items = [{"id":c.id,"cells":[c.id,f"{c.first_name} {c.last_name}".strip(),c.phone or "—",c.address or "—"]} for c in page_obj.object_list]
-    return render(request, "AppTienda/modules/list.html", {
-        "title":"Clientes","headers":headers,"items":items,"page_obj":page_obj,
+    sort = request.GET.get("sort") or ""
+    if sort not in CUSTOMER_SORTS:
+        sort = ""
+    def table():
+        qs = Customer.objects.all().order_by(*CUSTOMER_SORTS[sort][1])
+        if q:
+            qs = qs.filter(Q(first_name__icontains=q)|Q(last_name__icontains=q)|Q(address__icontains=q)|Q(phone__icontains=q))
+        days = request.GET.get("active_days") or ""
+        if days.isdigit():
+            qs = qs.filter(last_purchase_at__gte=timezone.now() - timezone.timedelta(days=int(days)))
+        page_obj = _paginate(request, qs)
+        items = [{"id":c.id,"cells":[c.id,f"{c.first_name} {c.last_name}".strip(),c.phone or "—",c.order_count,
+                                     f"${c.lifetime_value:.2f}",f"${c.avg_ticket:.2f}",c.last_purchase_at or "—"]} for c in page_obj.object_list]
+        return {"headers":["ID","Nombre","Teléfono","Compras","Total","Ticket prom.","Última compra"],"items":items,"page_obj":page_obj}
+    return _render_list(request, listcache.with_table(request, "customers", {
+        "title":"Clientes",
         "add_name":"customers_add","edit_name":"customers_edit","delete_name":"customers_delete",
+        "sort_options":[(k, v[0]) for k, v in CUSTOMER_SORTS.items()],
         "can_manage": user_can_manage(request.user),
-    })
+    }, table))
 
 @can_manage_required
 def customers_add(request):
@@ -162,17 +235,19 @@ def customers_delete(request, pk):
 @login_required(login_url="login")
 def categories_list(request):
     q = (request.GET.get("q") or "").strip()
-    qs = Category.objects.all()
-    if q:
-        qs = qs.filter(Q(name__icontains=q)|Q(description__icontains=q))
-    page_obj = _paginate(request, qs)
-    headers = ["ID","Nombre","Descripción","Creado"]
-    items = [{"id":c.id,"cells":[c.id,c.name,c.description or "—",c.created_at]} for c in page_obj.object_list]
-    return render(request, "AppTienda/modules/list.html", {
-        "title":"Categorías","headers":headers,"items":items,"page_obj":page_obj,
+    def table():
+        qs = Category.objects.all()
+        if q:
+            qs = qs.filter(Q(name__icontains=q)|Q(description__icontains=q))
+        page_obj = _paginate(request, qs)
+        items = [{"id":c.id,"cells":[c.id,c.name,c.description or "—",c.product_count,c.units_on_hand,
+                                     f"${c.stock_value:,.2f}",c.created_at]} for c in page_obj.object_list]
+        return {"headers":["ID","Nombre","Descripción","Productos","Unidades","Valor","Creado"],"items":items,"page_obj":page_obj}
+    return _render_list(request, listcache.with_table(request, "categories", {
+        "title":"Categorías",
         "add_name":"categories_add","edit_name":"categories_edit","delete_name":"categories_delete",
         "can_manage": user_can_manage(request.user),
-    })
+    }, table))
 
 @can_manage_required
 def categories_add(request):
@@ -198,24 +273,31 @@ def categories_delete(request, pk):
 
 
 # ---------- Products (con category) ----------
+def _products_filter(q):
+    qs = Product.objects.all()
+    if q:
+        qs = qs.filter(Q(name__icontains=q)|Q(description__icontains=q)|Q(category__name__icontains=q))
+    return qs
+
 @login_required(login_url="login")
 def products_list(request):
     q = (request.GET.get("q") or "").strip()
-    qs = Product.objects.select_related("category").all().order_by('-id')
-    if q:
-        qs = qs.filter(Q(name__icontains=q)|Q(description__icontains=q)|Q(category__name__icontains=q))
-    page_obj = _paginate(request, qs)
-    headers = ["ID","Nombre","Categoría","Precio","Stock"]
-    items = [{"id":p.id,"cells":[p.id,p.name,(p.category.name if p.category else "—"),f"${p.price}",f"{p.stock}"]} for p in page_obj.object_list]
-    return render(request, "AppTienda/modules/list.html", {
-        "title":"Productos","headers":headers,"items":items,"page_obj":page_obj,
-        "add_name":"products_add","edit_name":"products_edit","delete_name":"products_delete",
+    def table():
+        page_obj = _paginate(request, _products_filter(q).select_related("category").order_by('-id'))
+        items = [{"id":p.id,"thumb":thumbnails.url_for(p),"cells":[p.id,p.name,(p.category.name if p.category else "—"),f"${p.price}",listcache.live_cell("stock",p.id)]} for p in page_obj.object_list]
+        return {"headers":["ID","Nombre","Categoría","Precio","Stock"],"items":items,"page_obj":page_obj}
+    # el stock no entra a la caché: cambia con cada venta y se lee por id de las filas de la página
+    stock = lambda ids: dict(Product.objects.filter(pk__in=ids).values_list("pk", "stock"))
+    return _render_list(request, listcache.with_table(request, "products", {
+        "title":"Productos",
+        "add_name":"products_add","edit_name":"products_edit","delete_name":"products_delete","show_thumbs":True,
+        "bulk_name":"products_bulk",
         "can_manage": user_can_manage(request.user),
-    })
+    }, table, live={"stock": stock}))
 
 @can_manage_required
 def products_add(request):
-    form = ProductForm(request.POST or None)
+    form = ProductForm(request.POST or None, request.FILES or None)
     if request.method == "POST" and form.is_valid():
         form.save(); messages.success(request, "Producto creado."); return redirect("products_list")
     return render(request, "AppTienda/modules/form.html", {"title":"Nuevo producto","form":form})
@@ -223,11 +305,84 @@ def products_add(request):
 @can_manage_required
 def products_edit(request, pk):
     obj = get_object_or_404(Product, pk=pk)
-    form = ProductForm(request.POST or None, instance=obj)
+    form = ProductForm(request.POST or None, request.FILES or None, instance=obj)
     if request.method == "POST" and form.is_valid():
         form.save(); messages.success(request, "Producto actualizado."); return redirect("products_list")
     return render(request, "AppTienda/modules/form.html", {"title":f"Editar producto #{pk}","form":form})
 
+@can_manage_required
+def products_bulk(request):
+    """Acciones masivas: GET muestra la vista previa (cuántos), POST ejecuta un solo UPDATE/DELETE."""
+    data = request.POST if request.method == "POST" else request.GET
+    ids = [int(i) for i in data.getlist("ids") if i.isdigit()]
+    q = (data.get("q") or "").strip()
+    everything = data.get("scope") == "all"
+    if not ids and not everything:
+        messages.error(request, "Selecciona al menos un producto o aplica la acción a todos los filtrados.")
+        return redirect("products_list")
+
+    qs = _products_filter(q) if everything else Product.objects.filter(pk__in=ids)
+    form = ProductBulkForm(data)
+    if not form.is_valid():
+        return render(request, "AppTienda/modules/bulk_confirm.html", {
+            "title": "Acción masiva", "form": form, "count": qs.count(), "ids": ids, "q": q, "scope": data.get("scope"),
+        })
+    action = form.cleaned_data["action"]
+    protected = (qs.filter(Q(Exists(Sale.objects.filter(product=OuterRef("pk"))))
+                           | Q(Exists(ArchivedSale.objects.filter(product=OuterRef("pk")))))
+                 if action == "delete" else qs.none())
+
+    if request.method != "POST":
+        return render(request, "AppTienda/modules/bulk_confirm.html", {
+            "title": "Confirmar acción masiva", "form": form, "count": qs.count(), "protected": protected.count(),
+            "ids": ids, "q": q, "scope": data.get("scope"), "preview": True,
+        })
+
+    with transaction.atomic():
+        if action == "delete":
+            qs = qs.exclude(pk__in=protected.values("pk"))
+        affected = list(qs.values_list("id", flat=True))
+        categories = set(Product.objects.filter(pk__in=affected).values_list("category_id", flat=True).distinct())
+        target = Product.objects.filter(pk__in=affected)
+        if action == "reprice":
+            mode, value = form.cleaned_data["mode"], form.cleaned_data["value"]
+            if mode == "pct":
+                price = Round(F("price") * (1 + value / 100.0), 2)
+            elif mode == "abs":
+                price = Greatest(Round(F("price") + value, 2), Value(0.0))
+            else:
+                price = Value(round(value, 2))
+            n, fields = target.update(price=price), ["price"]
+        elif action == "recategorize":
+            category = form.cleaned_data["category"]
+            n, fields = target.update(category=category), ["category"]
+            categories.add(category.pk)
+        else:
+            n, fields = _delete_products(affected), None
+        products_bulk_changed.send(sender=Product, action=action, ids=affected, fields=fields, categories=categories)
+
+    skipped = protected.count() if action == "delete" else 0
+    msg = f"{n} producto(s) actualizados." if action != "delete" else f"{n} producto(s) eliminados."
+    if skipped:
+        msg += f" {skipped} con ventas no se eliminaron (protegidos)."
+    messages.success(request, msg)
+    return redirect("products_list")
+
+def _delete_products(ids):
+    """
+    Borrado en bloque sin el Collector de Django (sin post_delete por fila ni
+    recorrido de cascadas): un DELETE por tabla dependiente y uno de Product.
+    Lo derivado se actualiza con el único ``products.bulk_changed`` del llamador,
+    salvo el stock_in de los rollups por sucursal, que se resta aquí.
+    """
+    db = Product.objects.db
+    rollups.stock_removed_for_products(ids)
+    for rel in Product._meta.related_objects:  # barcodes, entradas, rollups, totales de turno, reservas
+        if rel.on_delete is CASCADE:
+            rel.related_model._base_manager.filter(**{f"{rel.field.name}__in": ids})._raw_delete(db)
+    return Product.objects.filter(pk__in=ids)._raw_delete(db)
+
+
 @can_manage_required
 def products_delete(request, pk):
     obj = get_object_or_404(Product, pk=pk)
@@ -240,13 +395,14 @@ def products_delete(request, pk):
 @login_required(login_url="login")
 def stock_list(request):
     q = (request.GET.get("q") or "").strip()
-    qs = StockEntry.objects.select_related("product").all().order_by('-id')
+    # solo las filas de esta sucursal (índice store+created_at)
+    qs = StockEntry.objects.select_related("product").filter(store=Store.objects.current()).order_by('-created_at','-id')
     if q:
         qs = qs.filter(Q(product__name__icontains=q)|Q(note__icontains=q))
     page_obj = _paginate(request, qs)
     headers = ["ID","Producto","+Cantidad","Nota","Fecha"]
     items = [{"id":s.id,"cells":[s.id,s.product.name,f"+{s.quantity}",s.note or "—",s.created_at]} for s in page_obj.object_list]
-    return render(request, "AppTienda/modules/list.html", {
+    return _render_list(request, {
         "title":"Entradas de Stock","headers":headers,"items":items,"page_obj":page_obj,
         "add_name":"stock_add","edit_name":None,"delete_name":"stock_delete",
         "can_manage": user_can_manage(request.user),
@@ -272,7 +428,11 @@ def stock_delete(request, pk):
 @login_required(login_url="login")
 def sales_list(request):
     q = (request.GET.get("q") or "").strip()
-    qs = Sale.objects.select_related("product","customer").all().order_by('-id')
+    # el archivo solo se consulta si se pide explícitamente
+    archived = request.GET.get("scope") == "archive"
+    model = ArchivedSale if archived else Sale
+    # solo las filas de esta sucursal (índice store+created_at)
+    qs = model.objects.select_related("product","customer","vendor").filter(store=Store.objects.current()).order_by('-created_at','-id')
     if q:
         qs = qs.filter(
             Q(product__name__icontains=q) |
@@ -281,7 +441,7 @@ def sales_list(request):
         )
 
     page_obj = _paginate(request, qs)
-    headers = ["ID","Producto","Cliente","Cantidad","Precio U.","Total","Fecha"]  # 👈 agregamos Total
+    headers = ["ID","Producto","Cliente","Cantidad","Precio U.","Total","Vendedor","Fecha"]  # 👈 agregamos Total
     items = []
     for s in page_obj.object_list:
         cust = f"{s.customer.first_name} {s.customer.last_name}".strip() if s.customer else "—"
@@ -294,13 +454,17 @@ def sales_list(request):
                 f"{s.quantity}",
                 f"${s.unit_price:.2f}",
                 f"${s.total_amount:.2f}",     # 👈 mostramos total guardado
+                s.vendor.email if s.vendor else "—",
                 s.created_at,
             ],
         })
 
-    return render(request, "AppTienda/modules/list.html", {
-        "title":"Ventas","headers":headers,"items":items,"page_obj":page_obj,
-        "add_name":"sales_add","edit_name":None,"delete_name":"sales_delete",
+    return _render_list(request, {
+        "title":"Ventas archivadas" if archived else "Ventas","headers":headers,"items":items,"page_obj":page_obj,
+        "add_name":"sales_add","edit_name":None,"delete_name":None if archived else "sales_delete",
+        "export_name":None if archived else "sales_export",
+        "export_formats":[("columnar", "Historial columnar")],
+        "scope_options":[("", "Recientes"), ("archive", f"Archivo (antes del {archive.cutoff():%d/%m/%Y})")],
         "can_manage": user_can_manage(request.user),
     })
 
@@ -309,16 +473,15 @@ def sales_list(request):
 @transaction.atomic
 def sales_add(request):
     form = SaleForm(request.POST or None)
-
-    # Mapa id->precio para calcular total en el frontend
-    products = Product.objects.all().values("id", "name", "price")
-    price_map = {str(p["id"]): float(p["price"]) for p in products}
+    shift = Shift.objects.open_for(request.user)
 
     if request.method == "POST" and form.is_valid():
         try:
             sale = form.save(commit=False)
-            # snapshot del precio del producto (aunque el modelo ya lo hace)
+            # snapshot del precio: el de la base al cobrar (el catálogo compartido puede ir atrás tras un cambio)
             sale.unit_price = float(sale.product.price)
+            sale.vendor, sale.shift = request.user, shift
+            sale.cart = reservations.cart_for(request)  # lo apartado al escanear se convierte en la venta
             sale.save()
             messages.success(request, "Venta registrada.")
             return redirect("sales_list")
@@ -328,7 +491,7 @@ def sales_add(request):
     return render(
         request,
         "AppTienda/sales/form.html",
-        {"title": "Nueva venta", "form": form, "price_map": price_map},
+        {"title": "Nueva venta", "form": form, "shift": shift},
     )
 
 @can_manage_required
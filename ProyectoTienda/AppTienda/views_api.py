@@ -0,0 +1,95 @@
+# AppTienda/views_api.py
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
+
+from . import barcodes, events, reservations, search, shared_catalog, warmup
+from .decorators import can_manage_required
+from .models import Product
+
+
+@login_required(login_url="login")
+def scan(request):
+    """Código escaneado -> producto y precio (del catálogo compartido; si no está, de la base) y lo disponible."""
+    code = barcodes.normalize(request.GET.get("code"))
+    pid = barcodes.lookup(code) if code else None
+    product = shared_catalog.lookup(pid) if pid else None
+    if product is None and pid:
+        product = Product.objects.filter(pk=pid).values("id", "name", "sku", "price").first()
+    if product is None:
+        return JsonResponse({"error": "Código no encontrado", "code": code}, status=404)
+    # disponible para vender = stock - lo apartado por otros carritos (no va en el catálogo compartido)
+    product["available"] = reservations.available(product["id"])
+    return JsonResponse(product)
+
+
+def _int(value):
+    value = (value or "").strip()
+    return int(value) if value.isdigit() else None
+
+
+@can_manage_required
+@require_POST
+def reserve(request):
+    """Aparta para el carrito de esta caja ``quantity`` unidades de ``product`` (0 suelta el apartado)."""
+    pid, qty = _int(request.POST.get("product")), _int(request.POST.get("quantity"))
+    if pid is None or qty is None:
+        return JsonResponse({"error": "Producto y cantidad requeridos"}, status=400)
+    ok, free = reservations.reserve(reservations.cart_for(request), pid, qty, request.user)
+    return JsonResponse({"ok": ok, "product": pid, "quantity": qty, "available": free,
+                         "seconds": int(reservations.ttl().total_seconds())}, status=200 if ok else 409)
+
+
+@can_manage_required
+@require_POST
+def release(request):
+    """Suelta los apartados del carrito de esta caja (o solo el de ``product``)."""
+    released = reservations.release(reservations.cart_for(request), _int(request.POST.get("product")))
+    return JsonResponse({"released": released})
+
+
+def _limit(request):
+    value = request.GET.get("limit") or ""
+    return int(value) if value.isdigit() else 10
+
+
+@login_required(login_url="login")
+def products_search(request):
+    """Primeros N productos cuyo nombre (o SKU) empieza con ``q``, con precio y stock."""
+    return JsonResponse({"results": search.products(request.GET.get("q", ""), _limit(request))})
+
+
+@login_required(login_url="login")
+def customers_search(request):
+    return JsonResponse({"results": search.customers(request.GET.get("q", ""), _limit(request))})
+
+
+@never_cache
+def healthz(request):
+    """Para el balanceador: 200 cuando la base responde y el worker ya se calentó (o se rindió y atiende en frío).
+
+    Sin sesión solo regresa ``status``; el detalle (pasos, error) es para usuarios con sesión.
+    """
+    try:
+        with connection.cursor() as cur:
+            cur.execute("SELECT 1")
+        db_ok = True
+    except DatabaseError:
+        db_ok = False
+    warm = warmup.state["ready"] or not getattr(settings, "WARMUP_ON_BOOT", True)
+    ok = db_ok and (warm or warmup.state["degraded"])
+    if ok:
+        status = "ok" if warm else "degraded"
+    else:
+        status = "starting" if db_ok and warmup.state["running"] else "unavailable"
+    body = {"status": status}
+    if request.user.is_authenticated:
+        body.update({
+            "database": db_ok, "warm": warm, "attempts": warmup.state["attempts"], "steps": warmup.state["steps"],
+            "error": warmup.state["error"], "events_pending": events.worker.pending(),
+            "shared_catalog": getattr(shared_catalog.current(), "version", None),
+        })
+    return JsonResponse(body, status=200 if ok else 503)
@@ -0,0 +1,79 @@
+# AppTienda/views_jobs.py
+import os
+
+from django.contrib import messages
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404
+
+from . import jobs
+from .models import Job
+from .decorators import can_manage_required, user_can_manage
+from .views import _paginate, _render_list
+
+
+def _jobs_for(user):
+    """Las exportaciones traen todo el historial de ventas y clientes: cada quien ve las suyas; staff, todas."""
+    qs = Job.objects.all()
+    return qs if user.is_superuser or user.is_staff else qs.filter(created_by=user)
+
+
+def _job_payload(j):
+    return {
+        "id": j.id, "kind": j.kind, "status": j.status, "status_label": j.get_status_display(),
+        "progress": j.progress, "message": j.message, "attempts": j.attempts,
+        "result": j.result, "finished": j.is_finished,
+    }
+
+
+@can_manage_required
+def jobs_list(request):
+    qs = _jobs_for(request.user)
+    status = (request.GET.get("q") or "").strip()
+    if status:
+        qs = qs.filter(status=status)
+    page_obj = _paginate(request, qs)
+    headers = ["ID", "Tarea", "Estado", "Avance", "Intentos", "Creada", "Terminada"]
+    items = [{"id": j.id, "cells": [j.id, j.kind, j.get_status_display(), f"{j.progress}%",
+                                    f"{j.attempts}/{j.max_attempts}", j.created_at, j.finished_at or "—"]}
+             for j in page_obj.object_list]
+    return _render_list(request, {
+        "title": "Tareas", "headers": headers, "items": items, "page_obj": page_obj,
+        "add_name": None, "edit_name": None, "delete_name": None, "view_name": "jobs_detail",
+        "can_manage": user_can_manage(request.user),
+    })
+
+
+@can_manage_required
+def jobs_detail(request, pk):
+    j = get_object_or_404(_jobs_for(request.user), pk=pk)
+    return render(request, "AppTienda/jobs/detail.html", {"title": f"Tarea #{pk}", "job": j})
+
+
+@can_manage_required
+def jobs_status(request, pk):
+    return JsonResponse(_job_payload(get_object_or_404(_jobs_for(request.user), pk=pk)))
+
+
+@can_manage_required
+def jobs_download(request, pk):
+    j = get_object_or_404(_jobs_for(request.user), pk=pk, status="done")
+    name = (j.result or {}).get("file")
+    if not name:
+        raise Http404("La tarea no generó archivo")
+    path = os.path.join(jobs.output_dir(), os.path.basename(name))
+    if not os.path.exists(path):
+        raise Http404("Archivo no encontrado")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=os.path.basename(name))
+
+
+@can_manage_required
+def sales_export(request):
+    if request.method != "POST":
+        return redirect("sales_list")
+    if request.POST.get("format") == "columnar":
+        # todo el historial (con archivadas) para análisis; la búsqueda no aplica
+        j = jobs.enqueue("export_sales_columnar", priority=1, user=request.user)
+    else:
+        j = jobs.enqueue("export_sales", priority=5, user=request.user, q=(request.POST.get("q") or "").strip())
+    messages.info(request, f"Exportación encolada (tarea #{j.id}).")
+    return redirect("jobs_detail", pk=j.id)
@@ -0,0 +1,35 @@
+# AppTienda/views_media.py
+import os
+
+from django.http import FileResponse, Http404
+from django.views.decorators.http import require_GET
+
+from . import thumbnails
+
+FAR_FUTURE = "public, max-age=31536000, immutable"
+
+
+def _immutable_file(path, content_type):
+    if not os.path.exists(path):
+        raise Http404("Imagen no encontrada")
+    resp = FileResponse(open(path, "rb"), content_type=content_type)
+    resp["Cache-Control"] = FAR_FUTURE
+    return resp
+
+
+@require_GET
+def thumbnail(request, px, name):
+    digest = name[:-4] if name.endswith(".jpg") else ""
+    if not thumbnails.HASH_RE.match(digest):
+        raise Http404("Imagen no encontrada")
+    path = thumbnails.thumb_path(digest, px)
+    if not os.path.exists(path) and px in thumbnails.sizes().values() and os.path.exists(thumbnails.original_path(digest)):
+        thumbnails.generate(digest)  # tamaño nuevo aún no regenerado
+    return _immutable_file(path, "image/jpeg")
+
+
+@require_GET
+def original(request, digest):
+    if not thumbnails.HASH_RE.match(digest):
+        raise Http404("Imagen no encontrada")
+    return _immutable_file(thumbnails.original_path(digest), None)
@@ -0,0 +1,89 @@
+# AppTienda/views_shifts.py
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.http import HttpResponseForbidden
+from django.shortcuts import render, redirect, get_object_or_404
+from django.utils import timezone
+
+from .decorators import can_manage_required, user_can_manage
+from .forms import ShiftOpenForm, ShiftCloseForm
+from .models import Shift, Store
+from .views import _paginate, _render_list
+
+
+def _can_see(user, shift):
+    return shift.vendor_id == user.pk or user.is_superuser or user.is_staff
+
+
+@login_required(login_url="login")
+def shifts_list(request):
+    qs = Shift.objects.select_related("vendor").filter(store=Store.objects.current())
+    if not (request.user.is_superuser or request.user.is_staff):
+        qs = qs.filter(vendor=request.user)
+    q = (request.GET.get("q") or "").strip()
+    if q == "abiertos":
+        qs = qs.filter(closed_at__isnull=True)
+    elif q:
+        qs = qs.filter(vendor__email__istartswith=q)
+    page_obj = _paginate(request, qs)
+    headers = ["ID", "Vendedor", "Abierto", "Cerrado", "Ventas", "Total", "Diferencia"]
+    items = [{"id": s.id, "cells": [s.id, s.vendor.email, s.opened_at, s.closed_at or "Abierto", s.sales_count,
+                                    f"${s.revenue:.2f}", "—" if s.difference is None else f"${s.difference:.2f}"]}
+             for s in page_obj.object_list]
+    return _render_list(request, {
+        "title": "Turnos", "headers": headers, "items": items, "page_obj": page_obj,
+        "add_name": "shifts_open", "edit_name": None, "delete_name": None, "view_name": "shifts_detail",
+        "can_manage": user_can_manage(request.user),
+    })
+
+
+@can_manage_required
+def shifts_open(request):
+    current = Shift.objects.open_for(request.user)
+    if current:
+        messages.info(request, f"Ya tienes abierto el turno #{current.pk}.")
+        return redirect("shifts_detail", pk=current.pk)
+    form = ShiftOpenForm(request.POST or None)
+    if request.method == "POST" and form.is_valid():
+        shift = form.save(commit=False)
+        shift.store, shift.vendor = Store.objects.current(), request.user
+        try:
+            with transaction.atomic():
+                shift.save()
+        except IntegrityError:  # doble clic: la restricción de un turno abierto por vendedor
+            shift = Shift.objects.open_for(request.user)
+        messages.success(request, f"Turno #{shift.pk} abierto.")
+        return redirect("sales_add")
+    return render(request, "AppTienda/modules/form.html", {"title": "Abrir turno", "form": form})
+
+
+@login_required(login_url="login")
+def shifts_detail(request, pk):
+    shift = get_object_or_404(Shift.objects.select_related("vendor", "store"), pk=pk)
+    if not _can_see(request.user, shift):
+        return HttpResponseForbidden("Turno de otro vendedor")
+    # corte de caja: los totales ya están en Shift y ShiftProductTotal, no se recorren las ventas
+    products = shift.product_totals.select_related("product").filter(sales_count__gt=0).order_by("-revenue")
+    return render(request, "AppTienda/shifts/detail.html", {
+        "title": f"Turno #{pk}", "shift": shift, "products": products,
+        "close_form": ShiftCloseForm() if shift.is_open and shift.vendor_id == request.user.pk else None,
+    })
+
+
+@can_manage_required
+def shifts_close(request, pk):
+    shift = get_object_or_404(Shift, pk=pk, vendor=request.user)
+    form = ShiftCloseForm(request.POST or None)
+    if request.method != "POST" or not form.is_valid():
+        messages.error(request, "Indica el efectivo contado para cerrar el turno.")
+        return redirect("shifts_detail", pk=pk)
+    # condicional: si ya estaba cerrado (otra pestaña) no se sobreescribe el conteo
+    closed = Shift.objects.filter(pk=pk, closed_at__isnull=True).update(
+        closed_at=timezone.now(), counted_cash=round(form.cleaned_data["counted_cash"], 2))
+    if closed:
+        shift.refresh_from_db()
+        messages.success(request, f"Turno #{pk} cerrado. Diferencia: ${shift.difference:.2f}")
+    else:
+        messages.info(request, f"El turno #{pk} ya estaba cerrado.")
+    return redirect("shifts_detail", pk=pk)
@@ -0,0 +1,75 @@
+# AppTienda/views_static.py
+"""
+Sirve STATIC_ROOT en producción (DEBUG=False) sin servidor extra.
+
+- Negocia ``Accept-Encoding`` y entrega la variante ``.br``/``.gz`` generada
+  por ``storage.CompressedManifestStaticFilesStorage``.
+- Los nombres con hash del manifest se envían como ``immutable`` (un año);
+  el resto con caché corta y revalidación por ETag.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.http import require_safe
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+SHORT = "public, max-age=300, must-revalidate"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_hashed_names = None
+
+
+def hashed_names():
+    global _hashed_names
+    if _hashed_names is None:
+        _hashed_names = set(getattr(staticfiles_storage, "hashed_files", {}).values())
+    return _hashed_names
+
+
+def accepted_encodings(header):
+    """{'br', 'gzip', ...} aceptadas (q > 0) según Accept-Encoding."""
+    out = set()
+    for part in (header or "").split(","):
+        token, _, params = part.strip().partition(";")
+        m = re.search(r"q=([0-9.]+)", params)
+        if token and (not m or float(m.group(1)) > 0):
+            out.add(token.strip().lower())
+    return out
+
+
+@require_safe
+def serve(request, path):
+    try:
+        full = safe_join(os.fspath(settings.STATIC_ROOT), path)
+    except Exception:
+        raise Http404("Archivo no encontrado")
+    if not os.path.isfile(full):
+        raise Http404("Archivo no encontrado")
+
+    accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING"))
+    send, encoding = full, None
+    for enc, ext in ENCODINGS:
+        if enc in accepted and os.path.isfile(full + ext):
+            send, encoding = full + ext, enc
+            break
+
+    st = os.stat(send)
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-" + encoding if encoding else ""}"'
+    if etag in (request.META.get("HTTP_IF_NONE_MATCH") or ""):
+        resp = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(full)
+        resp = FileResponse(open(send, "rb"), content_type=content_type or "application/octet-stream")
+        resp["Content-Length"] = st.st_size
+        if encoding:
+            resp["Content-Encoding"] = encoding
+    resp["ETag"] = etag
+    resp["Cache-Control"] = IMMUTABLE if path in hashed_names() else SHORT
+    patch_vary_headers(resp, ("Accept-Encoding",))
+    return resp
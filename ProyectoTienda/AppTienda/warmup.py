@@ -0,0 +1,199 @@
+"""
+Calentamiento del worker antes de recibir tráfico.
+
+``run()`` compila todas las plantillas de AppTienda (quedan en el loader con
+caché), arma el resolver de URLs, abre y ajusta la conexión a la base, y
+precarga lo que la caja y el dashboard piden primero: sucursal actual, mapa de
+códigos de barras, catálogo compartido (shared_catalog), rollups de rankings
+y la primera página de los listados cacheados (listcache).
+
+wsgi.py lo arranca en un hilo con ``start()`` (WARMUP_ON_BOOT): el worker ya
+atiende y ``/healthz/`` responde 503 "starting" hasta que termina. Si falla se
+reintenta ``WARMUP_ATTEMPTS`` veces; si aun así no queda, el worker sigue en
+frío y ``/healthz/`` lo reporta como "degraded" (200) en lugar de sacarlo del
+balanceador para siempre. ``manage.py warmup`` lo corre en primer plano.
+
+A cada conexión nueva se le aplican los PRAGMA de conexión (receiver en
+signals.py); ninguno cambia el archivo de la base. WAL es persistente y lo deja
+la migración 0024_sqlite_wal; ``auto_vacuum`` se convierte con
+``manage.py db_maintenance --convert``.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.http import HttpRequest
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SQLITE_PRAGMAS = {   # solo de la conexión: no escriben nada en el archivo
+    "synchronous": "NORMAL",     # seguro con WAL, un fsync por checkpoint y no por commit
+    "busy_timeout": 5000,        # ms esperando un lock antes de "database is locked"
+    "cache_size": -16000,        # KiB de caché de páginas por conexión
+    "temp_store": "MEMORY",
+    "mmap_size": 64 * 1024 * 1024,
+}
+
+_lock = threading.Lock()
+state = {"ready": False, "running": False, "degraded": False, "attempts": 0, "steps": {}, "error": "",
+         "finished_at": None}
+
+
+# ---------- Conexiones ----------
+def pragmas():
+    return {**SQLITE_PRAGMAS, **getattr(settings, "SQLITE_PRAGMAS", {})}
+
+
+def tune_connection(conn):
+    """Aplica los PRAGMA configurados a una conexión SQLite recién abierta."""
+    if conn.vendor != "sqlite":
+        return
+    with conn.cursor() as cur:
+        for name, value in pragmas().items():
+            if value is not None:
+                cur.execute(f"PRAGMA {name} = {value}")
+
+
+# ---------- Pasos ----------
+def compile_templates():
+    """Compila cada plantilla de AppTienda/templates; el loader con caché las conserva."""
+    root = os.path.join(os.path.dirname(__file__), "templates")
+    n = 0
+    for base, _dirs, files in os.walk(root):
+        for name in files:
+            if name.endswith(".html"):
+                get_template(os.path.relpath(os.path.join(base, name), root).replace(os.sep, "/"))
+                n += 1
+    return n
+
+
+def resolve_urls():
+    resolver = get_resolver()
+    reverse("dashboard")  # llena reverse_dict y compila los patrones
+    return len(resolver.reverse_dict)
+
+
+def open_database():
+    connection.ensure_connection()
+    with connection.cursor() as cur:
+        cur.execute("SELECT 1")
+    return connection.vendor
+
+
+def prime_store_and_codes():
+    from .models import Store
+    from . import barcodes
+    Store.objects.current()
+    return barcodes.warm()
+
+
+def prime_shared_catalog():
+    from . import shared_catalog
+    return shared_catalog.warm()
+
+
+def prime_dashboard():
+    from . import rankings
+    rows = 0
+    for window in rankings.WINDOWS:
+        rows += len(rankings.top_products(window))
+    rows += len(rankings.daily_totals(30))
+    return rows
+
+
+def prime_lists():
+    """Primera página, sin búsqueda, de cada listado cacheado, con y sin permisos de gestión."""
+    from .decorators import user_can_manage
+    from . import listcache, views
+    users = get_user_model().objects.filter(is_active=True).order_by("-is_superuser", "id")
+    variants = {}
+    for u in users[:50]:
+        variants.setdefault(user_can_manage(u), u)
+        if len(variants) == 2:
+            break
+    n = 0
+    for name in listcache.LISTS:
+        view = getattr(views, f"{name}_list")
+        for user in variants.values():
+            view(_request(reverse(f"{name}_list"), user))
+            n += 1
+    return n
+
+
+def _request(path, user):
+    """GET mínimo para llamar una vista de listado fuera de una petición real."""
+    request = HttpRequest()
+    request.method, request.path, request.path_info = "GET", path, path
+    request.META.update(REQUEST_METHOD="GET", PATH_INFO=path, SERVER_NAME="localhost", SERVER_PORT="80")
+    request.user = user
+    return request
+
+
+STEPS = (
+    ("templates", compile_templates),
+    ("urls", resolve_urls),
+    ("database", open_database),
+    ("store_codes", prime_store_and_codes),
+    ("shared_catalog", prime_shared_catalog),
+    ("dashboard", prime_dashboard),
+    ("lists", prime_lists),
+)
+
+
+def _attempt():
+    """Un intento de todos los pasos; True si terminaron."""
+    state.update(error="", steps={})
+    name = None
+    try:
+        for name, fn in STEPS:
+            started = time.perf_counter()
+            result = fn()
+            state["steps"][name] = {"result": result, "ms": round((time.perf_counter() - started) * 1000, 1)}
+        return True
+    except Exception as e:
+        logger.exception("Falló el calentamiento en el paso %s", name)
+        state["error"] = f"{name}: {e}"
+        return False
+
+
+def run(attempts=1, delay=0):
+    """Ejecuta todos los pasos (hasta ``attempts`` intentos); regresa ``state`` con el resultado y milisegundos de cada uno."""
+    with _lock:
+        state.update(running=True, attempts=0)
+        try:
+            for attempt in range(1, attempts + 1):
+                state["attempts"] = attempt
+                if _attempt():
+                    state.update(ready=True, degraded=False)
+                    break
+                if attempt < attempts:
+                    time.sleep(delay)
+        finally:
+            state.update(running=False, finished_at=timezone.now().isoformat())
+    return state
+
+
+def _boot():
+    try:
+        run(getattr(settings, "WARMUP_ATTEMPTS", 3), getattr(settings, "WARMUP_RETRY_SECONDS", 5))
+        if not state["ready"]:
+            # en frío pero atendiendo: mejor que un 503 hasta reiniciar el worker
+            state["degraded"] = True
+            logger.error("Calentamiento incompleto tras %s intentos; el worker atiende sin caché", state["attempts"])
+    finally:
+        connections.close_all()  # las de este hilo
+
+
+def start():
+    """Calienta en un hilo de fondo; regresa el hilo. ``state["running"]`` ya es True al volver."""
+    state["running"] = True
+    thread = threading.Thread(target=_boot, name="warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,25 @@
+from django import forms
+
+
+class TypeaheadSelect(forms.Widget):
+    """
+    Reemplazo de ``Select`` para tablas grandes: no recorre ``choices``; guarda
+    el id en un input oculto y busca en ``url_name`` mientras se teclea
+    (ver static/typeahead.js). Solo consulta la fila seleccionada para
+    mostrar su etiqueta.
+    """
+    template_name = "AppTienda/widgets/typeahead.html"
+
+    class Media:
+        js = ("typeahead.js",)
+
+    def __init__(self, url_name, model, item, placeholder="Escribe para buscar...", attrs=None):
+        super().__init__(attrs)
+        self.url_name, self.model, self.item, self.placeholder = url_name, model, item, placeholder
+
+    def get_context(self, name, value, attrs):
+        ctx = super().get_context(name, value, attrs)
+        obj = self.model.objects.filter(pk=value).first() if value not in (None, "") and str(value).isdigit() else None
+        ctx["widget"].update(url_name=self.url_name, placeholder=self.placeholder,
+                             selected=self.item(obj) if obj else None)
+        return ctx
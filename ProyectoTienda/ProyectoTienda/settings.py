@@ -34,13 +34,18 @@ TEMPLATES = [{
         'django.template.context_processors.request',
         'django.contrib.auth.context_processors.auth',
         'django.contrib.messages.context_processors.messages',
+        'AppTienda.context_processors.store',
     ]},
 }]
 
 WSGI_APPLICATION = 'ProyectoTienda.wsgi.application'
 
 DATABASES = {
-    'default': {'ENGINE':'django.db.backends.sqlite3','NAME': BASE_DIR / 'db.sqlite3'}
+    'default': {'ENGINE':'django.db.backends.sqlite3','NAME': BASE_DIR / 'db.sqlite3',
+                'CONN_MAX_AGE': 300, 'CONN_HEALTH_CHECKS': True,  # conexión persistente por hilo (PRAGMA una vez)
+                # BEGIN IMMEDIATE: una transacción que lee y luego escribe espera el lock (busy_timeout)
+                # en vez de fallar con "database is locked" si el hilo de eventos está escribiendo
+                'OPTIONS': {'transaction_mode': 'IMMEDIATE'}}
     # MySQL (opcional):
     # 'default': {
     #   'ENGINE':'django.db.backends.mysql',
@@ -61,8 +66,81 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'   # manage.py collectstatic (hash + .gz/.br)
 STATICFILES_DIRS = []
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'AppTienda.storage.CompressedManifestStaticFilesStorage'},
+}
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Dominios de correo corporativo permitidos
 CORPORATE_EMAIL_DOMAINS = ['company.com']  # cámbialo a tu dominio
+
+# Bitácora append-only de ventas/stock (ver AppTienda/journal.py)
+JOURNAL_DIR = BASE_DIR / 'journal'
+JOURNAL_BATCH_SIZE = 200                  # registros por escritura
+JOURNAL_FLUSH_SECONDS = 2.0               # espera máxima antes de escribir
+JOURNAL_SEGMENT_BYTES = 8 * 1024 * 1024   # tamaño para rotar y comprimir
+
+# Cola de tareas en segundo plano (ver AppTienda/jobs.py; worker: manage.py run_jobs)
+JOBS_OUTPUT_DIR = BASE_DIR / 'exports'
+JOBS_RETRY_BASE_SECONDS = 5      # backoff: 5s, 10s, 20s...
+JOBS_STALE_SECONDS = 600         # sin heartbeat en este tiempo => se reencola
+JOBS_HEARTBEAT_SECONDS = 60      # cada cuánto run_jobs marca vivas sus tareas y busca huérfanas
+
+# Miniaturas de imágenes (ver AppTienda/thumbnails.py; regenerar: manage.py rebuild_thumbnails)
+THUMBNAIL_ROOT = BASE_DIR / 'thumbs'
+THUMBNAIL_URL = '/thumbs/'
+THUMBNAIL_SIZES = {'icon': 80, 'sm': 160, 'md': 480}   # px del lado (2x del tamaño en pantalla)
+THUMBNAIL_MAX_BYTES = 20 * 1024 * 1024
+
+# Sucursal de esta instalación (cada sucursal corre su propia copia y base de datos)
+STORE_CODE = os.environ.get('STORE_CODE', 'main')
+STORE_NAME = os.environ.get('STORE_NAME', 'Sucursal principal')
+
+# Caché de listados renderizados (ver AppTienda/listcache.py); 0 la desactiva
+LIST_CACHE_SECONDS = 600
+
+# Ventas más viejas que esto se mueven a ArchivedSale (manage.py archive_sales)
+SALES_ARCHIVE_DAYS = 365
+
+# Mapa de códigos de barras en memoria (AppTienda/barcodes.py): cada cuánto se revisa si otro proceso lo cambió
+BARCODE_RECHECK_SECONDS = 1.0
+
+# Calentamiento del worker al arrancar (AppTienda/warmup.py; manual: manage.py warmup)
+WARMUP_ON_BOOT = True
+WARMUP_ATTEMPTS = 3         # intentos antes de atender en frío ("degraded" en /healthz/)
+WARMUP_RETRY_SECONDS = 5    # pausa entre intentos
+SQLITE_PRAGMAS = {}   # sobreescribe los de warmup.SQLITE_PRAGMAS, p. ej. {'mmap_size': 0}
+
+# Eventos de dominio (AppTienda/events.py): handlers diferidos en un hilo de fondo, por lotes
+EVENTS_DEFERRED = True     # False: también corren en el hilo que confirma (útil en scripts)
+EVENTS_BATCH_SIZE = 500
+EVENTS_OUTBOX_LEASE_SECONDS = 300   # un evento sin entregar tras este plazo se da por perdido y se reentrega
+EVENTS_REPLAY_SECONDS = 60          # cada cuánto la cola busca eventos vencidos en el outbox
+
+# Mantenimiento de SQLite (AppTienda/maintenance.py; manage.py db_maintenance [--schedule])
+DB_MAINTENANCE_WINDOW = ('02:00', '05:00')   # hora local de poco movimiento
+DB_MAINTENANCE_VACUUM_SECONDS = 30           # tope del vacuum incremental por corrida
+DB_MAINTENANCE_VACUUM_PAGES = 256            # páginas por paso (cada paso toma el lock de escritura)
+
+# Catálogo público en HTML estático (AppTienda/catalog_site.py; completo: manage.py build_catalog_site)
+CATALOG_SITE_ROOT = BASE_DIR / 'catalog_site'   # servir esta carpeta con el servidor web; None lo desactiva
+
+# Catálogo compartido entre workers en un archivo mapeado (AppTienda/shared_catalog.py)
+SHARED_CATALOG_PATH = BASE_DIR / 'catalog.bin'
+SHARED_CATALOG_RECHECK_SECONDS = 0.2   # cada cuánto cada proceso revisa si hay versión nueva
+
+# Respaldos en línea de SQLite (AppTienda/backup.py; manage.py backup_db [--incremental])
+BACKUP_DIR = BASE_DIR / 'backups'
+BACKUP_PAGES = 256      # páginas por paso de la API de backup
+BACKUP_PAUSE = 0.005    # segundos entre pasos
+BACKUP_KEEP = 7         # respaldos completos que se conservan (con sus incrementales)
+
+# Apartados de stock por carrito (AppTienda/reservations.py)
+STOCK_RESERVATION_SECONDS = 300        # vigencia de un apartado; cada cambio de cantidad la renueva
+STOCK_RESERVATION_SWEEP_SECONDS = 60   # cada cuánto la cola libera los vencidos
+
+# Top-K de más vendidos ya ordenados (AppTienda/rankings.py): filas por ventana/métrica/categoría
+RANKINGS_DEPTH = 50
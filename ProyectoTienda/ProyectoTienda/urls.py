@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from AppTienda import views_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('AppTienda.urls')),
 ]
+
+if not settings.DEBUG:
+    # En DEBUG runserver sirve los estáticos; en producción, desde STATIC_ROOT precomprimido
+    urlpatterns.insert(0, re_path(rf"^{settings.STATIC_URL.strip('/')}/(?P<path>.+)$", views_static.serve))
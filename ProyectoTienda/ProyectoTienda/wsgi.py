@@ -14,3 +14,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ProyectoTienda.settings')
 
 application = get_wsgi_application()
 
+# calienta plantillas, URLs, conexión y cachés en un hilo (AppTienda/warmup.py);
+# /healthz/ responde 503 "starting" hasta que termina
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, "WARMUP_ON_BOOT", True):
+    from AppTienda import warmup  # noqa: E402
+    warmup.start()